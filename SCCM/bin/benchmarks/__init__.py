@@ -0,0 +1,3 @@
+"""
+Scripts that measure the performance of the application against synthetic data.
+"""
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+Load test of the CCAM clients against the mock CCAM server. Reports calls and HTTP requests per
+second, p50/p95/p99 call latency, 429 responses, client retries and failed calls for the requests
+based get_ccam_account_information and for AsyncHttpClient. The mock server is started in this
+process unless --url points at a running one.
+
+Usage: python -m SCCM.bin.benchmarks.ccam_load_test --calls 200 --cases-per-call 5 --latency 0.05
+       --rate-limit 50
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from aiohttp import web
+from pydantic import SecretStr
+
+from SCCM.bin.benchmarks.ccam_mock_server import ACCOUNTS_PATH, MockCCAM
+from SCCM.bin.ccam_lookup import get_ccam_account_information
+from SCCM.config.config_model import PLRASettings
+from SCCM.services.api_services import AsyncHttpClient
+
+
+@dataclass
+class LoadTestResult:
+    client: str
+    elapsed: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    failed: int = 0
+    # the requests based client does not retry
+    retries: int = None
+    http_requests: int = None
+    rate_limited: int = None
+
+    def report(self) -> str:
+        calls = len(self.latencies) + self.failed
+        p50, p95, p99 = (statistics.quantiles(self.latencies, n=100)[i] * 1000
+                         for i in (49, 94, 98)) if len(self.latencies) > 1 else (float('nan'),) * 3
+        http = f'{self.http_requests / self.elapsed:>9.1f}' if self.http_requests is not None \
+            else f'{"n/a":>9}'
+        limited = f'{self.rate_limited:>7}' if self.rate_limited is not None else f'{"n/a":>7}'
+        retries = f'{self.retries:>9}' if self.retries is not None else f'{"n/a":>9}'
+        return (f'{self.client:<7}{calls:>7}{calls / self.elapsed:>9.1f}{http}'
+                f'{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}{limited}{retries}{self.failed:>8}')
+
+
+REPORT_HEADER = (f'{"Client":<7}{"Calls":>7}{"Calls/s":>9}{"HTTP/s":>9}'
+                 f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"429s":>7}{"Retries":>9}{"Failed":>8}')
+
+
+class MockServerThread:
+    """
+    Runs the mock CCAM server on its own event loop in a background thread
+
+    """
+
+    def __init__(self, mock: MockCCAM):
+        self.mock = mock
+        self.url = None
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    async def _start(self):
+        self._runner = web.AppRunner(self.mock.app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, '127.0.0.1', 0).start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f'http://{host}:{port}'
+
+    def __enter__(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+def client_settings(url: str, max_concurrency: int, requests_per_second: float) -> PLRASettings:
+    # only the CCAM settings are used by the clients
+    return PLRASettings.construct(ccam_username='load-test', ccam_password=SecretStr('load-test'),
+                                  base_url=url, ccam_url=f'{url}{ACCOUNTS_PATH}', cert_file=None,
+                                  ccam_max_concurrency=max_concurrency,
+                                  ccam_requests_per_second=requests_per_second)
+
+
+def case_lists(calls: int, cases_per_call: int) -> list[list[str]]:
+    return [[f'DWIW321CV{call * cases_per_call + i:06d}-001' for i in range(cases_per_call)]
+            for call in range(calls)]
+
+
+def run_sync(settings: PLRASettings, cases: list[list[str]], threads: int) -> LoadTestResult:
+    """
+    Calls get_ccam_account_information for each case list from a pool of threads
+    """
+    result = LoadTestResult('sync')
+
+    def call(case_list):
+        start = time.perf_counter()
+        try:
+            get_ccam_account_information(case_list, settings=settings, name='load test')
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(call, cases))
+    result.elapsed = time.perf_counter() - start
+    # outcomes are counted here rather than in the pool threads
+    result.latencies = [latency for latency in latencies if latency is not None]
+    result.failed = len(latencies) - len(result.latencies)
+    return result
+
+
+async def run_async(settings: PLRASettings, cases: list[list[str]]) -> LoadTestResult:
+    """
+    Calls AsyncHttpClient.get_CCAM_balances_async for every case list concurrently with one client
+    """
+    result = LoadTestResult('async')
+    client = AsyncHttpClient(settings=settings)
+    await client.start()
+
+    async def call(case_list):
+        start = time.perf_counter()
+        try:
+            await client.get_CCAM_balances_async({'caseNumberList': case_list}, concurrent=True)
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        latencies = await asyncio.gather(*(call(case_list) for case_list in cases))
+    finally:
+        await client.stop()
+    result.elapsed = time.perf_counter() - start
+    result.latencies = [latency for latency in latencies if latency is not None]
+    result.failed = len(latencies) - len(result.latencies)
+    result.retries = client.retries
+    return result
+
+
+def measure(client: str, url: str, args, mock: MockCCAM = None) -> LoadTestResult:
+    settings = client_settings(url, args.max_concurrency, args.requests_per_second)
+    cases = case_lists(args.calls, args.cases_per_call)
+    requests_before, limited_before = (mock.requests, mock.rate_limited) if mock else (0, 0)
+    if client == 'sync':
+        result = run_sync(settings, cases, args.threads)
+    else:
+        result = asyncio.run(run_async(settings, cases))
+    if mock:
+        result.http_requests = mock.requests - requests_before
+        result.rate_limited = mock.rate_limited - limited_before
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url',
+                        help='base url of a running mock server. Starts one in this process if not '
+                             'given')
+    parser.add_argument('--client', choices=['sync', 'async', 'both'], default='both')
+    parser.add_argument('--calls', type=int, default=200, help='number of client calls')
+    parser.add_argument('--cases-per-call', type=int, default=5, help='case numbers in each call')
+    parser.add_argument('--threads', type=int, default=8, help='threads calling the sync client')
+    parser.add_argument('--max-concurrency', type=int, default=10,
+                        help='CCAM_MAX_CONCURRENCY for the async client')
+    parser.add_argument('--requests-per-second', type=float, default=50,
+                        help='CCAM_REQUESTS_PER_SECOND for the async client')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='mock server latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.02, help='mock server jitter in seconds')
+    parser.add_argument('--rate-limit', type=float, default=0,
+                        help='mock server requests per second before 429')
+    args = parser.parse_args()
+
+    clients = ['sync', 'async'] if args.client == 'both' else [args.client]
+    print(REPORT_HEADER)
+    if args.url:
+        for client in clients:
+            print(measure(client, args.url, args).report())
+        return
+    mock = MockCCAM(args.latency, args.jitter, args.rate_limit)
+    with MockServerThread(mock) as server:
+        for client in clients:
+            print(measure(client, server.url, args, mock).report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Local stand-in for the JIFMS CCAM /ccam/v1/Accounts endpoint used to measure the CCAM clients
+without calling the production API. Each case number returns one to three synthetic account lines,
+derived from the case number so repeated requests return the same balances. Requests above the rate
+limit receive 429 Too Many Requests.
+
+Usage: python -m SCCM.bin.benchmarks.ccam_mock_server --port 8765 --latency 0.05 --jitter 0.02
+       --rate-limit 20
+"""
+import argparse
+import asyncio
+import random
+import time
+import zlib
+from collections import deque
+
+from aiohttp import web
+
+ACCOUNTS_PATH = '/ccam/v1/Accounts'
+# page size of the production API when a request does not set one
+DEFAULT_PAGE_SIZE = 20
+
+
+def synthetic_lines(case_number: str) -> list[dict]:
+    """
+    :param case_number: CCAM case number, with or without the party suffix
+    :return: account lines for the case
+    """
+    case_num = case_number.split('-')[0].upper()
+    seed = zlib.crc32(case_num.encode())
+    lines = []
+    for party in range(seed % 3 + 1):
+        owed = 350 + 50 * ((seed >> 4) % 3) if party == 0 else 0
+        collected = round(((seed >> 8) + party * 137) % (owed * 100 + 1) / 100, 2) if owed else 0
+        lines.append({'case_num': case_num, 'prty_cd': f'WIW{party + 1}',
+                      'prty_nm': f'PAYEE {seed % 100000}',
+                      'acct_cd': 'WIWAPCCA2659', 'prnc_owed': owed, 'prnc_clld': collected,
+                      'totl_ostg': round(owed - collected, 2)})
+    return lines
+
+
+class MockCCAM:
+    """
+    Request handler with configurable latency, jitter and rate limit. Counts requests and rate
+    limited responses
+
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_limit: float = 0,
+                 seed: int = 57001):
+        """
+        :param latency: seconds added to every response
+        :param jitter: maximum seconds randomly added to or removed from the latency
+        :param rate_limit: requests accepted per second, 0 for no limit
+        :param seed: seed for the jitter
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.rate_limited = 0
+        self._accepted = deque()
+
+    def _over_rate_limit(self) -> bool:
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        while self._accepted and now - self._accepted[0] >= 1:
+            self._accepted.popleft()
+        if len(self._accepted) >= self.rate_limit:
+            return True
+        self._accepted.append(now)
+        return False
+
+    async def accounts(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self._over_rate_limit():
+            self.rate_limited += 1
+            raise web.HTTPTooManyRequests(headers={'Retry-After': '1'})
+
+        # the requests client sends a query string with GET, the aiohttp client a JSON body with
+        # POST
+        if request.method == 'POST':
+            body = await request.json()
+            cases = body.get('caseNumberList', [])
+        else:
+            body = request.query
+            cases = request.query.getall('caseNumberList', [])
+        if isinstance(cases, str):
+            cases = [cases]
+        page = int(body.get('page', 1))
+        size = int(body.get('size', DEFAULT_PAGE_SIZE))
+
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        lines = [line for case in cases for line in synthetic_lines(case)]
+        total_pages = max(1, -(-len(lines) // size))
+        return web.json_response({'data': lines[(page - 1) * size:page * size],
+                                  'meta': {'pageInfo': {'totalPages': total_pages, 'number': page,
+                                                        'size': size, 'totalElements': len(lines),
+                                                        'last': page >= total_pages}}})
+
+    def app(self) -> web.Application:
+        """
+        :return: application serving the accounts endpoint
+        """
+        app = web.Application()
+        app.router.add_get(ACCOUNTS_PATH, self.accounts)
+        app.router.add_post(ACCOUNTS_PATH, self.accounts)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.02,
+                        help='maximum seconds added to or removed from latency')
+    parser.add_argument('--rate-limit', type=float, default=0,
+                        help='requests per second before 429, 0 for none')
+    args = parser.parse_args()
+
+    mock = MockCCAM(args.latency, args.jitter, args.rate_limit)
+    print(f'Serving mock CCAM at http://127.0.0.1:{args.port}{ACCOUNTS_PATH}')
+    web.run_app(mock.app(), host='127.0.0.1', port=args.port, print=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Measures per payee time and memory of the objects built while a check is processed, comparing the
+pydantic schemas to the slotted objects in schemas.domain. Half of the synthetic payees are new
+prisoners with cases found on the network share and half are prisoners loaded from the database.
+
+Usage: python -m SCCM.bin.benchmarks.domain_objects_benchmark --payees 5000
+"""
+import argparse
+import os
+import random
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from decimal import Decimal
+from types import SimpleNamespace
+
+import SCCM.bin.payment_strategy as payment
+from SCCM.schemas.balance import Balance
+from SCCM.schemas.case_schema import CaseCreate
+from SCCM.schemas.domain import Case, CaseBalance, Payee
+from SCCM.schemas.money import Money
+from SCCM.schemas.prisoner_schema import PrisonerCreate, PrisonerModel
+
+
+def synthetic_check(number_of_payees: int) -> list[tuple]:
+    """
+    Creates payee rows and, for every second payee, a database prisoner with one to three active
+    cases
+    """
+    random.seed(5000)
+    rows = []
+    for i in range(1, number_of_payees + 1):
+        amount = random.randint(100, 5000) / 100
+        cases = [SimpleNamespace(id=i * 10 + n, prisoner_id=i, ecf_case_num=f'{n + 10}-CV-{i}',
+                                 case_comment='ACTIVE', acct_cd='WIWAPCCA2659',
+                                 ccam_case_num=f'DWIW3{n + 10}CV{i:06d}-001',
+                                 amount_assessed=Decimal('350.00'),
+                                 amount_collected=Decimal('10.00'), amount_owed=Decimal('340.00'))
+                 for n in range(random.randint(1, 3))]
+        prisoner_orm = None
+        if i % 2 == 0:
+            prisoner_orm = SimpleNamespace(id=i, doc_number=i, legal_name=f'Payee {i}',
+                                           judgment_name=f'PAYEE, {i}',
+                                           vendor_code='WIW1', cases_list=cases)
+        rows.append((i, f'Payee {i}', amount, cases, prisoner_orm))
+    return rows
+
+
+def apply_payment(p, check_number: int) -> None:
+    if len(p.cases_list) > 1:
+        strategy = payment.MultipleCasePaymentProcess()
+    else:
+        strategy = payment.SingleCasePaymentProcess()
+    payment.Context(strategy).process_payment(p, check_number)
+
+
+def pydantic_payees(rows: list[tuple]) -> list:
+    payees = []
+    for doc_number, name, amount, cases, prisoner_orm in rows:
+        p = PrisonerCreate(doc_number=doc_number, legal_name=name, amount_paid=amount)
+        if prisoner_orm:
+            p = PrisonerModel.from_orm(prisoner_orm)
+            p.amount_paid = Money(amount)
+            for case in p.cases_list:
+                case.balance = Balance(amount_assessed=case.amount_assessed,
+                                       amount_collected=case.amount_collected,
+                                       amount_owed=case.amount_owed)
+        else:
+            for case in cases:
+                p.cases_list.append(CaseCreate(ecf_case_num=case.ecf_case_num,
+                                               case_comment='ACTIVE'))
+                p.cases_list[-1].balance = Balance(amount_assessed=case.amount_assessed,
+                                                   amount_collected=case.amount_collected,
+                                                   amount_owed=case.amount_owed)
+        apply_payment(p, 57001)
+        payees.append(p)
+    return payees
+
+
+def domain_payees(rows: list[tuple]) -> list:
+    payees = []
+    for doc_number, name, amount, cases, prisoner_orm in rows:
+        p = Payee.from_check(doc_number, name, amount)
+        if prisoner_orm:
+            p = Payee.from_orm(prisoner_orm, p.amount_paid)
+            for case in p.cases_list:
+                case.balance = CaseBalance(case.amount_assessed, case.amount_collected,
+                                           case.amount_owed)
+        else:
+            for case in cases:
+                p.cases_list.append(Case.from_directory(case.ecf_case_num))
+                p.cases_list[-1].balance = CaseBalance(Money(case.amount_assessed),
+                                                       Money(case.amount_collected),
+                                                       Money(case.amount_owed))
+        apply_payment(p, 57001)
+        payees.append(p)
+    return payees
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--payees', type=int, default=5000,
+                        help='number of synthetic payees on the check')
+    args = parser.parse_args()
+
+    rows = synthetic_check(args.payees)
+    for name, build in (('pydantic', pydantic_payees), ('slotted', domain_payees)):
+        # the strategies print each payment applied to multiple cases
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            start = time.perf_counter()
+            build(rows)
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            payees = build(rows)
+            retained, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        print(f'{name:<10}{elapsed:>8.3f} s  {elapsed / args.payees * 1e6:>8.1f} us/payee  '
+              f'{retained / args.payees:>8.0f} bytes/payee retained for {len(payees):,} payees')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Measures a full check write and a full reconciliation against a synthetic database under each SQLite
+engine profile in db_session.ENGINE_PROFILES. Point --directory at the network share to measure the
+profiles where the production database lives.
+
+Usage: python -m SCCM.bin.benchmarks.engine_profile_benchmark --cases 100000 --payees 1000
+       --checks 3
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+
+import sqlalchemy.orm
+from sqlalchemy import select
+
+import SCCM.bin.payment_strategy as payment
+from SCCM.bin.benchmarks.index_lookup_benchmark import create_database
+from SCCM.bin.ccam_lookup import sum_account_balances
+from SCCM.bin.reconciliation.reconcile_db_to_CCAM_for_all_prisoners import reconcile_batch
+from SCCM.models.court_cases import CourtCase
+from SCCM.models.prisoners import Prisoner
+from SCCM.models.reconciliation_checkpoint import ReconciliationCheckpoint
+from SCCM.schemas.domain import Case, CaseBalance, Payee
+from SCCM.schemas.money import Money
+from SCCM.services import crud
+from SCCM.services.db_session import ENGINE_PROFILES, create_sqlite_engine
+
+CASES_PER_PRISONER = 4
+
+
+def synthetic_payees(session, check_number: int, number_of_payees: int,
+                     number_of_cases: int) -> list[Payee]:
+    """
+    Builds processed payees for a check. Half are prisoners in the database and half are new
+    prisoners with one case
+    """
+    number_of_prisoners = number_of_cases // CASES_PER_PRISONER
+    prisoner_ids = random.sample(range(1, number_of_prisoners + 1), number_of_payees // 2)
+    prisoners = {row.id: SimpleNamespace(cases_list=[], **row._mapping) for row in session.execute(
+        select(Prisoner.id, Prisoner.doc_number, Prisoner.legal_name, Prisoner.judgment_name,
+               Prisoner.vendor_code)
+        .where(Prisoner.id.in_(prisoner_ids)))}
+    active_cases = select(CourtCase).where(CourtCase.prisoner_id.in_(prisoner_ids),
+                                           CourtCase.case_comment == 'ACTIVE')
+    for case in session.execute(active_cases).scalars():
+        prisoners[case.prisoner_id].cases_list.append(case)
+
+    payees = []
+    for prisoner in prisoners.values():
+        p = Payee.from_orm(prisoner, Money.from_cents(random.randint(100, 5000)))
+        for case in p.cases_list:
+            case.balance = CaseBalance(case.amount_assessed, case.amount_collected,
+                                       case.amount_owed)
+        payees.append(p)
+    for i in range(number_of_payees - len(payees)):
+        doc_number = check_number * 10000000 + i
+        p = Payee.from_check(doc_number, f'New Payee {doc_number}', random.randint(100, 5000) / 100)
+        case = Case.from_directory(f'21-cv-{doc_number}')
+        case.ccam_case_num = f'DWIW321CV{doc_number}-001'
+        case.balance = CaseBalance(Money(350), Money(0), Money(350))
+        p.cases_list.append(case)
+        payees.append(p)
+
+    for p in payees:
+        if len(p.cases_list) > 1:
+            strategy = payment.MultipleCasePaymentProcess()
+        elif p.cases_list:
+            strategy = payment.SingleCasePaymentProcess()
+        else:
+            strategy = payment.OverPaymentProcess()
+        payment.Context(strategy).process_payment(p, check_number)
+    return payees
+
+
+def write_checks(factory, number_of_checks: int, number_of_payees: int,
+                 number_of_cases: int) -> float:
+    """
+    Writes each check in its own transaction as state_check_convert.write_check does
+
+    :return: seconds spent saving and committing the checks
+    """
+    elapsed = 0
+    for check_number in range(1, number_of_checks + 1):
+        session = factory()
+        payees = synthetic_payees(session, check_number, number_of_payees, number_of_cases)
+        start = time.perf_counter()
+        crud.save_check_results(session, payees)
+        session.commit()
+        elapsed += time.perf_counter() - start
+        session.close()
+    return elapsed
+
+
+def reconcile(factory, batch_size: int) -> float:
+    """
+    Reconciles every active case in checkpointed batches as reconcile_in_batches does, with
+    synthetic CCAM balances where one case in ten differs
+
+    :return: seconds for the reconciliation
+    """
+    session = factory()
+    start = time.perf_counter()
+    checkpoint = ReconciliationCheckpoint(batch_size=batch_size, last_court_case_id=0,
+                                          cases_reconciled=0, cases_updated=0)
+    session.add(checkpoint)
+    session.commit()
+    while cases := crud.get_active_case_balances(session, checkpoint.last_court_case_id,
+                                                 batch_size):
+        ccam_lines = [{'case_num': case.ccam_case_num.split('-')[0], 'prty_cd': 'WIW1',
+                       'acct_cd': 'WIWAPCCA2659', 'prnc_owed': float(case.amount_assessed),
+                       'prnc_clld': float(case.amount_collected) + (5 if case.id % 10 == 0 else 0),
+                       'totl_ostg': float(case.amount_owed) - (5 if case.id % 10 == 0 else 0)}
+                      for case in cases]
+        reconciliation_rows, balance_rows = reconcile_batch(cases, sum_account_balances(ccam_lines))
+        crud.save_reconciliation_batch(session, reconciliation_rows, balance_rows)
+        checkpoint.last_court_case_id = cases[-1].id
+        checkpoint.cases_reconciled += len(cases)
+        checkpoint.cases_updated += len(balance_rows)
+        session.commit()
+    elapsed = time.perf_counter() - start
+    session.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cases', type=int, default=100000, help='number of synthetic court cases')
+    parser.add_argument('--payees', type=int, default=1000, help='number of payees on each check')
+    parser.add_argument('--checks', type=int, default=3, help='number of checks written')
+    parser.add_argument('--batch-size', type=int, default=500, help='reconciliation batch size')
+    parser.add_argument('--directory', default=None,
+                        help='directory for the databases, a temporary directory if not given')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as tmp:
+        seed_file = os.path.join(tmp, 'seed.sqlite')
+        print(f'Creating synthetic database with {args.cases:,} cases')
+        create_database(seed_file, args.cases, CASES_PER_PRISONER)
+
+        print(f'\n{"Profile":<10}{"Check write (s)":>18}{"Reconcile (s)":>16}')
+        for name, profile in ENGINE_PROFILES.items():
+            db_file = os.path.join(tmp, f'{name}.sqlite')
+            shutil.copyfile(seed_file, db_file)
+            engine = create_sqlite_engine(db_file, profile)
+            factory = sqlalchemy.orm.sessionmaker(bind=engine)
+            random.seed(57001)
+            # the payment strategies and reconciliation print progress
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                check_write = write_checks(factory, args.checks, args.payees, args.cases)
+                reconciliation = reconcile(factory, args.batch_size)
+            engine.dispose()
+            print(f'{name:<10}{check_write:>18.3f}{reconciliation:>16.3f}')
+
+
+if __name__ == '__main__':
+    main()
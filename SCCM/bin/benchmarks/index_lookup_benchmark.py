@@ -0,0 +1,116 @@
+"""
+Measures case lookup latency on a synthetic database with and without the case lookup indexes.
+
+Usage: python -m SCCM.bin.benchmarks.index_lookup_benchmark --cases 100000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import sqlalchemy
+
+# noinspection PyUnresolvedReferences
+import SCCM.models.__all_models
+from SCCM.models.modelbase import SqlAlchemyBase
+
+CASE_LOOKUP_INDEXES = ['ix_court_cases_prisoner_id_case_comment', 'ix_court_cases_ecf_case_num',
+                       'ix_court_cases_ccam_case_num', 'ix_case_transactions_court_case_id']
+
+LOOKUPS = {
+    'cases_list by prisoner_id': ('SELECT * FROM court_cases WHERE prisoner_id = ?', 'prisoner_id'),
+    'active cases by prisoner_id': (("SELECT * FROM court_cases WHERE prisoner_id = ? AND "
+                                     "case_comment = 'ACTIVE'"), 'prisoner_id'),
+    'case by ecf_case_num': ('SELECT * FROM court_cases WHERE ecf_case_num = ?', 'ecf_case_num'),
+    'case by ccam_case_num': ('SELECT * FROM court_cases WHERE ccam_case_num = ?', 'ccam_case_num'),
+    'case_transactions by court_case_id': (('SELECT * FROM case_transactions '
+                                            'WHERE court_case_id = ?'), 'case_id'),
+}
+
+
+def create_database(db_file: str, number_of_cases: int, cases_per_prisoner: int = 4) -> None:
+    """
+    Creates the application schema and loads synthetic prisoners, cases and one transaction per case
+
+    :param db_file: SQLite database file
+    :param number_of_cases: number of court cases to create
+    :param cases_per_prisoner: number of cases for each prisoner
+    """
+    engine = sqlalchemy.create_engine(f'sqlite+pysqlite:///{db_file}')
+    SqlAlchemyBase.metadata.create_all(engine)
+    engine.dispose()
+
+    number_of_prisoners = number_of_cases // cases_per_prisoner
+    conn = sqlite3.connect(db_file)
+    with conn:
+        conn.executemany('INSERT INTO prisoners (id, doc_number, legal_name, judgment_name) '
+                         'VALUES (?,?,?,?)',
+                         ((i, 100000 + i, f'Payee {i}', f'PAYEE, {i}')
+                          for i in range(1, number_of_prisoners + 1)))
+        conn.executemany('INSERT INTO court_cases (id, prisoner_id, ecf_case_num, ccam_case_num, '
+                         'case_comment, amount_assessed, amount_collected, amount_owed) '
+                         'VALUES (?,?,?,?,?,350,0,350)',
+                         ((i, (i - 1) // cases_per_prisoner + 1, f'{i % 30:02d}-CV-{i}',
+                           f'DWIW3{i:012d}-001', 'PAID' if i % 3 == 0 else 'ACTIVE')
+                          for i in range(1, number_of_cases + 1)))
+        conn.executemany('INSERT INTO case_transactions (court_case_id, check_number, amount_paid) '
+                         'VALUES (?,?,10)',
+                         ((i, 57686) for i in range(1, number_of_cases + 1)))
+    conn.close()
+
+
+def time_lookups(db_file: str, number_of_cases: int, cases_per_prisoner: int, repeat: int) -> dict:
+    """
+    Times each lookup for random keys
+
+    :return: dictionary of average latency in milliseconds by lookup
+    """
+    random.seed(57686)
+    conn = sqlite3.connect(db_file)
+    results = {}
+    for name, (sql, key) in LOOKUPS.items():
+        ids = [random.randint(1, number_of_cases) for _ in range(repeat)]
+        keys = {
+            'prisoner_id': [(i - 1) // cases_per_prisoner + 1 for i in ids],
+            'ecf_case_num': [f'{i % 30:02d}-CV-{i}' for i in ids],
+            'ccam_case_num': [f'DWIW3{i:012d}-001' for i in ids],
+            'case_id': ids,
+        }[key]
+        start = time.perf_counter()
+        for k in keys:
+            conn.execute(sql, (k,)).fetchall()
+        results[name] = (time.perf_counter() - start) / repeat * 1000
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cases', type=int, default=100000, help='number of synthetic court cases')
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='number of lookups timed for each query')
+    args = parser.parse_args()
+    cases_per_prisoner = 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'benchmark.sqlite')
+        print(f'Creating synthetic database with {args.cases:,} cases')
+        create_database(db_file, args.cases, cases_per_prisoner)
+        after = time_lookups(db_file, args.cases, cases_per_prisoner, args.repeat)
+
+        conn = sqlite3.connect(db_file)
+        for index in CASE_LOOKUP_INDEXES:
+            conn.execute(f'DROP INDEX {index}')
+        conn.close()
+        before = time_lookups(db_file, args.cases, cases_per_prisoner, args.repeat)
+
+    print(f'\n{"Lookup":<38}{"Before (ms)":>14}{"After (ms)":>14}{"Speedup":>10}')
+    for name in LOOKUPS:
+        speedup = before[name] / after[name]
+        print(f'{name:<38}{before[name]:>14.3f}{after[name]:>14.3f}{speedup:>9.0f}x')
+
+
+if __name__ == '__main__':
+    main()
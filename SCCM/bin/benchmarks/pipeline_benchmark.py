@@ -0,0 +1,193 @@
+"""
+Times each stage of state check processing against synthetic data from synthetic_data and the mock
+CCAM server, then times a full run of state_check_convert.run. Results are appended to a JSON file
+with the current git commit and compared with the previous result for the same parameters, so
+regressions show up between commits.
+
+Usage: python -m SCCM.bin.benchmarks.pipeline_benchmark --payees 10000 --checks 2 --lines 500
+       --output results.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from SCCM.bin.benchmarks import synthetic_data
+from SCCM.bin.benchmarks.ccam_load_test import MockServerThread
+from SCCM.bin.benchmarks.ccam_mock_server import ACCOUNTS_PATH, MockCCAM
+from SCCM.bin.state_check_convert import prepare_check, run, write_check
+from SCCM.config.config_model import PLRASettings, load_settings
+from SCCM.services.case_discovery import CaseDirectoryIndex
+from SCCM.services.ccam_cache import CCAMCache
+from SCCM.services.db_session import DbSession
+from SCCM.services.name_index import PrisonerNameIndex
+from SCCM.services.working_copy import open_database
+from SCCM.util import StageTimer
+
+
+def git_commit() -> str:
+    """
+    :return: commit of the working tree, or None outside a git checkout
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_data(directory: str, args) -> dict:
+    """
+    Reuses synthetic data in the directory when it was generated with the same parameters, otherwise
+    generates it
+
+    :return: manifest from synthetic_data.generate
+    """
+    parameters = {'payees': args.payees, 'checks': args.checks, 'lines': args.lines,
+                  'existing': args.existing, 'seed': args.seed}
+    manifest_file = os.path.join(directory, synthetic_data.MANIFEST_FILE)
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+        if manifest['parameters'] == parameters:
+            return manifest
+    print(f'Generating {args.payees:,} synthetic payees in {directory}')
+    return synthetic_data.generate(directory, args.payees, args.checks, args.lines, args.existing,
+                                   args.seed)
+
+
+def reset(manifest: dict, settings: PLRASettings) -> None:
+    """
+    Restores the seed database and removes the caches, backups and upload files of the previous run
+    so every run starts cold
+    """
+    shutil.copyfile(manifest['seed_file'], manifest['db_file'])
+    for file in (settings.ccam_cache_file, settings.name_index_snapshot,
+                 settings.case_index_snapshot):
+        if os.path.exists(file):
+            os.remove(file)
+    shutil.rmtree(settings.db_backup_directory, ignore_errors=True)
+    os.makedirs(settings.db_backup_directory)
+    check_directory = os.path.dirname(manifest['check_files'][0])
+    for file in os.listdir(check_directory):
+        if not file.endswith('.xls'):
+            os.remove(os.path.join(check_directory, file))
+
+
+def time_stages(files: list[str], settings: PLRASettings) -> list[dict]:
+    """
+    Prepares and writes each check in this process, as process_checks does with one worker
+
+    :return: check number and seconds spent in each stage for every check
+    """
+    checks = []
+    name_index = PrisonerNameIndex(settings.name_index_snapshot)
+    case_index = CaseDirectoryIndex(settings.case_index_snapshot, settings.case_scan_workers)
+    ccam_cache = CCAMCache(settings.ccam_cache_file, settings.ccam_cache_ttl)
+    with open_database(settings):
+        session = DbSession.factory()
+        try:
+            for file in files:
+                timer = StageTimer()
+                prepared = prepare_check(file, settings, ccam_cache, name_index, case_index, timer)
+                write_check(session, prepared, settings, timer)
+                checks.append({'check_number': int(prepared.check_number),
+                               'payees': len(prepared.prisoner_list), 'stages': timer.stages})
+        finally:
+            session.close()
+            ccam_cache.close()
+    return checks
+
+
+def total_stages(checks: list[dict]) -> dict:
+    totals = {}
+    for check in checks:
+        for stage, seconds in check['stages'].items():
+            totals[stage] = totals.get(stage, 0.0) + seconds
+    return totals
+
+
+def previous_result(results: list[dict], parameters: dict) -> dict:
+    """
+    :return: latest result with the same data, workers and latency, or None
+    """
+    return next((r for r in reversed(results) if r['parameters'] == parameters), None)
+
+
+def report(result: dict, previous: dict | None = None) -> None:
+    rows = dict(result['stages'], **{'end to end': result['end_to_end']})
+    previous_rows = dict(previous['stages'],
+                         **{'end to end': previous['end_to_end']}) if previous else {}
+    if previous:
+        print(f'\nCompared with {previous["commit"]} at {previous["created"][:19]}')
+    print(f'\n{"Stage":<20}{"Seconds":>10}{"Previous":>10}{"Change":>9}')
+    for stage, seconds in rows.items():
+        before = previous_rows.get(stage)
+        if before:
+            print(f'{stage:<20}{seconds:>10.3f}{before:>10.3f}{(seconds - before) / before:>+9.0%}')
+        else:
+            print(f'{stage:<20}{seconds:>10.3f}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--payees', type=int, default=1000,
+                        help='payees on the share, 1,000 to 100,000')
+    parser.add_argument('--checks', type=int, default=2, help='number of state checks')
+    parser.add_argument('--lines', type=int, default=500, help='payees on each check')
+    parser.add_argument('--existing', type=float, default=0.5,
+                        help='fraction of payees already in the database')
+    parser.add_argument('--seed', type=int, default=synthetic_data.FIRST_CHECK_NUMBER)
+    parser.add_argument('--workers', type=int, default=2,
+                        help='worker processes for the end to end run')
+    parser.add_argument('--latency', type=float, default=0.05, help='mock CCAM latency in seconds')
+    parser.add_argument('--directory', default=None,
+                        help='directory for the synthetic data, reused between runs with the same '
+                             'parameters. A temporary directory if not given')
+    parser.add_argument('--output', default='pipeline_benchmark.json',
+                        help='JSON file the results are appended to')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.abspath(args.directory or tmp)
+        manifest = load_data(directory, args)
+        files = manifest['check_files']
+        mock = MockCCAM(latency=args.latency, jitter=args.latency / 2)
+        with MockServerThread(mock) as server:
+            # environment variables take precedence over the env file
+            os.environ.update({'BASE_URL': server.url, 'CCAM_URL': f'{server.url}{ACCOUNTS_PATH}'})
+            settings = load_settings(manifest['env_file'])
+
+            # the pipeline prints progress for every payee
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                reset(manifest, settings)
+                checks = time_stages(files, settings)
+                DbSession.close()
+                reset(manifest, settings)
+                start = time.perf_counter()
+                run(files, settings, args.workers)
+                end_to_end = time.perf_counter() - start
+
+    parameters = dict(manifest['parameters'], workers=args.workers, latency=args.latency)
+    result = {'commit': git_commit(), 'created': datetime.now().isoformat(),
+              'parameters': parameters, 'stages': total_stages(checks), 'end_to_end': end_to_end,
+              'checks': checks, 'ccam_requests': mock.requests}
+
+    results = []
+    if os.path.exists(args.output):
+        with open(args.output) as f:
+            results = json.load(f)
+    report(result, previous_result(results, result['parameters']))
+    results.append(result)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'\nResults saved to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Measures the reconciliation comparison for a synthetic caseload using the per-case Decimal
+comparison that reconcile_balances performed and the vectorized comparison in
+reconciliation_services.
+
+Usage: python -m SCCM.bin.benchmarks.reconcile_diff_benchmark --cases 50000
+"""
+import argparse
+import random
+import time
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal
+
+from SCCM.bin.ccam_lookup import sum_account_balances
+from SCCM.services import reconciliation_services as recon
+
+cents = Decimal('0.01')
+CaseRow = namedtuple('CaseRow', recon.CASE_COLUMNS)
+
+
+def synthetic_caseload(number_of_cases: int) -> tuple[list, list[dict]]:
+    """
+    Creates active case rows and CCAM payment lines where one case in ten has a different CCAM
+    balance
+    """
+    random.seed(50000)
+    cases = []
+    lines = []
+    for i in range(1, number_of_cases + 1):
+        ccam_case_num = f'DWIW321CV{i:06d}'
+        collected = Decimal(random.randint(0, 35000)).scaleb(-2)
+        cases.append(CaseRow(i, f'{ccam_case_num}-001', f'21-CV-{i}', Decimal('350.00'), collected,
+                             Decimal('350.00') - collected, f'Payee {i}'))
+        ccam_collected = float(collected) + (5 if i % 10 == 0 else 0)
+        lines.append({'case_num': ccam_case_num, 'prty_cd': 'WIW1', 'acct_cd': 'WIWAPCCA2659',
+                      'prnc_owed': 350.0,
+                      'prnc_clld': ccam_collected, 'totl_ostg': 350.0 - ccam_collected})
+    return cases, lines
+
+
+def per_case_comparison(cases: list, ccam_data) -> int:
+    mismatches = 0
+    for case in cases:
+        ccam_case_balances = ccam_data.loc[str.split(case.ccam_case_num, '-')[0]]
+        if Decimal(case.amount_owed).quantize(cents, ROUND_HALF_UP) != Decimal(
+                ccam_case_balances.loc['Total Outstanding'].item()).quantize(cents, ROUND_HALF_UP):
+            Decimal(ccam_case_balances.loc['Total Owed'].item()).quantize(cents, ROUND_HALF_UP)
+            Decimal(ccam_case_balances.loc['Total Collected'].item()).quantize(cents, ROUND_HALF_UP)
+            mismatches += 1
+    return mismatches
+
+
+def vectorized_comparison(cases: list, ccam_data) -> int:
+    mismatches, _ = recon.find_balance_mismatches(recon.case_balances_frame(cases), ccam_data)
+    recon.reconciliation_rows(mismatches)
+    return len(mismatches)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cases', type=int, default=50000, help='number of synthetic active cases')
+    args = parser.parse_args()
+
+    cases, lines = synthetic_caseload(args.cases)
+    ccam_data = sum_account_balances(lines)
+
+    for name, compare in (('per case', per_case_comparison), ('vectorized', vectorized_comparison)):
+        start = time.perf_counter()
+        mismatches = compare(cases, ccam_data)
+        print(f'{name:<12}{time.perf_counter() - start:>10.3f} s  '
+              f'{mismatches:,} mismatches of {args.cases:,} cases')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,372 @@
+"""
+Generates a synthetic state check workload: WI DOC check XLS files in the layout read by
+open_xls_file and read_state_check, a network share tree of prisoner and case folders for the payees
+and a seeded SQLite database in which a fraction of the payees already exist. An env file with
+settings for the generated data is written alongside.
+
+Usage: python -m SCCM.bin.benchmarks.synthetic_data /tmp/plra_synthetic --payees 10000 --checks 2
+       --lines 500
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+from dataclasses import dataclass, field
+
+import certifi
+import sqlalchemy
+
+# noinspection PyUnresolvedReferences
+import SCCM.models.__all_models
+from SCCM.bin.benchmarks.ccam_mock_server import ACCOUNTS_PATH
+from SCCM.models.modelbase import SqlAlchemyBase
+
+FIRST_NAMES = ('James', 'John', 'Robert', 'Michael', 'William', 'David', 'Richard', 'Joseph',
+               'Thomas', 'Charles', 'Christopher', 'Daniel', 'Matthew', 'Anthony', 'Mark', 'Donald',
+               'Steven', 'Paul', 'Andrew', 'Joshua', 'Kenneth', 'Kevin', 'Brian', 'George',
+               'Timothy', 'Ronald', 'Edward', 'Jason', 'Jeffrey', 'Ryan', 'Jacob', 'Gary',
+               'Nicholas', 'Eric', 'Jonathan', 'Stephen', 'Larry', 'Justin', 'Scott', 'Brandon',
+               'Benjamin', 'Samuel', 'Gregory', 'Alexander', 'Patrick', 'Frank', 'Raymond', 'Jack',
+               'Dennis', 'Jerry', 'Tyler', 'Aaron', 'Jose', 'Adam', 'Nathan', 'Henry', 'Zachary',
+               'Douglas', 'Peter', 'Kyle', 'Mary', 'Patricia', 'Jennifer', 'Linda', 'Elizabeth',
+               'Barbara', 'Susan', 'Jessica', 'Sarah', 'Karen')
+LAST_NAMES = ('Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+              'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson',
+              'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin', 'Lee', 'Perez', 'Thompson', 'White',
+              'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson', 'Walker', 'Young',
+              'Allen', 'King', 'Wright', 'Scott', 'Torres', 'Nguyen', 'Hill', 'Flores', 'Green',
+              'Adams', 'Nelson', 'Baker', 'Hall', 'Rivera', 'Campbell', 'Mitchell', 'Carter',
+              'Roberts', 'Phillips', 'Evans', 'Turner', 'Parker', 'Collins', 'Edwards', 'Stewart',
+              'Morris', 'Murphy', 'Cook', 'Rogers', 'Morgan', 'Peterson', 'Cooper', 'Reed',
+              'Bailey', 'Bell', 'Kelly', 'Howard', 'Ward', 'Cox', 'Richardson', 'Wood', 'Watson',
+              'Brooks', 'Bennett', 'Gray', 'James', 'Hughes', 'Price', 'Sanders', 'Olson', 'Quinn',
+              'Underwood', 'Vang', 'Xiong', 'Yang', 'Zimmerman', 'Pabon-Gonzalez', 'Ortiz-Rivera',
+              'Iverson')
+# surnames built from syllables so 100,000 payees have unique first and last names
+SURNAME_STARTS = ('Ab', 'Al', 'Am', 'Ar', 'Bal', 'Bar', 'Ben', 'Bor', 'Cal', 'Car', 'Cor', 'Dal',
+                  'Dar', 'Del', 'Dor', 'El', 'Em', 'Fal', 'Far', 'Fel', 'Gal', 'Gar', 'Gil', 'Gor',
+                  'Hal', 'Har', 'Hel', 'Hol', 'Kal', 'Kar', 'Kel', 'Kor', 'Lan', 'Lar', 'Lin',
+                  'Lor', 'Mal', 'Mar', 'Mel', 'Mor', 'Nal', 'Nor', 'Pal', 'Par', 'Ral', 'Ros',
+                  'Sal', 'Tor')
+SURNAME_ENDINGS = ('bach', 'berg', 'bert', 'by', 'combe', 'dale', 'den', 'dorf', 'ell', 'er', 'ett',
+                   'field', 'ford', 'gard', 'ham', 'hart', 'holm', 'ing', 'ins', 'kin', 'land',
+                   'ley', 'lin', 'lock', 'low', 'man', 'mont', 'more', 'ner', 'quist', 'rick',
+                   'ridge', 'sen', 'ski', 'son', 'stad', 'stein', 'ton', 'well', 'wood')
+SURNAMES = LAST_NAMES + tuple(dict.fromkeys(f'{start}{ending}' for start in SURNAME_STARTS
+                                            for ending in SURNAME_ENDINGS
+                                            if f'{start}{ending}' not in LAST_NAMES))
+# an empty middle initial is a payee without a middle name
+MIDDLE_INITIALS = ('', *'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+SUFFIXES = ('JR', 'SR', 'III')
+CASE_FILTERS = ('PAID', 'CLOSED', 'DISMISSED', 'TERMINATED')
+# lookup values loaded by load_initial_values_to_db
+SUFFIX_LIST = ('jr', 'sr', 'ii', 'iii', 'iv', 'v')
+FILTER_LIST = ('PAID', 'CLOSED', 'DISMISSED', 'LOOK AT THIS', 'look at this', 'OVP', '.PDF', '.pdf',
+               'Habeas', "HABEAS", 'Transfer', '_aka', 'Initial Partial Only', 'Paids%',
+               'TERMINATED', 'WITHDREW')
+FIRST_CHECK_NUMBER = 57001
+DB_FILE = 'plra.sqlite'
+ENV_FILE = 'synthetic.env'
+MANIFEST_FILE = 'synthetic.json'
+
+
+@dataclass
+class SyntheticCase:
+    directory: str
+    year: int
+    number: int
+    active: bool = True
+
+    @property
+    def ecf_case_num(self) -> str:
+        return f'{self.year}-CV-{self.number}'
+
+    @property
+    def ccam_case_num(self) -> str:
+        return f'DWIW3{self.year}CV{self.number:06d}-001'
+
+
+@dataclass
+class SyntheticPayee:
+    doc_number: int
+    first_name: str
+    middle_initial: str
+    last_name: str
+    suffix: str = ''
+    exists: bool = False
+    cases: list[SyntheticCase] = field(default_factory=list)
+    # cases on the share that are not in the database yet
+    new_cases: int = 0
+
+    @property
+    def legal_name(self) -> str:
+        return ' '.join(n for n in (self.first_name, self.middle_initial, self.last_name) if n)
+
+    @property
+    def check_name(self) -> str:
+        return ' '.join(n for n in (self.legal_name, self.suffix) if n).upper()
+
+    @property
+    def judgment_name(self) -> str:
+        given_names = ' '.join(n for n in (self.first_name, self.middle_initial) if n)
+        return f'{self.last_name}, {given_names}'
+
+    @property
+    def letter(self) -> str:
+        return self.last_name.split('-')[0][0].upper()
+
+
+def synthetic_payees(number_of_payees: int, existing: float = 0.5, seed: int = FIRST_CHECK_NUMBER) \
+        -> list[SyntheticPayee]:
+    """
+    Creates payees with unique first and last names and unique DOC numbers. Payees that differ only
+    by middle initial are left out because the name matching cannot tell them apart. Each payee has
+    up to three case folders, some of them marked inactive by a case filter string
+
+    :param number_of_payees: number of payees
+    :param existing: fraction of payees that are already in the database
+    :param seed: random seed
+    :return: payees
+    """
+    combinations = len(FIRST_NAMES) * len(SURNAMES)
+    if number_of_payees > combinations:
+        raise ValueError(f'At most {combinations:,} payees have unique names')
+    rng = random.Random(seed)
+    names = rng.sample(range(combinations), number_of_payees)
+    doc_numbers = rng.sample(range(100000, 1000000), number_of_payees)
+    case_number = 0
+    payees = []
+    for name, doc_number in zip(names, doc_numbers, strict=True):
+        last, first = divmod(name, len(FIRST_NAMES))
+        p = SyntheticPayee(doc_number, FIRST_NAMES[first], rng.choice(MIDDLE_INITIALS),
+                           SURNAMES[last],
+                           suffix=rng.choice(SUFFIXES) if rng.random() < 0.02 else '',
+                           exists=rng.random() < existing)
+        # a few payees have a folder without cases and are processed as overpayments
+        for _ in range(0 if rng.random() < 0.03 else rng.choice((1, 1, 1, 2, 2, 3))):
+            case_number += 1
+            year = rng.randint(10, 23)
+            case = SyntheticCase(f'{year}-cv-{case_number}', year, case_number)
+            if rng.random() < 0.1:
+                case.active = False
+                case.directory = f'{case.directory} {rng.choice(CASE_FILTERS)}'
+            p.cases.append(case)
+        if p.exists and p.cases and rng.random() < 0.2:
+            p.new_cases = 1
+        payees.append(p)
+    return payees
+
+
+def create_share(share_directory: str, payees: list[SyntheticPayee]) -> None:
+    """
+    Creates share_directory/{Letter}/{Last, First M}/{case} folders for the payees
+
+    :param share_directory: base directory of the synthetic network share
+    :param payees: payees from synthetic_payees
+    """
+    for p in payees:
+        prisoner_dir = os.path.join(share_directory, p.letter, p.judgment_name)
+        os.makedirs(prisoner_dir, exist_ok=True)
+        for case in p.cases:
+            os.makedirs(os.path.join(prisoner_dir, case.directory), exist_ok=True)
+
+
+def seed_database(db_file: str, payees: list[SyntheticPayee],
+                  seed: int = FIRST_CHECK_NUMBER) -> None:
+    """
+    Creates the application schema with the lookup values and loads the payees that already exist
+    with their cases, except the cases left for discovery
+
+    :param db_file: SQLite database file
+    :param payees: payees from synthetic_payees
+    :param seed: random seed for the case balances
+    """
+    engine = sqlalchemy.create_engine(f'sqlite+pysqlite:///{db_file}')
+    SqlAlchemyBase.metadata.create_all(engine)
+    engine.dispose()
+
+    rng = random.Random(seed)
+    existing = [p for p in payees if p.exists]
+    cases = []
+    for prisoner_id, p in enumerate(existing, start=1):
+        for case in p.cases[:len(p.cases) - p.new_cases]:
+            assessed = rng.choice((350, 350, 402, 505))
+            collected = assessed if not case.active else rng.randint(0, assessed * 100 - 1) / 100
+            cases.append((prisoner_id, 'WIWAPCCA2659', case.ecf_case_num, case.ccam_case_num,
+                          'ACTIVE' if case.active else 'PAID', assessed, collected,
+                          round(assessed - collected, 2)))
+
+    conn = sqlite3.connect(db_file)
+    with conn:
+        conn.executemany('INSERT INTO suffix_table (suffix_name) VALUES (?)',
+                         ((s,) for s in SUFFIX_LIST))
+        conn.executemany('INSERT INTO case_filters (filter_text) VALUES (?)',
+                         ((f,) for f in FILTER_LIST))
+        conn.executemany('INSERT INTO prisoners (id, doc_number, legal_name, judgment_name) '
+                         'VALUES (?,?,?,?)',
+                         ((i, p.doc_number, p.legal_name, p.judgment_name)
+                          for i, p in enumerate(existing, start=1)))
+        conn.executemany('INSERT INTO court_cases (prisoner_id, acct_cd, ecf_case_num, '
+                         'ccam_case_num, case_comment, amount_assessed, amount_collected, '
+                         'amount_owed) VALUES (?,?,?,?,?,?,?,?)', cases)
+    conn.close()
+
+
+def write_state_check(file: str, lines: list[tuple[SyntheticPayee, int]],
+                      check_number: int) -> float:
+    """
+    Writes a WI DOC state check with DOC in column B, name in column C, amount in column H and the
+    check amount and number in K2 and L2
+
+    :param file: XLS file
+    :param lines: payee and amount in cents of each payment line
+    :param check_number: check number
+    :return: check amount
+    """
+    try:
+        import xlwt
+    except ImportError:
+        raise ImportError('Writing XLS state checks requires xlwt. '
+                          'Install it with pip install xlwt') from None
+
+    book = xlwt.Workbook()
+    sheet = book.add_sheet('Sheet1')
+    for col, title in ((0, 'Payee ID'), (1, 'DOC'), (2, 'Name'), (7, 'Amount'), (10,
+                                                                                 'Check Amount'),
+                       (11, 'Check Number')):
+        sheet.write(0, col, title)
+    for row, (p, cents) in enumerate(lines, start=1):
+        sheet.write(row, 0, row)
+        sheet.write(row, 1, p.doc_number)
+        sheet.write(row, 2, p.check_name)
+        sheet.write(row, 7, cents / 100)
+    # the check amount is summed in cents so it matches the payment lines exactly
+    check_amount = sum(cents for _, cents in lines) / 100
+    sheet.write(1, 10, check_amount)
+    sheet.write(1, 11, check_number)
+    book.save(file)
+    return check_amount
+
+
+def create_checks(check_directory: str, payees: list[SyntheticPayee], number_of_checks: int,
+                  lines_per_check: int, seed: int = FIRST_CHECK_NUMBER) -> list[str]:
+    """
+    Writes state checks paying a random sample of the payees. About one payee in a hundred has two
+    payment lines
+
+    :param check_directory: directory for the XLS files
+    :param payees: payees from synthetic_payees
+    :param number_of_checks: number of checks
+    :param lines_per_check: payees on each check
+    :param seed: random seed
+    :return: XLS files
+    """
+    rng = random.Random(seed)
+    os.makedirs(check_directory, exist_ok=True)
+    files = []
+    for check_number in range(FIRST_CHECK_NUMBER, FIRST_CHECK_NUMBER + number_of_checks):
+        paid = rng.sample(payees, min(lines_per_check, len(payees)))
+        paid += rng.sample(paid, len(paid) // 100)
+        lines = [(p, rng.randint(100, 5000)) for p in paid]
+        file = os.path.join(check_directory, f'check_{check_number}.xls')
+        write_state_check(file, lines, check_number)
+        files.append(file)
+    return files
+
+
+def write_env_file(env_file: str, directory: str,
+                   ccam_base_url: str = 'http://127.0.0.1:8765') -> None:
+    """
+    Writes settings that point the application at the generated data and a mock CCAM server
+
+    :param env_file: settings file
+    :param directory: directory holding the generated data
+    :param ccam_base_url: base url of the mock CCAM server
+    """
+    settings = {'NETWORK_BASE_DIR': os.path.join(directory, 'share'),
+                'NETWORK_DB_BASE_DIR': os.path.join(directory, 'db', ''),
+                'NETWORK_DB_BACKUP_DIR': os.path.join(directory, 'backup'),
+                'DATABASE_SQLite': DB_FILE,
+                'RECONCILIATION_FILE_PATH': os.path.join(directory, 'reconciliation'),
+                'CCAM_USERNAME': 'synthetic',
+                'CCAM_PASSWORD': 'synthetic',
+                'BASE_URL': ccam_base_url,
+                'CCAM_URL': f'{ccam_base_url}{ACCOUNTS_PATH}',
+                'CERT_FILE': certifi.where(),
+                'CCAM_CACHE_FILE': os.path.join(directory, 'ccam_cache.sqlite'),
+                'NAME_INDEX_SNAPSHOT': os.path.join(directory, 'name_index.json'),
+                'CASE_INDEX_SNAPSHOT': os.path.join(directory, 'case_index.json'),
+                # synthetic checks on one deposit can have more lines than the three digit control
+                # numbers allow
+                'CCAM_MAX_CONTROL_NUMBER': 999999}
+    with open(env_file, 'w') as f:
+        f.writelines(f'{key}={value}\n' for key, value in settings.items())
+
+
+def generate(directory: str, number_of_payees: int, number_of_checks: int, lines_per_check: int,
+             existing: float = 0.5, seed: int = FIRST_CHECK_NUMBER) -> dict:
+    """
+    Generates the share tree, seed database, state checks and env file in a directory. A previous
+    share tree in the directory is replaced
+
+    :param directory: output directory
+    :param number_of_payees: payees on the share
+    :param number_of_checks: number of state checks
+    :param lines_per_check: payees on each check
+    :param existing: fraction of payees already in the database
+    :param seed: random seed
+    :return: manifest of the generated data, also saved in the directory
+    """
+    directory = os.path.abspath(directory)
+    share_directory = os.path.join(directory, 'share')
+    shutil.rmtree(share_directory, ignore_errors=True)
+    for sub_directory in ('db', 'backup', 'reconciliation'):
+        os.makedirs(os.path.join(directory, sub_directory), exist_ok=True)
+
+    payees = synthetic_payees(number_of_payees, existing, seed)
+    create_share(share_directory, payees)
+    seed_file = os.path.join(directory, 'seed.sqlite')
+    if os.path.exists(seed_file):
+        os.remove(seed_file)
+    seed_database(seed_file, payees, seed)
+    shutil.copyfile(seed_file, os.path.join(directory, 'db', DB_FILE))
+    files = create_checks(os.path.join(directory, 'checks'), payees, number_of_checks,
+                          lines_per_check, seed)
+    env_file = os.path.join(directory, ENV_FILE)
+    write_env_file(env_file, directory)
+
+    manifest = {'parameters': {'payees': number_of_payees, 'checks': number_of_checks,
+                               'lines': lines_per_check,
+                               'existing': existing, 'seed': seed},
+                'directory': directory, 'env_file': env_file, 'seed_file': seed_file,
+                'db_file': os.path.join(directory, 'db', DB_FILE), 'check_files': files,
+                'existing_payees': sum(p.exists for p in payees),
+                'case_folders': sum(len(p.cases) for p in payees)}
+    with open(os.path.join(directory, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('directory', help='output directory')
+    parser.add_argument('--payees', type=int, default=1000,
+                        help='payees on the share, 1,000 to 100,000')
+    parser.add_argument('--checks', type=int, default=2, help='number of state checks')
+    parser.add_argument('--lines', type=int, default=500, help='payees on each check')
+    parser.add_argument('--existing', type=float, default=0.5,
+                        help='fraction of payees already in the database')
+    parser.add_argument('--seed', type=int, default=FIRST_CHECK_NUMBER)
+    args = parser.parse_args()
+
+    manifest = generate(args.directory, args.payees, args.checks, args.lines, args.existing,
+                        args.seed)
+    print(f'Generated {args.payees:,} payees with {manifest["case_folders"]:,} case folders, '
+          f'{manifest["existing_payees"]:,} in the database, and {args.checks} checks in '
+          f'{manifest["directory"]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,22 @@
-import collections
+from __future__ import annotations
+
+import asyncio
 import logging
-import ssl
 from pathlib import Path
-import asyncio
+from typing import TYPE_CHECKING
 
 # import backoff
 import requests
+from colorama import Fore
+from pydantic import BaseSettings, Field, SecretStr
 from requests import Session
-from http.client import HTTPConnection
-import json
-import aiohttp
 
-import pandas as pd
-from pydantic import BaseSettings, Field, SecretStr
-from colorama import Fore
+from SCCM.schemas.money import Money
+from SCCM.services.ccam_cache import CCAMCache
 
-from SCCM.models.court_cases import CourtCase
+# pandas is imported by the functions that build dataframes so single case lookups start quickly
+if TYPE_CHECKING:
+    import pandas as pd
 
 # from SCCM.bin.retry import retry
 
@@ -27,6 +28,8 @@ ch = logging.StreamHandler()
 ch.setLevel(logging.WARN)
 log.addHandler(ch)
 
+EMPTY_BALANCE_COLUMNS = ['Total Owed', 'Total Collected', 'Total Outstanding', 'acct_cd', 'prty_cd']
+
 
 class CCAMSettings(BaseSettings):
     """
@@ -71,11 +74,22 @@ def get_ccam_account_information(cases, **kwargs):
     Retrieves JIFMS CCAM information for case via API call
 
     :param cases: case object
+    :param kwargs: settings, name of the prisoner and an optional cache consulted before calling the
+        API
 
     :return: dictionary of account balances for requested case
     """
     if kwargs['settings']:
         settings = kwargs['settings']
+    cache = kwargs.get('cache')
+    if cache is not None:
+        cached, cases = cache.get_many(cases)
+        ccam_data = [line for lines in cached.values() for line in lines]
+        if not cases:
+            return ccam_data
+    else:
+        ccam_data = []
+
     with CCAMSession(settings.ccam_username, settings.ccam_password.get_secret_value(), settings.ccam_url,
                      settings.cert_file) as session:
         print(Fore.YELLOW + f'Getting case balances from CCAM for {kwargs["name"]}')
@@ -89,7 +103,7 @@ def get_ccam_account_information(cases, **kwargs):
             headers=headers,
             params=data).json()
 
-        ccam_data = response["data"]
+        fetched = response["data"]
 
         # API pagination set at 20. This snippet retrieves the rest of the records.  Note: API does not return next page
         # url so we need to rely on total pages embedded in the metadata
@@ -101,8 +115,11 @@ def get_ccam_account_information(cases, **kwargs):
                     settings.ccam_url,
                     headers=headers,
                     params=data).json()
-                ccam_data.extend(response["data"])
+                fetched.extend(response["data"])
 
+    if cache is not None:
+        cache.put_many(cases, fetched)
+    ccam_data.extend(fetched)
     return ccam_data
 
 
@@ -120,29 +137,89 @@ async def async_get_ccam_account_information(session, ccam_case_num: str, **kwar
     return ccam_data
 
 
-def sum_account_balances(payments: list[dict]) -> tuple[pd.DataFrame, str]:
+def sum_account_balances(payments: list[dict]) -> pd.DataFrame:
     """
-    Totals CCAM payment lines and updates prison object with payment information as a Python List
+    Totals CCAM payment lines grouped by case number
 
-    :param payments: List of individual payment lines for a case
-    :return: case balances and party code
+    :param payments: List of individual payment lines for one or more cases
+    :return: case balances with account and party codes indexed by case number
     """
 
+    import pandas as pd
+
+    from SCCM.services.dataframe_cleanup import to_cents
+
     # create a pandas dataframe
     df = pd.DataFrame(payments)
     df = df.fillna(0)
 
-    # get party code
-    party_code = df.drop_duplicates('prty_cd')
-
-    # get account sums grouped by case number
-    balances = df.groupby(df.case_num).sum(['prnc_owed', 'prnc_clld', 'totl_ostg'])
-    balances = balances.drop(['debt_typ_lnum'], axis=1)
+    # get account sums grouped by case number. Lines are summed in integer cents and converted back
+    # to dollars once
+    amount_columns = ['prnc_owed', 'prnc_clld', 'totl_ostg']
+    for column in amount_columns:
+        df[column] = to_cents(df[column])
+    balances = df.groupby(df.case_num)[amount_columns].sum() / 100
     balances.columns = ['Total Owed', 'Total Collected', 'Total Outstanding']
 
-    # retrieve account codes and add to balances
+    # retrieve account and party codes and add to balances
     accounts = df.drop_duplicates('case_num', keep='last')
     accounts.reset_index(drop=True, inplace=True)
     accounts.set_index(['case_num'], inplace=True)
-    balances = balances.join(accounts.acct_cd, how='left')
+    balances = balances.join(accounts[['acct_cd', 'prty_cd']], how='left')
     return balances
+
+
+def summarize_case_balance(payments: list[dict]) -> dict:
+    """
+    Totals CCAM payment lines for a single case without building a dataframe
+
+    :param payments: payment lines for one case
+    :return: Total Owed, Total Collected and Total Outstanding with the account and party codes of
+        the last line
+    """
+    balance = {'Total Owed': Money(0), 'Total Collected': Money(0), 'Total Outstanding': Money(0),
+               'acct_cd': None, 'prty_cd': None}
+    for line in payments:
+        balance['Total Owed'] += line.get('prnc_owed') or 0
+        balance['Total Collected'] += line.get('prnc_clld') or 0
+        balance['Total Outstanding'] += line.get('totl_ostg') or 0
+        balance['acct_cd'] = line.get('acct_cd')
+        balance['prty_cd'] = line.get('prty_cd')
+    return balance
+
+
+async def _fetch_ccam_balances(ccam_case_numbers: list[str], cache: CCAMCache = None,
+                               check_number: int | None = None, settings=None) -> list[dict]:
+    from SCCM.services.api_services import AsyncHttpClient
+
+    session = AsyncHttpClient(cache=cache, settings=settings)
+    await session.start()
+    try:
+        return await session.get_CCAM_balances_async({'caseNumberList': ccam_case_numbers},
+                                                     concurrent=True, check_number=check_number)
+    finally:
+        await session.stop()
+
+
+def prefetch_ccam_balances(ccam_case_numbers: list[str], cache: CCAMCache = None,
+                           check_number: int | None = None, settings=None) -> pd.DataFrame:
+    """
+    Retrieves CCAM balances for every case on a check in a single paginated pass
+
+    :param ccam_case_numbers: CCAM formatted case numbers for all payees on the check
+    :param cache: optional local cache consulted before calling the API
+    :param check_number: state check the cases are retrieved for
+    :param settings: application settings. Defaults to get_settings
+    :return: case balances indexed by case number. Empty if no cases were requested or found
+    """
+    import pandas as pd
+
+    ccam_case_numbers = sorted(set(ccam_case_numbers))
+    if not ccam_case_numbers:
+        return pd.DataFrame(columns=EMPTY_BALANCE_COLUMNS)
+
+    print(Fore.YELLOW + f'Getting case balances from CCAM for {len(ccam_case_numbers)} cases')
+    ccam_data = asyncio.run(_fetch_ccam_balances(ccam_case_numbers, cache, check_number, settings))
+    if not ccam_data:
+        return pd.DataFrame(columns=EMPTY_BALANCE_COLUMNS)
+    return sum_account_balances(ccam_data)
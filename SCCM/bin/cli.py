@@ -0,0 +1,125 @@
+"""
+Console script entry points. Each command parses its arguments, loads settings and connects to the
+database explicitly, then imports only the modules it needs so that the lookup commands start
+quickly.
+"""
+import argparse
+
+
+def _parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--env-file",
+                        help="Settings file. Defaults to config/dev.env in the working directory")
+    return parser
+
+
+def convert(argv: list[str] | None = None) -> None:
+    parser = _parser('Convert state checks to CCAM upload files and record payments')
+    parser.add_argument("files", nargs='*',
+                        help="State check XLS files. Opens a file dialog if none are provided")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of processes used to prepare checks concurrently. Each "
+                             "worker opens the CCAM cache and snapshot files, so use more than one "
+                             "only when they are on local disk")
+    parser.add_argument("--report-ingest", action='store_true',
+                        help="Print the time and peak memory of reading each check. Traces memory "
+                             "allocations, which slows the read")
+    args = parser.parse_args(argv)
+
+    from SCCM.bin import state_check_convert
+    from SCCM.config.config_model import load_settings
+
+    settings = load_settings(args.env_file)
+    if args.report_ingest:
+        settings = settings.copy(update={'report_ingest': True})
+    state_check_convert.run(args.files, settings, args.workers)
+
+
+def reconcile(argv: list[str] | None = None) -> None:
+    parser = _parser('Reconcile database case balances to CCAM')
+    parser.add_argument("--db-file",
+                        help="Database file used instead of the one named in the settings")
+    parser.add_argument("--chunked", action='store_true',
+                        help="Reconcile active cases in batches, resuming an unfinished chunked "
+                             "run")
+    parser.add_argument("--batch-size", type=int,
+                        help="Cases in each batch of a chunked run. Defaults to "
+                             "RECONCILIATION_BATCH_SIZE")
+    parser.add_argument("--restart", action='store_true',
+                        help="Start a new chunked run instead of resuming")
+    args = parser.parse_args(argv)
+
+    import asyncio
+
+    from SCCM.bin.reconciliation import reconcile_db_to_CCAM_for_all_prisoners as recon
+    from SCCM.config.config_model import load_settings
+
+    settings = load_settings(args.env_file)
+    batch_size = (args.batch_size or settings.reconciliation_batch_size) if args.chunked else None
+    asyncio.run(recon.main(settings, args.db_file, batch_size, args.restart))
+
+
+def lookup(argv: list[str] | None = None) -> None:
+    parser = _parser('Print the balance for a case from the database or CCAM')
+    parser.add_argument("case_number",
+                        help="ECF case number yy-cv-number-xxx(if multi-defendant case)")
+    parser.add_argument("--ccam", action='store_true',
+                        help="Retrieve the balance from CCAM instead of the database")
+    parser.add_argument("--db-file",
+                        help="Database file used instead of the one named in the settings")
+    args = parser.parse_args(argv)
+
+    from SCCM.config.config_model import load_settings
+
+    settings = load_settings(args.env_file)
+    if args.ccam:
+        from SCCM.bin.utilities import API_single_case_lookup
+
+        API_single_case_lookup.lookup_case(args.case_number, settings)
+    else:
+        from SCCM.bin.utilities import db_case_lookup
+        from SCCM.services.initiate_global_db_session import initiate_global_db_session
+
+        initiate_global_db_session(settings, args.db_file)
+        db_case_lookup.lookup_case(args.case_number)
+
+
+def invalidate(argv: list[str] | None = None) -> None:
+    parser = _parser('Remove CCAM balances from the local cache. Removes every case if no case or '
+                     'check is given')
+    parser.add_argument("--check", type=int, help="Remove cases retrieved for a state check number")
+    parser.add_argument("--case", nargs='+',
+                        help="Remove CCAM case numbers e.g. DWIW321CV000012-001")
+    args = parser.parse_args(argv)
+
+    from SCCM.bin.utilities.ccam_cache_invalidate import invalidate_cache
+    from SCCM.config.config_model import load_settings
+
+    invalidate_cache(load_settings(args.env_file), args.case, args.check)
+
+
+def restore(argv: list[str] | None = None) -> None:
+    parser = _parser('Restore the database from a check backup')
+    parser.add_argument("backup_file", nargs='?',
+                        help="Backup to restore. Lists the backups to choose from if neither a "
+                             "file nor a label is provided")
+    parser.add_argument("--label",
+                        help="Label of the backup in the backup manifest, such as a check number")
+    parser.add_argument("--list", action='store_true',
+                        help="List the backups in the backup manifest")
+    parser.add_argument("--db-file",
+                        help="Database file used instead of the one named in the settings")
+    args = parser.parse_args(argv)
+
+    from SCCM.config.config_model import load_settings
+    from SCCM.services import database_services
+
+    settings = load_settings(args.env_file)
+    if args.list:
+        manifest = database_services.BackupManifest(settings.db_backup_directory)
+        for label, entry in manifest.newest_first():
+            print(f'{label:<28}{entry["created"][:19]:<22}{entry["file"]}')
+        return
+    db_file = args.db_file or f'{settings.db_base_directory}{settings.db_file}'
+    database_services.prod_db_restore(db_file, settings.db_backup_directory, args.backup_file,
+                                      args.label)
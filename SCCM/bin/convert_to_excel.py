@@ -1,22 +1,39 @@
-import os
-import random
-from decimal import Decimal
+import csv
+import time
+import tracemalloc
 
-import openpyxl
 import pandas as pd
 import xlrd
 from openpyxl import Workbook
-from openpyxl.styles import NamedStyle, Font
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, NamedStyle
+from openpyxl.utils import get_column_letter
 from xlrd.timemachine import xrange
 
+from SCCM.schemas.money import Money
+from SCCM.services.case_services import format_case_num
+
+HEADER_FONT = Font(name='Calibri', bold=True, size=11, color="FFFFFF")
+
 
 def _create_styles(workbook):
-    data = NamedStyle(name='models')
-    data.font = Font(name='Calibri', bold=False, size=11, color="000000")
-    workbook.add_named_style(data)
+    currency = NamedStyle(name='currency', number_format='$#,##0.00')
+    currency.font = Font(name='Calibri', bold=False, size=11, color="000000")
+    workbook.add_named_style(currency)
     return workbook
 
 
+def _first_populated_sheet(book):
+    index = 0
+    nrows, ncols = 0, 0
+    while nrows * ncols == 0:
+        sheet = book.sheet_by_index(index)
+        nrows = sheet.nrows
+        ncols = sheet.ncols
+        index += 1
+    return sheet
+
+
 def open_xls_file(filename):
     """
     Reads in WI state XLS file format and populates an Openpyxl workbook object
@@ -25,13 +42,8 @@ def open_xls_file(filename):
     """
     # TODO: Check for UnicodeDecodeError and handle
     book = xlrd.open_workbook(filename)
-    index = 0
-    nrows, ncols = 0, 0
-    while nrows * ncols == 0:
-        sheet = book.sheet_by_index(index)
-        nrows = sheet.nrows
-        ncols = sheet.ncols
-        index += 1
+    sheet = _first_populated_sheet(book)
+    nrows, ncols = sheet.nrows, sheet.ncols
 
     # prepare a xlsx sheet
     book1 = Workbook()
@@ -45,73 +57,68 @@ def open_xls_file(filename):
     return book1
 
 
-def format_case_num(case):
-    """
-    Identifies and formats case numbers for JIFMS lookup
-    :param case: prisoner case number
-    :return: CCAM formatted case number
+def read_state_check(filename, report=False):
     """
-    case_num_split = str.split(case.ecf_case_num, '-')
-    # Check if multi-defendant case
-
-    if case.case_party_number:
-        formatted_case_num = f"DWIW3{case_num_split[0]}{case_num_split[1]}{case_num_split[2].zfill(6)}-{case.case_party_number}"
-        return formatted_case_num
-    else:
-        formatted_case_num = f"DWIW3{case_num_split[0]}{case_num_split[1]}{case_num_split[2].zfill(6)}-001"
-        return formatted_case_num
-
+    Reads the payee columns and check header of a WI state XLS file directly into a dataframe
+    without creating an Openpyxl workbook
 
-def create_output_file(check_date, check_num, output_path):
+    :param filename: XLS file format
+    :param report: print ingest time and peak memory. Memory is traced only while the file is read,
+        unless the caller is already tracing, in which case the peak covers the caller's trace and
+        tracing is left on
+    :return: dataframe of payments, check amount (K2) and check number (L2)
+    """
+    if report:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        start = time.perf_counter()
+
+    book = xlrd.open_workbook(filename, on_demand=True)
+    sheet = _first_populated_sheet(book)
+    check_amount = sheet.cell_value(1, 10)
+    check_number = sheet.cell_value(1, 11)
+    # skip first row for header
+    dframe = pd.DataFrame({'DOC': sheet.col_values(1, start_rowx=1),
+                           'Name': sheet.col_values(2, start_rowx=1),
+                           'Amount': sheet.col_values(7, start_rowx=1)},
+                          index=range(1, sheet.nrows))
+    book.release_resources()
+
+    if report:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        print(f'Read {len(dframe)} payment lines from {filename} in {elapsed:.3f} seconds, '
+              f'peak memory {peak / 1024 / 1024:.1f} MiB')
+    return dframe, check_amount, check_number
+
+
+UPLOAD_COLUMNS = [('Control No.', 12), ('Agency Tracking ID.', 15),
+                  ('ACCOUNT HOLDER NAME (20 character max)', 40), ('EFFECTIVE DATE', 13),
+                  ('TRANSACTION AMOUNT', 12), ('DEPOSIT NO (ie CD102815)', 10),
+                  ('DOCKET / COURT NO.', 21), ('TOTAL OWED', 12), ('TOTAL COLLECTED', 11),
+                  ('TOTAL OUTSTANDING', 14), ('OVERPAYMENT', 17)]
+# zero based positions of amount columns in an upload row
+AMOUNT_COLUMNS = {4, 7, 8, 9, 10}
+UPLOAD_FORMATS = ('xlsx', 'xlsx-plain', 'csv')
+
+
+def upload_file_name(check_date, check_num, output_path, file_format='xlsx'):
     """
-    Creates blank Excel file used to populate payee date for later upload as CCAM batch job
+    Names the CCAM upload file for a check
+
     :param check_date: Date check received by the court
     :param check_num: state check number
     :param output_path: path for output file
-    :return: Formatted Excel file
+    :param file_format: one of UPLOAD_FORMATS
+    :return: path of the upload file
     """
-    wb = openpyxl.Workbook()
-    wb = _create_styles(wb)
-    sheet = wb.active
-    sheet.title = 'PLRA'
-    sheet['A1'] = 'Control No.'
-    sheet['B1'] = 'Agency Tracking ID.'
-    sheet['C1'] = 'ACCOUNT HOLDER NAME (20 character max)'
-    sheet['D1'] = 'EFFECTIVE DATE'
-    sheet['E1'] = 'TRANSACTION AMOUNT'
-    sheet['F1'] = 'DEPOSIT NO (ie CD102815)'
-    sheet['G1'] = 'DOCKET / COURT NO.'
-    sheet['H1'] = 'TOTAL OWED'
-    sheet['I1'] = 'TOTAL COLLECTED'
-    sheet['J1'] = 'TOTAL OUTSTANDING'
-    sheet['K1'] = 'OVERPAYMENT'
-
-    sheet.column_dimensions['A'].width = 12
-    sheet.column_dimensions['B'].width = 15
-    sheet.column_dimensions['C'].width = 40
-    sheet.column_dimensions['D'].width = 13
-    sheet.column_dimensions['E'].width = 12
-    sheet.column_dimensions['F'].width = 10
-    sheet.column_dimensions['G'].width = 21
-    sheet.column_dimensions['H'].width = 12
-    sheet.column_dimensions['I'].width = 11
-    sheet.column_dimensions['J'].width = 14
-    sheet.column_dimensions['K'].width = 17
-
-    for x in [chr(i) for i in range(ord('A'), ord('L'))]:
-        col = f"{x}1"
-        sheet[col].style = 'Accent4'
-        sheet[col].font = Font(name='Calibri', bold=True, size=11, color="FFFFFF")
-
+    extension = 'csv' if file_format == 'csv' else 'xlsx'
     check_date = str.split(check_date, '/')
-    file = f"{check_date[2]}.{check_date[0]}.{check_date[1]}_Check_{check_num}_Upload.xlsx"
-    file = f"{output_path}/{file}"
-    if os.path.isfile(file):
-        os.remove(file)
-        wb.save(file)
-    else:
-        wb.save(file)
-    return file
+    return (f"{output_path}/{check_date[2]}.{check_date[0]}.{check_date[1]}"
+            f"_Check_{check_num}_Upload.{extension}")
 
 
 def create_output_path(file):
@@ -175,81 +182,107 @@ def _check_for_hyphenation(split_name):
         return False
 
 
-def write_rows_to_output_file(file, payee_list, deposit_num, effective_date):
+def upload_rows(payment_records, deposit_num, effective_date, control_numbers):
     """
-    Populates pre-formatted Excel with payee information for upload to CCAM
-    :param file: pre-formatted Excel file
-    :param payee_list: list of payees from a specific check
+    Generates the values of each CCAM upload row
+
+    :param payment_records: payments from payment_services.prepare_ccam_upload_transactions
     :param deposit_num: deposit number
     :param effective_date: date file created
-    :return: None
+    :param control_numbers: iterator of unique control numbers such as
+        control_numbers.ControlNumberAllocator
+    :return: generator of row values in UPLOAD_COLUMNS order
     """
-    wb = openpyxl.load_workbook(file)
-    sheet = wb.get_sheet_by_name('PLRA')
-    rownum = 2  # skip first row for header
-    for p in payee_list:
+    for p, control_num in zip(payment_records, control_numbers, strict=False):
         # Transaction has 2 dictionary keys: Prisoner and Case
         if len(p) == 2:
-            sheet.cell = _transaction_row(deposit_num, effective_date, p, rownum, sheet)
+            yield _transaction_row(control_num, deposit_num, effective_date, p)
         else:
-            sheet.cell = _overpayment_row(deposit_num, effective_date, p, rownum, sheet)
-        rownum += 1
+            yield _overpayment_row(control_num, deposit_num, effective_date, p)
+
+
+def write_upload_file(file, payment_records, deposit_num, effective_date, control_numbers,
+                      file_format='xlsx'):
+    """
+    Writes the CCAM upload file in one pass. Rows are appended to a write only workbook as they are
+    generated.
 
-    wb.save(file)
+    :param file: upload file from upload_file_name
+    :param payment_records: payments from payment_services.prepare_ccam_upload_transactions
+    :param deposit_num: deposit number
+    :param effective_date: date file created
+    :param control_numbers: iterator of unique control numbers such as
+        control_numbers.ControlNumberAllocator
+    :param file_format: xlsx for the styled upload workbook, xlsx-plain for a workbook without
+        styles or csv
+    :return: number of rows written
+    """
+    if file_format not in UPLOAD_FORMATS:
+        raise ValueError(f'Upload file format must be one of {", ".join(UPLOAD_FORMATS)}')
+    rows = upload_rows(payment_records, deposit_num, effective_date, control_numbers)
+    header = [name for name, _ in UPLOAD_COLUMNS]
+    count = 0
+    if file_format == 'csv':
+        with open(file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+    else:
+        wb = Workbook(write_only=True)
+        sheet = wb.create_sheet('PLRA')
+        if file_format == 'xlsx':
+            _create_styles(wb)
+            for i, (_, width) in enumerate(UPLOAD_COLUMNS, start=1):
+                sheet.column_dimensions[get_column_letter(i)].width = width
+            header = [_styled_cell(sheet, name, 'Accent4', HEADER_FONT) for name in header]
+            # text cells keep the default Calibri 11 font so only amounts need a styled cell
+            rows = ([_styled_cell(sheet, value, 'currency') if i in AMOUNT_COLUMNS
+                     and value is not None else value
+                     for i, value in enumerate(row)] for row in rows)
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+            count += 1
+        wb.save(file)
     print(f"The PLRA upload file has been saved as {file}\n")
+    return count
+
 
+def _styled_cell(sheet, value, style, font=None):
+    cell = WriteOnlyCell(sheet, value=value)
+    cell.style = style
+    if font:
+        cell.font = font
+    return cell
 
-def _transaction_row(deposit_num, effective_date, p, rownum, sheet):
-    # Control numbers need to be randomized to ensure that a number is not duplicated if a payee is on multiple
-    # checks for the same day
-    sheet.cell(row=rownum, column=1).value = random.randrange(0, 999, 1)
-    sheet.cell(row=rownum, column=2).value = int(p['prisoner'].doc_number)
+
+def _transaction_row(control_num, deposit_num, effective_date, p):
+    legal_name = p['prisoner'].legal_name
     # Check length of name to fit within CCAM batch upload constraints
     try:
-        if len(p['prisoner'].legal_name) <= 20:
-            sheet.cell(row=rownum, column=3).value = p['prisoner'].legal_name
-        else:
-            shortened_name = get_shortened_name(p['prisoner'].legal_name)
-            sheet.cell(row=rownum, column=3).value = shortened_name
+        if len(legal_name) > 20:
+            legal_name = get_shortened_name(legal_name)
     except TypeError as error:
-        print(f'{p.legal_name} threw {error}')
+        print(f'{legal_name} threw {error}')
     try:
-        sheet.cell(row=rownum, column=4).value = effective_date
-        sheet.cell(row=rownum, column=5).value = Decimal(p['case'].transaction.amount_paid)
-        sheet.cell(row=rownum, column=6).value = deposit_num
-        sheet.cell(row=rownum, column=7).value = str.upper(p['case'].ccam_case_num)
-        sheet.cell(row=rownum, column=8).value = p['case'].balance.amount_assessed
-        sheet.cell(row=rownum, column=9).value = p['case'].balance.amount_collected
-        sheet.cell(row=rownum, column=10).value = p['case'].balance.amount_owed
+        return [control_num, int(p['prisoner'].doc_number), legal_name, effective_date,
+                p['case'].transaction.amount_paid.to_decimal(), deposit_num,
+                str.upper(p['case'].ccam_case_num), p['case'].balance.amount_assessed.to_decimal(),
+                p['case'].balance.amount_collected.to_decimal(),
+                p['case'].balance.amount_owed.to_decimal(), None]
     except AttributeError:
-        sheet.cell(row=rownum, column=4).value = effective_date
-        sheet.cell(row=rownum, column=5).value = Decimal(p['prisoner'].amount_paid)
-        sheet.cell(row=rownum, column=6).value = deposit_num
-        sheet.cell(row=rownum, column=7).value = p['case'].ecf_case_num.upper()
-        sheet.cell(row=rownum, column=8).value = 0
-        sheet.cell(row=rownum, column=9).value = 0
-        sheet.cell(row=rownum, column=10).value = 0
-        sheet.cell(row=rownum, column=11).value = -Decimal(p['prisoner'].amount_paid)
-    for c in range(1, 9):
-        if c not in [5, 8, 9, 10]:
-            sheet.cell(row=rownum, column=c).style = 'models'
-        else:
-            sheet.cell(row=rownum, column=c).number_format = '$#,##0.00'
-    return sheet.cell
-
-
-def _overpayment_row(deposit_num, effective_date, p, rownum, sheet):
-    # Control numbers need to be randomized to ensure that a number is not duplicated if a payee is on multiple
-    # checks for the same day
-    sheet.cell(row=rownum, column=1).value = random.randrange(0, 999, 1)
-    sheet.cell(row=rownum, column=2).value = int(p['prisoner'].doc_number)
-    sheet.cell(row=rownum, column=3).value = p['prisoner'].legal_name
-    sheet.cell(row=rownum, column=4).value = effective_date
-    sheet.cell(row=rownum, column=5).value = Decimal(p['prisoner'].overpayment['transaction amount'])
-    sheet.cell(row=rownum, column=6).value = deposit_num
-    sheet.cell(row=rownum, column=7).value = p['prisoner'].overpayment['ccam_case_num']
-    sheet.cell(row=rownum, column=11).value = Decimal(p['prisoner'].refund)
-    return sheet.cell
+        return [control_num, int(p['prisoner'].doc_number), legal_name, effective_date,
+                p['prisoner'].amount_paid.to_decimal(), deposit_num, p['case'].ecf_case_num.upper(),
+                0, 0, 0, -p['prisoner'].amount_paid.to_decimal()]
+
+
+def _overpayment_row(control_num, deposit_num, effective_date, p):
+    return [control_num, int(p['prisoner'].doc_number), p['prisoner'].legal_name, effective_date,
+            Money(p['prisoner'].overpayment['transaction amount']).to_decimal(), deposit_num,
+            p['prisoner'].overpayment['ccam_case_num'], None, None, None,
+            p['prisoner'].refund.to_decimal()]
 
 
 def convert_sheet_to_dataframe(sheet):
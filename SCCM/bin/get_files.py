@@ -1,15 +1,11 @@
-from tkinter import *
-from tkinter import filedialog
-from tkinter import ttk, Tk
-
-
-
 def choose_files_for_import():
     """
     Opens operating system file folder to choose one or more input files for processing
 
     :return: list of one or more files
     """
+    from tkinter import Tk, filedialog
+
     # disable root modal window
     root = Tk()
     root.withdraw()
@@ -1,13 +1,12 @@
 from __future__ import annotations
+
 from abc import ABC, abstractmethod
-from decimal import Decimal, ROUND_HALF_UP
 
-from SCCM.schemas.case_schema import CaseBase
 import SCCM.schemas.transaction_schema as ts
-from SCCM.schemas.prisoner_schema import PrisonerCreate
 import SCCM.services.payment_services as payment
-
-cents = Decimal('0.01')
+from SCCM.schemas.case_schema import CaseBase
+from SCCM.schemas.domain import Payee
+from SCCM.schemas.money import Money
 
 
 class Context:
@@ -41,7 +40,7 @@ class Context:
 
         self._strategy = strategy
 
-    def process_payment(self, p: PrisonerCreate, check_number: int) -> None:
+    def process_payment(self, p: Payee, check_number: int) -> None:
         result = self._strategy.process_payment(p, check_number)
 
 
@@ -55,18 +54,16 @@ class Strategy(ABC):
     """
 
     @abstractmethod
-    def process_payment(self, p: PrisonerCreate, check_number: int):
+    def process_payment(self, p: Payee, check_number: int):
         pass
 
 
 class SingleCasePaymentProcess(Strategy):
-    def process_payment(self, p: PrisonerCreate, check_number: int) -> Prisoners:
+    def process_payment(self, p: Payee, check_number: int) -> Payee:
         case = p.cases_list[0]
         overpayment = False
-        case.balance.amount_collected = Decimal(case.balance.amount_collected).quantize(cents, ROUND_HALF_UP) \
-                                        + p.amount_paid
-        case.balance.amount_owed = Decimal(case.balance.amount_assessed).quantize(cents, ROUND_HALF_UP) \
-                                   - Decimal(case.balance.amount_collected).quantize(cents, ROUND_HALF_UP)
+        case.balance.amount_collected = case.balance.amount_collected + p.amount_paid
+        case.balance.amount_owed = case.balance.amount_assessed - case.balance.amount_collected
         if case.balance.amount_owed < 0:
             overpayment = True
         if overpayment:
@@ -82,7 +79,7 @@ class MultipleCasePaymentProcess(Strategy):
     Class that handles applying payments to multiple cases
     """
 
-    def process_payment(self, p: PrisonerCreate, check_number: int) -> Prisoners:
+    def process_payment(self, p: Payee, check_number: int) -> Payee:
         number_of_cases_for_prisoner = len(p.cases_list)
         overpayment = False
         all_payments_applied = False
@@ -90,10 +87,9 @@ class MultipleCasePaymentProcess(Strategy):
         while not all_payments_applied and number_of_cases_for_prisoner > 0:
             for case in p.cases_list:
                 print(f'Applying payment of {p.amount_paid} to case {case.ecf_case_num}')
-                case.balance.amount_collected = Decimal(case.balance.amount_collected).quantize(cents, ROUND_HALF_UP) \
-                                                + p.amount_paid
-                case.balance.amount_owed = Decimal(case.balance.amount_assessed).quantize(cents, ROUND_HALF_UP) \
-                                           - Decimal(case.balance.amount_collected).quantize(cents, ROUND_HALF_UP)
+                case.balance.amount_collected = case.balance.amount_collected + p.amount_paid
+                case.balance.amount_owed = (case.balance.amount_assessed
+                                            - case.balance.amount_collected)
 
                 if case.balance.amount_owed < 0:
                     overpayment = True
@@ -110,7 +106,7 @@ class MultipleCasePaymentProcess(Strategy):
                 else:
                     payment.prepare_payment(p, case, check_number)
                     all_payments_applied = True
-                    p.refund = 0
+                    p.refund = Money(0)
                     break
         return p
 
@@ -120,7 +116,7 @@ class OverPaymentProcess(Strategy):
     Class that applies and overpayment when a prisoner has no cases found
     """
 
-    def process_payment(self, p: PrisonerCreate, check_number: int) -> Prisoners:
+    def process_payment(self, p: Payee, check_number: int) -> Payee:
         p.refund = p.amount_paid
         p.overpayment = {'overpayment': True,
                          'ccam_case_num': 'No Active Cases',
@@ -1,56 +1,51 @@
 """
 Performs reconciliation between CCAM and application database
 
-This module compares balances for all prisoners in the application database against JIFMS CCAM, updates case balance,
-and creates reconciliation transaction
+This module compares balances for all prisoners in the application database against JIFMS CCAM,
+updates case balance, and creates reconciliation transaction. The chunked mode pages through active
+cases in batches and commits each batch with a checkpoint so an interrupted run resumes after the
+last committed batch
 """
-import os
-from decimal import Decimal, ROUND_HALF_UP
+import asyncio
 import datetime
 from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
 from pathlib import Path
-import asyncio
 
 from colorama import Fore
 from pandas import DataFrame, Series
+
+from SCCM.bin import ccam_lookup as ccam
+from SCCM.bin.ccam_lookup import (
+    EMPTY_BALANCE_COLUMNS,
+    async_get_ccam_account_information,
+    sum_account_balances,
+)
+from SCCM.config.config_model import PLRASettings, get_settings
+from SCCM.models.case_reconciliation import CaseReconciliation
 from SCCM.models.court_cases import CourtCase
-from SCCM.services.db_session import DbSession
-from SCCM.config.config_model import PLRASettings
-from SCCM.services.database_services import prod_db_backup
 from SCCM.models.prisoners import Prisoner
+from SCCM.models.reconciliation_checkpoint import ReconciliationCheckpoint
 from SCCM.schemas.balance import Balance, BalanceRecon
-from SCCM.bin import ccam_lookup as ccam
+from SCCM.services import crud
+from SCCM.services import reconciliation_services as recon
+from SCCM.services.api_services import AsyncHttpClient
+from SCCM.services.database_services import backup_once
+from SCCM.services.db_session import DbSession
+from SCCM.services.working_copy import open_database
 from SCCM.util import async_timed
-from bin.ccam_lookup import async_get_ccam_account_information, sum_account_balances
-from services.api_services import AsyncHttpClient
-from SCCM.models.case_reconciliation import CaseReconciliation
 
 # Globals
 cents = Decimal('0.01')
-env_file = Path.cwd() / 'config' / 'dev.env'
-settings = PLRASettings(_env_file=env_file, _env_file_encoding='utf-8')
-db_session = DbSession.global_init(db_file=settings.db_base_directory + settings.db_file)
-dbsession = DbSession.factory()
 
 
-def _backup_db():
+def _backup_db(settings: PLRASettings, db_file: str | None = None):
     # make backup of SQLite DB
-    original = f'{settings.db_base_directory}{settings.db_file}'
-    destination = (f'{settings.db_backup_directory}/{settings.db_file}_reconciliation_'
-                   f'{datetime.now().strftime("%Y%m%d")}')
+    original = db_file or f'{settings.db_base_directory}{settings.db_file}'
     # Only make backup of DB the first time that day
-    if not os.path.exists(destination):
-        prod_db_backup(original, destination)
-
-
-def get_prisoners_from_db() -> list[Prisoner]:
-    """
-    Retrieves all prisoners from database
-    :return: list of prisoners
-    """
-    from sqlalchemy.orm import selectinload
-    prisoners = dbsession.query(Prisoner).options(selectinload(Prisoner.cases_list)).all()
-    return prisoners
+    backup_once(original, settings.db_backup_directory,
+                f'reconciliation_{datetime.now().strftime("%Y%m%d")}',
+                settings.db_backup_compress, settings.db_backup_retention)
 
 
 def create_balance_comparison(case: str, ccam_summary_balance: DataFrame) -> tuple[Balance, Balance]:
@@ -65,66 +60,123 @@ def create_balance_comparison(case: str, ccam_summary_balance: DataFrame) -> tup
     return ccam_case_balances
 
 
-def reconcile_balances(case: CourtCase, ccam_case_balances: Series) -> None:
+def reconcile_batch(cases: list, ccam_data: DataFrame) -> tuple[list[dict], list[dict]]:
     """
-    Compares CCAM and database balances. If they do not match, the database is updated and a reconciliation transaction
-    :param case: case object
-    :param ccam_case_balances: CCAM balances
+    Compares database balances to CCAM for a list of cases and prepares updates for cases that do
+    not match
+    :param cases: rows from crud.get_active_case_balances
+    :param ccam_data: CCAM balances for the cases indexed by case number
+    :return: reconciliation rows and balance rows for crud.save_reconciliation_batch
+    """
+    if not cases:
+        return [], []
+    mismatches, missing = recon.find_balance_mismatches(recon.case_balances_frame(cases), ccam_data)
+    if missing:
+        print(Fore.YELLOW + f'CCAM balance not found for {len(missing)} cases: '
+                            f'{", ".join(missing)}')
+    print(Fore.RED + f'Balances do not match for {len(mismatches)} of {len(cases)} cases')
+    return recon.reconciliation_rows(mismatches)
+
+
+async def reconcile_in_batches(settings: PLRASettings, dbsession, batch_size: int,
+                               restart: bool = False) -> None:
+    """
+    Reconciles active cases in batches of batch_size. Each batch is fetched from CCAM, compared and
+    committed with its checkpoint so memory is bounded by the batch size and an interrupted run
+    resumes at the next batch
+    :param settings: application settings
+    :param dbsession: database session
+    :param batch_size: number of cases in each batch
+    :param restart: start a new reconciliation instead of resuming an unfinished one
     :return: None
     """
+    checkpoint = None if restart else crud.get_open_reconciliation_checkpoint(dbsession)
+    if checkpoint:
+        print(Fore.YELLOW + f'Resuming reconciliation after case id '
+                            f'{checkpoint.last_court_case_id}')
+    else:
+        checkpoint = ReconciliationCheckpoint(batch_size=batch_size, last_court_case_id=0,
+                                              cases_reconciled=0, cases_updated=0)
+        dbsession.add(checkpoint)
+        dbsession.commit()
+
+    session = AsyncHttpClient(settings=settings)
+    await session.start()
     try:
-        assert case.amount_owed.quantize(cents, ROUND_HALF_UP) == Decimal(
-            ccam_case_balances.loc['Total Outstanding'].item()).quantize(cents, ROUND_HALF_UP)
-        print(Fore.BLUE + f'Balances match for {case.prisoner.legal_name} - {case.ecf_case_num}\n')
-    except AssertionError:
-        print(Fore.RED + f'Balances do not match {case.prisoner.legal_name} - {case.ecf_case_num}')
-        print(f'Updating Database for {case.prisoner.legal_name} - {case.ecf_case_num}')
-        case_recon = CaseReconciliation(court_case_id=case.id,
-                                        previous_amount_assessed=case.amount_assessed,
-                                        previous_amount_collected=case.amount_collected,
-                                        previous_amount_owed=case.amount_owed,
-                                        updated_amount_assessed=Decimal(
-                                            ccam_case_balances.loc['Total Owed'].item()).quantize(cents, ROUND_HALF_UP),
-                                        updated_amount_collected=Decimal(
-                                            ccam_case_balances.loc['Total Collected'].item()).quantize(cents,
-                                                                                                       ROUND_HALF_UP),
-                                        updated_amount_owed=Decimal(
-                                            ccam_case_balances.loc['Total Outstanding'].item()).quantize(cents,
-                                                                                                         ROUND_HALF_UP))
-
-        # Update DB
-        case.amount_assessed = case_recon.updated_amount_assessed
-        case.amount_collected = case_recon.updated_amount_collected
-        case.amount_owed = case_recon.updated_amount_owed
-        if case.amount_owed == 0:
-            case.case_comment = 'PAID'
-        dbsession.add_all([case, case_recon])
-
-
-@async_timed()
-async def main():
-    _backup_db()
-    prisoners = get_prisoners_from_db()
-    cases_dict = {case.ccam_case_num: case for p in prisoners for case in p.cases_list}
-    cases_dict = dict(sorted(cases_dict.items()))
-    cases_for_reconciliation = [case.ccam_case_num for case in cases_dict.values() if case.case_comment == 'ACTIVE']
-    print(f'Number of cases to reconcile: {len(cases_dict)}')
-    session = AsyncHttpClient()
+        while True:
+            cases = crud.get_active_case_balances(dbsession, checkpoint.last_court_case_id,
+                                                  batch_size)
+            if not cases:
+                break
+            results = await session.get_CCAM_balances_async(
+                {'caseNumberList': [case.ccam_case_num for case in cases]}, concurrent=True)
+            ccam_data = sum_account_balances(results) if results \
+                else DataFrame(columns=EMPTY_BALANCE_COLUMNS)
+            reconciliation_rows, balance_rows = reconcile_batch(cases, ccam_data)
+
+            try:
+                crud.save_reconciliation_batch(dbsession, reconciliation_rows, balance_rows)
+                checkpoint.last_court_case_id = cases[-1].id
+                checkpoint.cases_reconciled += len(cases)
+                checkpoint.cases_updated += len(balance_rows)
+                dbsession.commit()
+            except Exception as e:
+                print(Fore.RED + f'Error saving reconciliation batch: {e}')
+                dbsession.rollback()
+                raise
+            print(Fore.BLUE + f'Reconciled {checkpoint.cases_reconciled} cases, '
+                              f'updated {checkpoint.cases_updated}\n')
+
+        checkpoint.completed_date = datetime.now()
+        dbsession.commit()
+    finally:
+        await session.stop()
+
+
+async def reconcile_all(settings: PLRASettings, dbsession) -> None:
+    """
+    Reconciles every active case in a single batch
+    :param settings: application settings
+    :param dbsession: database session
+    :return: None
+    """
+    cases = crud.get_active_case_balances(dbsession, 0, None)
+    print(f'Number of cases to reconcile: {len(cases)}')
+    if not cases:
+        return
+    session = AsyncHttpClient(settings=settings)
     await session.start()
-    results = await session.get_CCAM_balances_async({'caseNumberList': cases_for_reconciliation})
+    results = await session.get_CCAM_balances_async({'caseNumberList': [case.ccam_case_num
+                                                                        for case in cases]},
+                                                    concurrent=True)
     await session.stop()
-    ccam_data = sum_account_balances(results)
+    ccam_data = sum_account_balances(results) if results \
+        else DataFrame(columns=EMPTY_BALANCE_COLUMNS)
+
+    reconciliation_rows, balance_rows = reconcile_batch(cases, ccam_data)
+    try:
+        crud.save_reconciliation_batch(dbsession, reconciliation_rows, balance_rows)
+        dbsession.commit()
+    except Exception as e:
+        print(Fore.RED + f'Error saving reconciliation: {e}')
+        dbsession.rollback()
+        raise
+
 
-    for case in cases_for_reconciliation:
+@async_timed()
+async def main(settings: PLRASettings = None, db_file: str | None = None,
+               batch_size: int | None = None, restart: bool = False):
+    settings = settings or get_settings()
+    with open_database(settings, db_file):
+        dbsession = DbSession.factory()
+        _backup_db(settings, db_file)
         try:
-            ccam_balance = ccam_data.loc[str.split(case, '-')[0]]
-            case_balance = cases_dict[case]
-            reconcile_balances(case_balance, ccam_balance)
-        except KeyError:
-            print(f'CCAM balance not found for {case}')
-            continue
-    dbsession.commit()
-    dbsession.close()
+            if batch_size:
+                await reconcile_in_batches(settings, dbsession, batch_size, restart)
+            else:
+                await reconcile_all(settings, dbsession)
+        finally:
+            dbsession.close()
 
 
 if __name__ == '__main__':
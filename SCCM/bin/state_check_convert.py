@@ -1,271 +1,508 @@
 from __future__ import annotations
-from datetime import datetime
-from decimal import Decimal, ROUND_HALF_UP
+
 import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from multiprocessing.util import Finalize
 from pathlib import Path
 
-from sqlalchemy.orm import Session
+import pandas as pd
+from colorama import Fore
 
-import SCCM.services.initiate_global_db_session
-from SCCM.models import case_transaction
-from SCCM.models.court_cases import CourtCase
-from SCCM.services.crud import update_case_balances, create_prisoner, add_cases_for_prisoner, update_case_transactions
-from SCCM.services.db_session import DbSession
-from SCCM.bin import convert_to_excel as cte, ccam_lookup as ccam, get_files as gf
-from SCCM.services.case_services import initialize_balances
-
-from SCCM.schemas.balance import Balance
 import SCCM.bin.payment_strategy as payment
-from SCCM.config.config_model import PLRASettings
-from SCCM.bin.ccam_lookup import CCAMSettings
-import SCCM.schemas.prisoner_schema as pSchema
-import SCCM.services.prisoner_services as ps
 import SCCM.services.case_services as cs
-from SCCM.services.database_services import prod_db_backup
-from SCCM.services.payment_services import prepare_ccam_upload_transactions, check_sum, prepare_deposit_number, \
-    get_check_sum
-from SCCM.services import crud, dataframe_cleanup as dc
-
-
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("mode", help="Enter mode [dev,test,prod] for execution")
-    args = parser.parse_args()
-
-    if args.mode == 'dev':
-        config_file = Path.cwd() / 'config' / 'dev.env'
-        # config_file = 'SCCM/config/dev.env'
-        settings = PLRASettings(_env_file=config_file, _env_file_encoding='utf-8')
-
-    # db_session = DbSession.factory()
-    # ccam_settings = CCAMSettings(_env_file='SCCM/ccam.env', _env_file_encoding='utf-8')
-    filter_list = dc.populate_cases_filter_list()
-    # Ask user to choose one or more files for processing
-    filenames = gf.choose_files_for_import()
-
-    for file in filenames:
-        wb = cte.open_xls_file(file)
-        sheet = wb['Sheet']
-        check_date = datetime.today().strftime('%m/%d/%Y')
-        check_amount = sheet['K2'].value
-        check_number = sheet['L2'].value
-        state_check_data = cte.convert_sheet_to_dataframe(sheet)
-
-        state_check_data = dc.aggregate_prisoner_payment_amounts(state_check_data)
-
-        cents, total_by_name_sum = get_check_sum(state_check_data)
-
-        # check that dataframe aggregation matches original Excel sum
-        check_amount = Decimal(check_amount).quantize(cents, ROUND_HALF_UP)
-        # TODO Add function for handling aliases.  Examples:
-        # Sovereignty Joseph Helmueller Sovereign is Andrew Helmueller
-        # Brandon D. Bradley, Sr. aka Brittney Bradley
-
-        check_sum(check_amount, total_by_name_sum)
-
-        # format constants for Excel output
-        deposit_num = prepare_deposit_number(check_date)
-
-        # create Microsoft Excel upload file
-        output_path = cte.create_output_path(file)
-        excel_file = cte.create_output_file(check_date, check_number, output_path)
-
-        # set dataframe index to payee DOC#
-        state_check_data = state_check_data.set_index('DOC')
-
-        # convert Pandas dataframe to dictionary
-        prisoner_dict = state_check_data.to_dict('index')
-
-        # make backup of SQLite DB
-        original = f'{settings.db_base_directory}{settings.db_file}'
-        destination = f'{settings.db_backup_directory}/{settings.db_file}_{check_number}'
-        # Only make backup of DB the first time
-        if not os.path.exists(destination):
-            prod_db_backup(original, destination)
-
-        # Instantiate prisoner objects
-        prisoner_list = []
-        for i, (key, value) in enumerate(prisoner_dict.items()):
-            items = {
-                "doc_number": key,
-                "legal_name": value['Name'],
-                "amount_paid": Decimal(value['Amount']).quantize(cents, ROUND_HALF_UP)
-            }
-            prisoner_list.append(pSchema.PrisonerCreate(**items))
-
-        # Update models elements for payees and retrieve balances from internal DB if exists or CCAM API if not
-        db_prisoner_list = []  # list to hold existing prisoners
-        for i, p in enumerate(prisoner_list):
+import SCCM.services.prisoner_services as ps
+from SCCM.bin import ccam_lookup as ccam
+from SCCM.bin import convert_to_excel as cte
+from SCCM.bin import get_files as gf
+from SCCM.config.config_model import PLRASettings, load_settings
+from SCCM.models.court_cases import CourtCase
+from SCCM.schemas.domain import CaseBalance, Payee
+from SCCM.schemas.money import Money
+from SCCM.services import crud
+from SCCM.services import dataframe_cleanup as dc
+from SCCM.services.case_discovery import CaseDirectoryIndex
+from SCCM.services.case_services import initialize_balances
+from SCCM.services.ccam_cache import CCAMCache, print_cache_statistics
+from SCCM.services.control_numbers import ControlNumberAllocator
+from SCCM.services.database_services import backup_once
+from SCCM.services.db_session import DbSession, EngineProfile
+from SCCM.services.lookup_tables import get_lookup_tables
+from SCCM.services.name_index import PrisonerNameIndex
+from SCCM.services.payment_services import (
+    check_sum,
+    get_check_sum,
+    prepare_ccam_upload_transactions,
+    prepare_deposit_number,
+)
+from SCCM.services.working_copy import open_database
+from SCCM.util import StageTimer
+
+# per process state created by _init_worker and reused for every check prepared by the worker
+_worker = {}
+
+
+@dataclass
+class PreparedCheck:
+    """
+    Results of the read only stages for a state check: ingest, name matching, case discovery and
+    CCAM balances. Instances are returned from worker processes so every field must be picklable
+    """
+    file: str
+    check_number: float
+    check_amount: Money
+    check_date: str
+    prisoner_list: list
+    discovered: list
+    ccam_summary_balance: pd.DataFrame
+    new_matches: dict
+    stale_matches: list
+    name_index_snapshot: dict
+    case_index_snapshot: dict
+    # CCAM cache lookups for this check, reported by the parent when checks are prepared in worker
+    # processes
+    ccam_cache_hits: int = 0
+    ccam_cache_misses: int = 0
+
+
+def prepare_check(file: str, settings: PLRASettings, ccam_cache: CCAMCache,
+                  name_index: PrisonerNameIndex, case_index: CaseDirectoryIndex,
+                  timer: StageTimer = None) -> PreparedCheck:
+    """
+    Reads a state check, matches payees to the network share, identifies new cases and retrieves
+    their CCAM balances. Does not write to the application database so checks can be prepared
+    concurrently
+
+    :param file: state check XLS file
+    :param settings: application settings
+    :param ccam_cache: local cache of CCAM account lines
+    :param name_index: index of network share directories
+    :param case_index: index of prisoner case directories
+    :param timer: records the time spent in each stage
+    :return: prepared check for write_check
+    """
+    timer = timer or StageTimer()
+    state_check_data, check_amount, check_number = cte.read_state_check(
+        file, report=settings.report_ingest)
+    timer.lap('read check')
+    check_date = datetime.today().strftime('%m/%d/%Y')
+
+    state_check_data = dc.aggregate_prisoner_payment_amounts(state_check_data)
+
+    total_by_name_sum = get_check_sum(state_check_data)
+
+    # check that dataframe aggregation matches original Excel sum
+    check_amount = Money(check_amount)
+    # TODO Add function for handling aliases.  Examples:
+    # Sovereignty Joseph Helmueller Sovereign is Andrew Helmueller
+    # Brandon D. Bradley, Sr. aka Brittney Bradley
+
+    check_sum(check_amount, total_by_name_sum)
+    timer.lap('check sum')
+
+    # set dataframe index to payee DOC#
+    state_check_data = state_check_data.set_index('DOC')
+
+    # convert Pandas dataframe to dictionary
+    prisoner_dict = state_check_data.to_dict('index')
+
+    # Instantiate prisoner objects
+    prisoner_list = []
+    for key, value in prisoner_dict.items():
+        prisoner_list.append(Payee.from_check(key, value['Name'], value['Amount']))
+
+    # Match all payees to prisoner directories on the network share. Matches are saved by the writer
+    prisoner_list, new_matches, stale_matches = ps.find_prisoner_name_matches(prisoner_list,
+                                                                              settings.network_base_directory,
+                                                                              name_index)
+    timer.lap('name matching')
+
+    # retrieve all payees that exist in the internal DB
+    db_prisoners = crud.get_prisoners_with_active_cases([p.doc_number for p in prisoner_list])
+    timer.lap('database lookup')
+
+    # List every matched prisoner folder concurrently, then identify cases that are not in the
+    # internal DB
+    case_index.scan([p.case_search_dir for p in prisoner_list])
+    case_filter = get_lookup_tables().case_filter
+    discovered = []
+    ccam_cases_to_retrieve = []
+    for i, p in enumerate(prisoner_list):
+        try:
+            prisonerOrm = db_prisoners.get(p.doc_number)
+            p = cs.get_prisoner_case_numbers(p, case_filter, prisonerOrm, case_index)
+        except Exception as e:
+            print(f'Error processing prisoner {p.legal_name} in database: {e}')
+            continue
+        discovered.append(i)
+        ccam_cases_to_retrieve.extend(cte.format_case_num(case) for case in p.cases_list)
+    timer.lap('case discovery')
+
+    # Retrieve CCAM balances for every new case on the check in one pass
+    cache_hits, cache_misses = ccam_cache.hits, ccam_cache.misses
+    ccam_summary_balance = ccam.prefetch_ccam_balances(ccam_cases_to_retrieve, cache=ccam_cache,
+                                                       check_number=int(check_number),
+                                                       settings=settings)
+    timer.lap('CCAM balances')
+
+    return PreparedCheck(file=file, check_number=check_number, check_amount=check_amount,
+                         check_date=check_date, prisoner_list=prisoner_list, discovered=discovered,
+                         ccam_summary_balance=ccam_summary_balance, new_matches=new_matches,
+                         stale_matches=stale_matches, name_index_snapshot=name_index.snapshot,
+                         case_index_snapshot=case_index.snapshot,
+                         ccam_cache_hits=ccam_cache.hits - cache_hits,
+                         ccam_cache_misses=ccam_cache.misses - cache_misses)
+
+
+def write_check(session, prepared: PreparedCheck, settings: PLRASettings,
+                timer: StageTimer = None) -> dict:
+    """
+    Applies payments for a prepared check, creates its CCAM upload file and saves the results to the
+    database in one transaction. Only one caller may write at a time
+
+    :param session: database session
+    :param prepared: check returned by prepare_check
+    :param settings: application settings
+    :param timer: records the time spent in each stage
+    :return: summary of the check
+    """
+    timer = timer or StageTimer()
+    check_number = prepared.check_number
+
+    # make backup of the SQLite DB in use, which is the local copy when DB_WORKING_COPY is set. Only
+    # make backup of DB the first time
+    backup_once(DbSession.db_file, settings.db_backup_directory, str(int(check_number)),
+                settings.db_backup_compress, settings.db_backup_retention)
+    timer.lap('backup')
+
+    crud.save_prisoner_matches(prepared.new_matches, prepared.stale_matches)
+
+    # everything from the first new case to the saved results is committed together or rolled back
+    # together
+    try:
+        summary = _write_check_results(session, prepared, settings, timer)
+        session.commit()
+    except Exception as e:
+        print(f'Error writing check {int(check_number)} to the database: {e}')
+        session.rollback()
+        raise
+    timer.lap('save to database')
+    return summary
+
+
+def _write_check_results(session, prepared: PreparedCheck, settings: PLRASettings,
+                         timer: StageTimer) -> dict:
+    """
+    Adds new cases, applies payments, creates the CCAM upload file and adds the results to the
+    session without committing
+
+    :return: summary of the check
+    """
+    prisoner_list = prepared.prisoner_list
+    ccam_summary_balance = prepared.ccam_summary_balance
+    check_number = prepared.check_number
+
+    # reload payees since an earlier check in the same run may have added them or their cases
+    db_prisoners = crud.get_prisoners_with_active_cases([prisoner_list[i].doc_number
+                                                         for i in prepared.discovered])
+
+    discovered = []
+    for i in prepared.discovered:
+        p = prisoner_list[i]
+        prisonerOrm = db_prisoners.get(p.doc_number)
+        if prisonerOrm:
+            # add current cases from prisonerOrm to p.cases_list if no cases found on the network
+            if not p.cases_list:
+                p.cases_list.extend(prisonerOrm.cases_list)
+            # cases paid by an earlier check in the same run are known too
+            s = set(x.ecf_case_num for x in prisonerOrm.cases_list + prisonerOrm.paid_cases)
+            new_cases = [x for x in p.cases_list if x.ecf_case_num not in s]
+        else:
+            new_cases = p.cases_list
+        cases_dict = {case.ecf_case_num: cte.format_case_num(case) for case in new_cases}
+        discovered.append((i, p, prisonerOrm, cases_dict))
+
+    # Add new cases found on the network share for prisoners that exist in the database
+    db_prisoner_list = []  # list to hold existing prisoners
+    for _, p, prisonerOrm, cases_dict in discovered:
+        if prisonerOrm:
             try:
-                amount_paid = p.amount_paid
-                # retrieve prisoner from internal DB
-                prisonerOrm = crud.get_prisoner_with_active_case(p.doc_number, p.legal_name)
-
-                # initialization path for prisoner that exists in the database
-                if prisonerOrm:
+                session.add(prisonerOrm)
+                new_cases = [x for x in p.cases_list if x.ecf_case_num in cases_dict]
+                for case in new_cases:
                     try:
-                        p = ps.add_prisoner_to_db_session(settings.network_base_directory, p)
-                        # check if new cases added on the network for existing prisoner
-                        p = cs.get_prisoner_case_numbers(p, filter_list, prisonerOrm)
-                        # add current cases from prisonerOrm to p.cases_list
-                        # check if p.cases_list is empty
-                        if not p.cases_list:
-                            p.cases_list.extend(prisonerOrm.cases_list)
-                        # if len(p.cases_list) > len(prisonerOrm.cases_list):
-                        if len(p.cases_list) >= 1:
-                            session = DbSession.factory()
-                            session.add(prisonerOrm)
-                            s = set(x.ecf_case_num for x in prisonerOrm.cases_list)
-                            new_cases = [x for x in p.cases_list if x.ecf_case_num not in s]
-                            if len(new_cases) >= 1:
-                                cases_dict = {case.ecf_case_num: cte.format_case_num(case) for case in new_cases}
-                                ccam_cases_to_retrieve = [value for (key, value) in cases_dict.items()]
-                                ccam_balances = ccam.get_ccam_account_information(ccam_cases_to_retrieve,
-                                                                                  settings=settings,
-                                                                                  name=p.legal_name,
-                                                                                  ecf_case_num=p.cases_list)
-                                if ccam_balances:
-                                    ccam_summary_balance, party_code = ccam.sum_account_balances(ccam_balances)
-
-                                for case in new_cases:
-                                    case = initialize_balances(case, cases_dict, ccam_summary_balance, cents)
-                                    prisonerOrm.cases_list.append(CourtCase(acct_cd=case.acct_cd,
-                                                                            amount_assessed=case.balance.amount_assessed,
-                                                                            amount_collected=case.balance.amount_collected,
-                                                                            amount_owed=case.balance.amount_owed,
-                                                                            case_comment=case.case_comment,
-                                                                            ccam_case_num=case.ccam_case_num,
-                                                                            ecf_case_num=case.ecf_case_num))
-
-                                    session.commit()
-                                # save to list for future lookup
-                        db_prisoner_list.append(prisonerOrm)
-
-                    except Exception as e:
-                        print(f'Error updating prisoner {p.legal_name} in database: {e}')
+                        case = initialize_balances(case, cases_dict, ccam_summary_balance)
+                    except KeyError:
+                        print(f'CCAM balance not found for {case.ecf_case_num}')
                         continue
-
-                    # # convert to pydantic model for further processing
-                    p = pSchema.PrisonerModel.from_orm(prisonerOrm)
-                    p.amount_paid = amount_paid
-
-                    for case in p.cases_list:
-                        if case.case_comment == 'ACTIVE':
-                            case.balance = Balance()
-                            case.balance.amount_assessed = Decimal(case.amount_assessed.quantize(cents, ROUND_HALF_UP))
-                            case.balance.amount_collected = Decimal(
-                                case.amount_collected.quantize(cents, ROUND_HALF_UP))
-                            case.balance.amount_owed = Decimal(case.amount_owed.quantize(cents, ROUND_HALF_UP))
-                        prisoner_found = True
-                    # swap with prisoner created in earlier step.  Only necessary for existing prisoners
-                    prisoner_list[i] = p
-                    prisoner_found = True
-
-                else:
-                    prisoner_found = False
+                    prisonerOrm.cases_list.append(CourtCase(acct_cd=case.acct_cd,
+                                                            amount_assessed=case.balance.amount_assessed.to_decimal(),
+                                                            amount_collected=case.balance.amount_collected.to_decimal(),
+                                                            amount_owed=case.balance.amount_owed.to_decimal(),
+                                                            case_comment=case.case_comment,
+                                                            ccam_case_num=case.ccam_case_num,
+                                                            ecf_case_num=case.ecf_case_num))
+                # save to list for future lookup
+                db_prisoner_list.append(prisonerOrm)
 
             except Exception as e:
-                print(f'Error processing prisoner {p.legal_name} in database: {e}')
+                print(f'Error updating prisoner {p.legal_name} in database: {e}')
                 continue
 
-            # initialization path for prisoner that does not exist in the database
-            if not prisoner_found:
-                p = ps.add_prisoner_to_db_session(settings.network_base_directory, p)
-                p = cs.get_prisoner_case_numbers(p, filter_list, prisonerOrm)
-                cases_to_skip = []
-                cases_dict = {case.ecf_case_num: cte.format_case_num(case) for case in p.cases_list}
-
-                ccam_cases_to_retrieve = [value for (key, value) in cases_dict.items()]
-                if ccam_cases_to_retrieve:
-                    ccam_balances = ccam.get_ccam_account_information(ccam_cases_to_retrieve, settings=settings,
-                                                                      name=p.legal_name)
-                    ccam_summary_balance, party_code = ccam.sum_account_balances(ccam_balances)
-                for case in p.cases_list:
-                    try:
-                        case = initialize_balances(case, cases_dict, ccam_summary_balance, cents)
-                        if case.case_comment == 'PAID':
-                            cases_to_skip.append(case)
+    # assign ids to the new cases without committing. The check is committed once after all payees
+    # are processed
+    session.flush()
+    timer.lap('load payees')
 
-                    except KeyError:
+    # Update models elements for payees with balances from internal DB if exists or CCAM if not
+    for i, p, prisonerOrm, cases_dict in discovered:
+        # initialization path for prisoner that exists in the database
+        if prisonerOrm:
+            if prisonerOrm not in db_prisoner_list:
+                continue
+            p = Payee.from_orm(prisonerOrm, p.amount_paid)
+
+            for case in p.cases_list:
+                if case.case_comment == 'ACTIVE':
+                    case.balance = CaseBalance(case.amount_assessed, case.amount_collected,
+                                               case.amount_owed)
+            # swap with prisoner created in earlier step.  Only necessary for existing prisoners
+            prisoner_list[i] = p
+
+        # initialization path for prisoner that does not exist in the database
+        else:
+            cases_to_skip = []
+            for case in p.cases_list:
+                try:
+                    case = initialize_balances(case, cases_dict, ccam_summary_balance)
+                    if case.case_comment == 'PAID':
                         cases_to_skip.append(case)
-                        pass
 
-                if len(cases_to_skip) > 0:
-                    for case in cases_to_skip:
-                        if case in p.cases_list:
-                            p.cases_list.remove(case)
-                if party_code:
-                    p.vendor_code = party_code
+                except KeyError:
+                    cases_to_skip.append(case)
+                    pass
+
+            if len(cases_to_skip) > 0:
+                for case in cases_to_skip:
+                    if case in p.cases_list:
+                        p.cases_list.remove(case)
+            party_code = cs.get_party_code(cases_dict, ccam_summary_balance)
+            if party_code:
+                p.vendor_code = party_code
 
-            # Process Payments and identify overpayments
-            number_of_cases_for_prisoner = len(p.cases_list)
-            if number_of_cases_for_prisoner == 0:
-                context = payment.Context(payment.OverPaymentProcess())
-                p = context.process_payment(p, int(check_number))
+        # Process Payments and identify overpayments
+        number_of_cases_for_prisoner = len(p.cases_list)
+        if number_of_cases_for_prisoner == 0:
+            context = payment.Context(payment.OverPaymentProcess())
+            p = context.process_payment(p, int(check_number))
 
-            elif number_of_cases_for_prisoner > 1:
-                context = payment.Context(payment.MultipleCasePaymentProcess())
-                p = context.process_payment(p, int(check_number))
+        elif number_of_cases_for_prisoner > 1:
+            context = payment.Context(payment.MultipleCasePaymentProcess())
+            p = context.process_payment(p, int(check_number))
 
-            else:
-                context = payment.Context(payment.SingleCasePaymentProcess())
-                p = context.process_payment(p, int(check_number))
+        else:
+            context = payment.Context(payment.SingleCasePaymentProcess())
+            p = context.process_payment(p, int(check_number))
+
+    timer.lap('apply payments')
 
     # Process new transactions for Excel output
     payment_records = prepare_ccam_upload_transactions(prisoner_list)
 
     # Create CCAM upload file in Excel format
-    cte.write_rows_to_output_file(excel_file, payment_records, deposit_num, check_date)
-
-    # add prisoners to database
+    deposit_num = prepare_deposit_number(prepared.check_date)
+    output_path = cte.create_output_path(prepared.file)
+    excel_file = cte.upload_file_name(prepared.check_date, check_number, output_path,
+                                      settings.upload_file_format)
+    # control numbers must not repeat when a payee is on several checks deposited the same day. The
+    # block is reserved in the check's transaction, which already holds the write lock for the new
+    # cases
+    control_numbers = ControlNumberAllocator(
+        deposit_num, block_size=len(payment_records), session=session,
+        max_control_num=settings.ccam_max_control_number)
+    cte.write_upload_file(excel_file, payment_records, deposit_num, prepared.check_date,
+                          control_numbers, settings.upload_file_format)
+    timer.lap('upload file')
+
+    # add prisoners, cases and transactions to the session. write_check commits them
     print('Adding prisoners to database. Check Excel File for errors.')
-    # input('Press Enter to continue...')
-    # TODO Adjust session to be a single session for all prisoners
-    with Session(DbSession.engine) as session:
-        with session.begin():
+    crud.save_check_results(session, prisoner_list)
+
+    return {'File': prepared.file,
+            'Check Number': int(check_number),
+            'Check Amount': float(prepared.check_amount),
+            'Payees': len(prisoner_list),
+            'Transactions': sum(1 for record in payment_records if 'case' in record),
+            'Overpayments': sum(1 for record in payment_records if 'case' not in record),
+            'Upload File': excel_file,
+            'Status': 'OK'}
+
+
+def _init_worker(settings: PLRASettings, workers: int, db_file: str,
+                 profile: EngineProfile) -> None:
+    """
+    Prepares a worker process. Each worker opens its own database connections to the database used
+    by the parent process and its own CCAM cache and receives an equal share of the CCAM request
+    limits
+    """
+    # connections inherited from the parent process must not be used by the worker
+    if DbSession.engine is not None:
+        DbSession.engine.dispose(close=False)
+    else:
+        DbSession.global_init(db_file, profile, settings.db_echo, create_all=False)
+
+    _worker['settings'] = settings.copy(update={
+        'ccam_max_concurrency': max(1, settings.ccam_max_concurrency // workers),
+        'ccam_requests_per_second': settings.ccam_requests_per_second / workers})
+    _worker['ccam_cache'] = CCAMCache(settings.ccam_cache_file, settings.ccam_cache_ttl)
+    # pool workers exit without running atexit handlers, so the cache is closed by a multiprocessing
+    # finalizer
+    Finalize(_worker['ccam_cache'], _worker['ccam_cache'].close, exitpriority=10)
+    _worker['name_index'] = PrisonerNameIndex(settings.name_index_snapshot)
+    _worker['case_index'] = CaseDirectoryIndex(settings.case_index_snapshot,
+                                               settings.case_scan_workers)
+
+
+def _prepare_check_in_worker(file: str) -> PreparedCheck:
+    return prepare_check(file, _worker['settings'], _worker['ccam_cache'], _worker['name_index'],
+                         _worker['case_index'])
+
+
+def _prepare_checks(filenames: list[str], settings: PLRASettings, name_index: PrisonerNameIndex,
+                    case_index: CaseDirectoryIndex, workers: int):
+    """
+    Prepares checks in a process pool when there is more than one check and worker, otherwise in
+    this process
+
+    :return: generator of file and prepared check, or the exception raised while preparing it, in
+        file order
+    """
+    if workers > 1 and len(filenames) > 1:
+        workers = min(workers, len(filenames))
+        initargs = (settings, workers, DbSession.db_file, DbSession.profile)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=initargs) as executor:
+            futures = [executor.submit(_prepare_check_in_worker, file) for file in filenames]
+            for file, future in zip(filenames, futures, strict=True):
+                try:
+                    yield file, future.result()
+                except Exception as e:
+                    yield file, e
+    else:
+        ccam_cache = CCAMCache(settings.ccam_cache_file, settings.ccam_cache_ttl)
+        try:
+            for file in filenames:
+                try:
+                    yield file, prepare_check(file, settings, ccam_cache, name_index, case_index)
+                except Exception as e:
+                    yield file, e
+        finally:
+            ccam_cache.close()
+
+
+def process_checks(filenames: list[str], settings: PLRASettings, workers: int = 1) -> list[dict]:
+    """
+    Processes one or more state checks. Checks are prepared concurrently when workers is greater
+    than one and written to the database one at a time in file order by this process
+
+    :param filenames: state check XLS files
+    :param settings: application settings
+    :param workers: number of worker processes used to prepare checks
+    :return: summary of each check
+    """
+    name_index = PrisonerNameIndex(settings.name_index_snapshot)
+    case_index = CaseDirectoryIndex(settings.case_index_snapshot, settings.case_scan_workers)
+    session = DbSession.factory()
+    summary = []
+    cache_hits = cache_misses = 0
+    try:
+        for file, prepared in _prepare_checks(filenames, settings, name_index, case_index, workers):
+            if isinstance(prepared, Exception):
+                print(Fore.RED + f'Error preparing {file}: {prepared}')
+                summary.append({'File': file, 'Status': f'Error: {prepared}'})
+                continue
+            name_index.merge_snapshot(prepared.name_index_snapshot)
+            case_index.merge_snapshot(prepared.case_index_snapshot)
+            cache_hits += prepared.ccam_cache_hits
+            cache_misses += prepared.ccam_cache_misses
             try:
-                for p in prisoner_list:
-                    if p.exists:
-                        # from SCCM.models.prisoners import Prisoner
-                        # result = session.query(Prisoner).filter(Prisoner.doc_num == p.doc_num).first()
-                        # session.add(result)
-
-                        db_prisoner_list, session = add_transaction_for_prisoner_that_exists(db_prisoner_list, p,
-                                                                                             session)
-
-                    else:
-                        db_prisoner = create_prisoner(p)
-                        session.add(db_prisoner)
-                        db_prisoner = add_cases_for_prisoner(db_prisoner, p)
-                        session.add(db_prisoner)
+                summary.append(write_check(session, prepared, settings))
             except Exception as e:
-                print(f'Error adding prisoner to database: {e}')
+                print(Fore.RED + f'Error writing {file}: {e}')
+                # the session is reused for the next check, which must not commit this check's
+                # pending changes
                 session.rollback()
-                raise
-
-        # xcept:
-        #     session.rollback()
-        #     raise
-        # else:
-        #     session.commit()
-
-
-def add_transaction_for_prisoner_that_exists(db_prisoner_list, p, session):
-    new_transactions = [case for case in p.cases_list if case.transaction]
-    if new_transactions:
-        for t in new_transactions:
-            case_db = update_case_balances(t, db_prisoner_list)
-            session.add(case_db)
-            # Todo review error on check number
-            case_db.case_transactions.append(case_transaction.CaseTransaction(
-                check_number=t.transaction.check_number,
-                amount_paid=t.transaction.amount_paid
-            ))
-            # session.add(case_db)
-            return db_prisoner_list, session
-    else:
-        return db_prisoner_list, session
+                summary.append({'File': file, 'Check Number': int(prepared.check_number),
+                                'Status': f'Error: {e}'})
+    finally:
+        session.close()
+    print_cache_statistics(cache_hits, cache_misses)
+
+    name_index.save_snapshot()
+    case_index.save_snapshot()
+    return summary
+
+
+def write_batch_summary(summary: list[dict], output_path: str) -> str:
+    """
+    Saves the combined summary of a multi-check run next to the input files
+
+    :param summary: summary of each check from process_checks
+    :param output_path: directory for the summary file
+    :return: summary file
+    """
+    file = f"{output_path}/{datetime.today().strftime('%Y.%m.%d')}_Batch_Summary.xlsx"
+    pd.DataFrame(summary).to_excel(file, sheet_name='Summary', index=False)
+    print(f'The batch summary has been saved as {file}\n')
+    return file
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", help="Enter mode [dev,test,prod] for execution")
+    parser.add_argument("files", nargs='*',
+                        help="State check XLS files to process without prompting")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of processes used to prepare checks concurrently. Each "
+                             "worker opens the CCAM cache and snapshot files, so use more than one "
+                             "only when they are on local disk")
+    parser.add_argument("--report-ingest", action='store_true',
+                        help="Print the time and peak memory of reading each check. Traces memory "
+                             "allocations, which slows the read")
+    args = parser.parse_args()
+
+    if args.mode == 'dev':
+        config_file = Path.cwd() / 'config' / 'dev.env'
+        # config_file = 'SCCM/config/dev.env'
+        settings = load_settings(config_file)
+    if args.report_ingest:
+        settings = settings.copy(update={'report_ingest': True})
+
+    run(args.files, settings, args.workers)
+
+
+def run(filenames: list[str], settings: PLRASettings, workers: int = 1) -> list[dict]:
+    """
+    Connects to the database and processes state checks. Asks the user to choose files if none are
+    provided
+
+    :param filenames: state check XLS files
+    :param settings: application settings
+    :param workers: number of worker processes used to prepare checks
+    :return: summary of each check
+    """
+    # Ask user to choose one or more files for processing if none were provided
+    filenames = list(filenames) or list(gf.choose_files_for_import())
+
+    with open_database(settings):
+        summary = process_checks(filenames, settings, workers)
+
+    print(pd.DataFrame(summary).to_string(index=False))
+    if len(filenames) > 1:
+        write_batch_summary(summary, cte.create_output_path(filenames[0]))
+    return summary
 
 
 if __name__ == '__main__':
@@ -1,17 +1,24 @@
 """
 Command line JIFMS case lookup. Uses API to retrieve case information and prints to screen.
 """
-import pandas as pd
+import argparse
+
 import pydantic.errors
 
-from SCCM.bin.ccam_lookup import get_ccam_account_information, CCAMSettings, sum_account_balances
-from SCCM.bin.convert_to_excel import format_case_num
+from SCCM.bin.ccam_lookup import get_ccam_account_information, summarize_case_balance
+from SCCM.config.config_model import PLRASettings, load_settings
 from SCCM.schemas.case_schema import CaseCreate
+from SCCM.services.case_services import format_case_num
 
 
-def main():
-    settings = CCAMSettings(_env_file='../../ccam.env', _env_file_encoding='utf-8')
-    case_number = input('Enter CaseBase Number (yy-cv-number-xxx(if multi-defendant case):  ')
+def lookup_case(case_number: str, settings: PLRASettings) -> dict:
+    """
+    Prints the CCAM balance for a case
+
+    :param case_number: ECF case number with an optional party number for multi-defendant cases
+    :param settings: application settings
+    :return: CCAM balance for the case
+    """
     try:
         case = CaseCreate(
             ecf_case_num=str.upper(case_number),
@@ -28,13 +35,27 @@ def main():
         )
     formatted_case_num = format_case_num(case)
     ccam_balances = get_ccam_account_information(formatted_case_num, settings=settings, name=case_number)
-    ccam_summary_balance, party_code = sum_account_balances(ccam_balances)
+    balance = summarize_case_balance(ccam_balances)
     prisoner_name = {c['prty_nm'] for c in ccam_balances}
-    balance = ccam_summary_balance.to_dict()
     print(f'\n \nCCAM Balance for case {str.upper(case_number)} for {prisoner_name} is \n'
           f"Principal Owed: {balance['Total Owed']}\n"
           f"Total Collected: {balance['Total Collected']}\n"
           f"Total Outstanding: {balance['Total Outstanding']}")
+    return balance
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("case_number", nargs='?',
+                        help="ECF case number yy-cv-number-xxx(if multi-defendant case)")
+    parser.add_argument("--env-file",
+                        help="Settings file. Defaults to config/dev.env in the working directory")
+    args = parser.parse_args()
+
+    settings = load_settings(args.env_file)
+    case_number = args.case_number or \
+        input('Enter CaseBase Number (yy-cv-number-xxx(if multi-defendant case):  ')
+    lookup_case(case_number, settings)
 
 
 if __name__ == '__main__':
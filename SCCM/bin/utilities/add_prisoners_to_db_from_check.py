@@ -1,14 +1,13 @@
 import pandas as pd
-from decimal import Decimal
-from decimal import ROUND_HALF_UP
 
-from SCCM.services.db_session import DbSession
-from SCCM.config.config_model import PLRASettings
+from SCCM.bin import ccam_lookup as ccam
+from SCCM.bin import convert_to_excel as cte
+from SCCM.bin import get_files as gf
 from SCCM.bin.ccam_lookup import CCAMSettings
-from SCCM.bin import convert_to_excel as cte, ccam_lookup as ccam, get_files as gf
-
+from SCCM.config.config_model import PLRASettings
 from SCCM.schemas.prisoner_schema import PrisonerCreate
 from SCCM.services import crud
+from SCCM.services.db_session import DbSession
 
 
 def main():
@@ -19,7 +18,6 @@ def main():
     db_path = f'{settings.db_base_directory}{settings.db_file}'
     DbSession.global_init(db_path)
     db_session = DbSession.factory()
-    cents = Decimal('0.01')
 
     # Ask user to choose one or more files for processing
     filenames = gf.choose_files_for_import()
@@ -48,11 +46,15 @@ def main():
             prisoner_list.append(PrisonerCreate(**items))
 
         # Get case information and retreive balances from CCAM
-        import SCCM.services.prisoner_services as ps
         import SCCM.services.case_services as cs
+        import SCCM.services.prisoner_services as ps
         from SCCM.schemas.balance import Balance
+        from SCCM.services.name_index import PrisonerNameIndex
+        prisoner_list, _, _ = ps.find_prisoner_name_matches(prisoner_list,
+                                                            settings.network_base_directory,
+                                                            PrisonerNameIndex(),
+                                                            use_match_cache=False)
         for i, p in enumerate(prisoner_list):
-            p = ps.add_prisoner_to_db_session(settings.network_base_directory, p)
             p = cs.get_prisoner_case_numbers(p)
 
             cases_to_skip = []
@@ -70,11 +72,7 @@ def main():
                     case.acct_cd = ccam_summary_balance.loc[balance_key]['acct_cd']
                     case.ccam_case_num = cases_dict[case.ecf_case_num]
                     ccam_balance = ccam_summary_balance.loc[balance_key].to_dict()
-                    case.balance.amount_assessed = Decimal(ccam_balance['Total Owed']).quantize(cents,
-                                                                                                ROUND_HALF_UP)
-                    case.balance.amount_collected = Decimal(ccam_balance['Total Collected']).quantize(cents,
-                                                                                                      ROUND_HALF_UP)
-                    case.balance.amount_owed = Decimal(ccam_balance['Total Outstanding']).quantize(cents,ROUND_HALF_UP)
+                    case.balance.add_ccam_balances(ccam_balance)
 
                 except KeyError:
                     cases_to_skip.append(case)
@@ -0,0 +1,44 @@
+"""
+Command line utility to remove CCAM balances from the local cache so they are retrieved from the API
+on the next run.
+"""
+import argparse
+
+from SCCM.config.config_model import PLRASettings, load_settings
+from SCCM.services.ccam_cache import CCAMCache
+
+
+def invalidate_cache(settings: PLRASettings, case_numbers: list[str] | None = None,
+                     check_number: int | None = None) -> int:
+    """
+    Removes cases from the CCAM cache named in the settings. Removes every case if no case numbers
+    or check number are provided
+
+    :param settings: application settings
+    :param case_numbers: CCAM formatted case numbers to remove
+    :param check_number: remove all cases retrieved for this state check
+    :return: number of cases removed
+    """
+    cache = CCAMCache(settings.ccam_cache_file, settings.ccam_cache_ttl)
+    try:
+        removed = cache.invalidate(case_numbers=case_numbers, check_number=check_number)
+    finally:
+        cache.close()
+    print(f'Removed {removed} cases from the CCAM cache.')
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--env-file",
+                        help="Settings file. Defaults to config/dev.env in the working directory")
+    parser.add_argument("--check", type=int, help="Remove cases retrieved for a state check number")
+    parser.add_argument("--case", nargs='+',
+                        help="Remove CCAM case numbers e.g. DWIW321CV000012-001")
+    args = parser.parse_args()
+
+    invalidate_cache(load_settings(args.env_file), args.case, args.check)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,54 +1,69 @@
 """
 Command line database case lookup. Retrieves case information and prints to screen.
 """
-
-from pathlib import Path
+import argparse
 import warnings
+from decimal import ROUND_HALF_UP, Decimal
+
 from sqlalchemy.exc import SAWarning
-from decimal import *
 
-from SCCM.config import config
+from SCCM.config.config_model import load_settings
 from SCCM.models.court_cases import CourtCase
 from SCCM.services.db_session import DbSession
+from SCCM.services.initiate_global_db_session import initiate_global_db_session
 
-# TODO - rewrite
-def main():
-    p = Path.cwd()
-    config_file = p.parent.parent / 'config' / 'config.ini'
-    configuration = config.initialize_config(str(config_file))
-    prod_vars = config.get_prod_vars(configuration, 'PROD')
-    prod_db_path = prod_vars['NETWORK_DB_BASE_DIR']
-    db_file_name = prod_vars['DATABASE_SQLite']
-    db_file = f'{prod_db_path}{db_file_name}'
-    db_session = DbSession.global_init(db_file)
+cents = Decimal('0.01')
 
+
+def lookup_case(case_number: str, number_of_transactions: int = 5) -> bool:
+    """
+    Prints the balance and most recent transactions for a case in the application database
+
+    :param case_number: ECF case number
+    :param number_of_transactions: number of transactions to print
+    :return: True if the case was found
+    """
     # Suppress SQLAlchemy warning about Decimal storage.
     warnings.filterwarnings('ignore', r".*support Decimal objects natively", SAWarning, r'^sqlalchemy\.sql\.sqltypes$')
 
-    case_number = input('Enter CaseBase Number (yy-cv-number-xxx(if multi-defendant case):  ')
-
-    s = db_session
-    case_balance = s.query(CourtCase, CaseBalance).filter(CourtCase.ecf_case_num == case_number.upper()) \
-        .filter(CourtCase.id == CaseBalance.court_case_id).first()
-
-    cents = Decimal('0.01')
-
-    print(f'The balance for case number {case_balance.CourtCase.ecf_case_num} '
-          f'for {case_balance.CourtCase.prisoner.judgment_name} is: \n \n'
-          f'Amount Assessed: {Decimal(case_balance.CaseBalance.amount_assessed).quantize(cents, ROUND_HALF_UP)}\n'
-          f'Amount Collected: {Decimal(case_balance.CaseBalance.amount_collected).quantize(cents, ROUND_HALF_UP)}\n'
-          f'Amount Owed: {Decimal(case_balance.CaseBalance.amount_owed).quantize(cents, ROUND_HALF_UP)}\n ')
-    if case_balance.CaseBalance.case.case_comment == 'PAID':
-        print(f'This case is paid in full \n')
-    else:
-        print(f'This case is active \n')
-
-    transactions = case_balance.CourtCase.case_transactions
-    print(f'The last several transactions are:')
-    for index, value in enumerate(transactions):
-        print(f'Date paid: {value.created_date} '
-              f'Check Number: {value.check_number} '
-              f'Amount paid: {Decimal(value.amount_paid).quantize(cents, ROUND_HALF_UP)}')
+    with DbSession.factory() as s:
+        case = s.query(CourtCase).filter(CourtCase.ecf_case_num == case_number.upper()).first()
+        if case is None:
+            print(f'Case number {case_number.upper()} not found in the database')
+            return False
+
+        print(f'The balance for case number {case.ecf_case_num} '
+              f'for {case.prisoner.judgment_name} is: \n \n'
+              f'Amount Assessed: {Decimal(case.amount_assessed).quantize(cents, ROUND_HALF_UP)}\n'
+              f'Amount Collected: {Decimal(case.amount_collected).quantize(cents, ROUND_HALF_UP)}\n'
+              f'Amount Owed: {Decimal(case.amount_owed).quantize(cents, ROUND_HALF_UP)}\n ')
+        if case.case_comment == 'PAID':
+            print('This case is paid in full \n')
+        else:
+            print('This case is active \n')
+
+        print('The last several transactions are:')
+        for value in case.case_transactions[-number_of_transactions:]:
+            print(f'Date paid: {value.created_date} '
+                  f'Check Number: {value.check_number} '
+                  f'Amount paid: {Decimal(value.amount_paid).quantize(cents, ROUND_HALF_UP)}')
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("case_number", nargs='?', help="ECF case number yy-cv-number")
+    parser.add_argument("--env-file",
+                        help="Settings file. Defaults to config/dev.env in the working directory")
+    parser.add_argument("--db-file",
+                        help="Database file used instead of the one named in the settings")
+    args = parser.parse_args()
+
+    settings = load_settings(args.env_file)
+    initiate_global_db_session(settings, args.db_file)
+    case_number = args.case_number or \
+        input('Enter CaseBase Number (yy-cv-number-xxx(if multi-defendant case):  ')
+    lookup_case(case_number)
 
 
 if __name__ == '__main__':
@@ -20,7 +20,63 @@ class PLRASettings(BaseSettings):
     base_url: str = Field(..., env='BASE_URL')
     ccam_url: str = Field(..., env='CCAM_URL')
     cert_file: str = Field(..., env='CERT_FILE')
+    ccam_max_concurrency: int = Field(10, env='CCAM_MAX_CONCURRENCY')
+    ccam_requests_per_second: float = Field(5, env='CCAM_REQUESTS_PER_SECOND')
+    ccam_cache_file: str = Field('ccam_cache.sqlite', env='CCAM_CACHE_FILE')
+    ccam_cache_ttl: int = Field(4 * 60 * 60, env='CCAM_CACHE_TTL')
+    name_index_snapshot: str = Field('name_index.json', env='NAME_INDEX_SNAPSHOT')
+    case_index_snapshot: str = Field('case_index.json', env='CASE_INDEX_SNAPSHOT')
+    case_scan_workers: int = Field(16, env='CASE_SCAN_WORKERS')
+    reconciliation_batch_size: int = Field(500, env='RECONCILIATION_BATCH_SIZE')
+    upload_file_format: str = Field('xlsx', env='UPLOAD_FILE_FORMAT')
+    # print the time and peak memory of reading each state check, traced with tracemalloc
+    report_ingest: bool = Field(False, env='REPORT_INGEST')
+    # highest control number of a deposit, see control_numbers.MAX_CONTROL_NUMBER
+    ccam_max_control_number: int = Field(999, env='CCAM_MAX_CONTROL_NUMBER')
+    # SQLite engine profile from db_session.ENGINE_PROFILES. The db_ pragma settings override single
+    # profile values
+    db_engine_profile: str = Field('network', env='DB_ENGINE_PROFILE')
+    db_journal_mode: str | None = Field(None, env='DB_JOURNAL_MODE')
+    db_synchronous: str | None = Field(None, env='DB_SYNCHRONOUS')
+    db_cache_size: int | None = Field(None, env='DB_CACHE_SIZE')
+    db_mmap_size: int | None = Field(None, env='DB_MMAP_SIZE')
+    db_temp_store: str | None = Field(None, env='DB_TEMP_STORE')
+    db_echo: bool = Field(False, env='DB_ECHO')
+    db_create_all: bool = Field(True, env='DB_CREATE_ALL')
+    # run against a local copy of the database that is published back to the share when the run
+    # completes
+    db_working_copy: bool = Field(False, env='DB_WORKING_COPY')
+    db_working_directory: str | None = Field(None, env='DB_WORKING_DIR')
+    db_backup_compress: bool = Field(False, env='DB_BACKUP_COMPRESS')
+    # number of backups kept in the backup manifest, 0 keeps every backup
+    db_backup_retention: int = Field(0, env='DB_BACKUP_RETENTION')
     class Config:
         # env_file = env_file
         # env_file_encoding = 'uft-8'
         case_sensitive = False
+
+
+_settings = None
+
+
+def load_settings(env_file: str | None = None) -> PLRASettings:
+    """
+    Loads application settings and makes them available through get_settings
+
+    :param env_file: settings file. Defaults to config/dev.env in the working directory
+    :return: application settings
+    """
+    global _settings
+    env_file = env_file or Path.cwd() / 'config' / 'dev.env'
+    _settings = PLRASettings(_env_file=env_file, _env_file_encoding='utf-8')
+    return _settings
+
+
+def get_settings() -> PLRASettings:
+    """
+    Returns the settings loaded by load_settings. Loads the default settings file the first time if
+    none were loaded
+    """
+    if _settings is None:
+        return load_settings()
+    return _settings
@@ -1,15 +1,32 @@
 # noinspection PyUnresolvedReferences
-from SCCM.models.prisoners import Prisoner
-# noinspection PyUnresolvedReferences
-from SCCM.models.suffix import SuffixTable
+from SCCM.models.alias import Alias
+
 # noinspection PyUnresolvedReferences
 from SCCM.models.case_filter import CaseFilter
+
 # noinspection PyUnresolvedReferences
-from SCCM.models.court_cases import CourtCase
+from SCCM.models.case_reconciliation import CaseReconciliation
+
 # noinspection PyUnresolvedReferences
 from SCCM.models.case_transaction import CaseTransaction
-# # noinspection PyUnresolvedReferences
-from SCCM.models.case_reconciliation import CaseReconciliation
+
 # noinspection PyUnresolvedReferences
-from SCCM.models.alias import Alias
+from SCCM.models.control_number_counter import ControlNumberCounter
+
 # noinspection PyUnresolvedReferences
+from SCCM.models.court_cases import CourtCase
+
+# noinspection PyUnresolvedReferences
+from SCCM.models.lookup_table_version import LookupTableVersion
+
+# noinspection PyUnresolvedReferences
+from SCCM.models.prisoner_match import PrisonerMatch
+
+# noinspection PyUnresolvedReferences
+from SCCM.models.prisoners import Prisoner
+
+# noinspection PyUnresolvedReferences
+from SCCM.models.reconciliation_checkpoint import ReconciliationCheckpoint
+
+# noinspection PyUnresolvedReferences
+from SCCM.models.suffix import SuffixTable
@@ -11,7 +11,7 @@ class CaseTransaction(SqlAlchemyBase):
     __tablename__ = 'case_transactions'
 
     id = sa.Column(sa.INT, primary_key=True, autoincrement=True)
-    court_case_id = sa.Column(sa.Integer, sa.ForeignKey('court_cases.id'))
+    court_case_id = sa.Column(sa.Integer, sa.ForeignKey('court_cases.id'), index=True)
     created_date = sa.Column(sa.DateTime, default=datetime.datetime.now)
     updated_date = sa.Column(sa.DateTime, onupdate=datetime.datetime.now)
     check_number= sa.Column(sa.INT, nullable=False)
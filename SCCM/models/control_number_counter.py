@@ -0,0 +1,13 @@
+import sqlalchemy as sa
+
+from SCCM.models.modelbase import SqlAlchemyBase
+
+
+class ControlNumberCounter(SqlAlchemyBase):
+    __tablename__ = 'control_number_counters'
+
+    deposit_num = sa.Column(sa.String, primary_key=True)
+    last_control_num = sa.Column(sa.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<Control Number Counter {self.deposit_num} - {self.last_control_num}>'
@@ -8,13 +8,15 @@ from SCCM.models.prisoners import Prisoner
 
 class CourtCase(SqlAlchemyBase):
     __tablename__ = 'court_cases'
+    __table_args__ = (sa.Index('ix_court_cases_prisoner_id_case_comment', 'prisoner_id',
+                               'case_comment'),)
 
     id = sa.Column(sa.INT, primary_key=True, autoincrement=True)
     prisoner_id = sa.Column(sa.Integer, sa.ForeignKey('prisoners.id'))
     created_date = sa.Column(sa.DateTime, default=datetime.datetime.now)
     acct_cd = sa.Column(sa.String, nullable=True)
-    ecf_case_num = sa.Column(sa.String)
-    ccam_case_num = sa.Column(sa.String)
+    ecf_case_num = sa.Column(sa.String, index=True)
+    ccam_case_num = sa.Column(sa.String, unique=True, index=True)
     case_comment = sa.Column(sa.String, nullable=True)
     balance_created_date = sa.Column(sa.DateTime, default=datetime.datetime.now)
     balance_updated_date = sa.Column(sa.DateTime, default=datetime.datetime.now)
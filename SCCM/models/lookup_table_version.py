@@ -0,0 +1,39 @@
+import sqlalchemy as sa
+
+from SCCM.models.modelbase import SqlAlchemyBase
+
+# lookup tables whose edits are counted by triggers
+VERSIONED_TABLES = ('case_filters', 'suffix_table')
+
+
+class LookupTableVersion(SqlAlchemyBase):
+    __tablename__ = 'lookup_table_versions'
+
+    table_name = sa.Column(sa.String, primary_key=True)
+    version = sa.Column(sa.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<Lookup Table Version {self.table_name} - {self.version}>'
+
+
+def version_statements() -> list[str]:
+    """
+    SQLite statements that add a version row for each lookup table and triggers that increment it
+    whenever a row is inserted, updated or deleted
+    """
+    statements = []
+    for table in VERSIONED_TABLES:
+        statements.append(f"INSERT OR IGNORE INTO lookup_table_versions (table_name, version) "
+                          f"VALUES ('{table}', 0)")
+        for event in ('insert', 'update', 'delete'):
+            statements.append(f"CREATE TRIGGER IF NOT EXISTS tr_{table}_{event}_version "
+                              f"AFTER {event.upper()} ON {table} "
+                              f"BEGIN UPDATE lookup_table_versions SET version = version + 1 "
+                              f"WHERE table_name = '{table}'; END")
+    return statements
+
+
+@sa.event.listens_for(SqlAlchemyBase.metadata, 'after_create')
+def _create_version_triggers(target, connection, **kw):
+    for statement in version_statements():
+        connection.exec_driver_sql(statement)
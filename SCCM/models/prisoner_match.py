@@ -0,0 +1,21 @@
+import datetime
+
+import sqlalchemy as sa
+
+from SCCM.models.modelbase import SqlAlchemyBase
+
+
+class PrisonerMatch(SqlAlchemyBase):
+    __tablename__ = 'prisoner_matches'
+    __table_args__ = (sa.UniqueConstraint('doc_number', 'legal_name'),)
+
+    id = sa.Column(sa.INT, primary_key=True, autoincrement=True)
+    doc_number = sa.Column(sa.Integer, nullable=False, index=True)
+    legal_name = sa.Column(sa.String, nullable=False)
+    judgment_name = sa.Column(sa.String, nullable=False)
+    score = sa.Column(sa.Integer, nullable=False)
+    matched_date = sa.Column(sa.DateTime, default=datetime.datetime.now,
+                             onupdate=datetime.datetime.now)
+
+    def __repr__(self):
+        return f'<Prisoner Match {self.doc_number} {self.legal_name} - {self.judgment_name}>'
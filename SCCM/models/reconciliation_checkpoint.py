@@ -0,0 +1,22 @@
+import datetime
+
+import sqlalchemy as sa
+
+from SCCM.models.modelbase import SqlAlchemyBase
+
+
+class ReconciliationCheckpoint(SqlAlchemyBase):
+    __tablename__ = 'reconciliation_checkpoints'
+
+    id = sa.Column(sa.INT, primary_key=True, autoincrement=True)
+    started_date = sa.Column(sa.DateTime, default=datetime.datetime.now)
+    updated_date = sa.Column(sa.DateTime, default=datetime.datetime.now,
+                             onupdate=datetime.datetime.now)
+    completed_date = sa.Column(sa.DateTime, nullable=True)
+    batch_size = sa.Column(sa.Integer, nullable=False)
+    last_court_case_id = sa.Column(sa.Integer, nullable=False, default=0)
+    cases_reconciled = sa.Column(sa.Integer, nullable=False, default=0)
+    cases_updated = sa.Column(sa.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<Reconciliation Checkpoint {self.id} - Last Case {self.last_court_case_id}>'
@@ -1,8 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional
-from decimal import Decimal, ROUND_HALF_UP
 
-cents = Decimal('0.01')
+from SCCM.schemas.money import Money
 
 
 class Balance(BaseModel):
@@ -10,9 +8,9 @@ class Balance(BaseModel):
     A class used to track case balance information
 
     """
-    amount_assessed: Optional[Decimal] = 0.00
-    amount_collected: Optional[Decimal] = 0.00
-    amount_owed: Optional[Decimal] = 0.00
+    amount_assessed: Money | None = Money(0)
+    amount_collected: Money | None = Money(0)
+    amount_owed: Money | None = Money(0)
 
     def update_balance(self) -> None:
         pass
@@ -24,11 +22,11 @@ class Balance(BaseModel):
         :param ccam_balance: CCAM balance
 
         """
-        self.amount_assessed = Decimal(ccam_balance['Total Owed'].item()).quantize(cents, ROUND_HALF_UP)
-        self.amount_collected = Decimal(ccam_balance['Total Collected'].item()).quantize(cents, ROUND_HALF_UP)
-        self.amount_owed = Decimal(ccam_balance['Total Outstanding'].item()).quantize(cents, ROUND_HALF_UP)
+        self.amount_assessed = Money(ccam_balance['Total Owed'])
+        self.amount_collected = Money(ccam_balance['Total Collected'])
+        self.amount_owed = Money(ccam_balance['Total Outstanding'])
 
-    def mark_paid(self) -> float:
+    def mark_paid(self) -> Money:
         """
         pay off a case
 
@@ -36,7 +34,7 @@ class Balance(BaseModel):
         """
         self.amount_collected = self.amount_assessed
         overpayment = abs(self.amount_owed)
-        self.amount_owed = 0
+        self.amount_owed = Money(0)
         return overpayment
 
 
@@ -45,9 +43,9 @@ class BalanceRecon(BaseModel):
     A class used to track case balance information
 
     """
-    amount_assessed: Optional[Decimal] = 0.00
-    amount_collected: Optional[Decimal] = 0.00
-    amount_owed: Optional[Decimal] = 0.00
+    amount_assessed: Money | None = Money(0)
+    amount_collected: Money | None = Money(0)
+    amount_owed: Money | None = Money(0)
 
     def update_balance(self) -> None:
         pass
@@ -63,7 +61,7 @@ class BalanceRecon(BaseModel):
         self.amount_collected = ccam_balance.amount_collected
         self.amount_owed = ccam_balance.amount_owed
 
-    def mark_paid(self) -> float:
+    def mark_paid(self) -> Money:
         """
         pay off a case
 
@@ -71,5 +69,5 @@ class BalanceRecon(BaseModel):
         """
         self.amount_collected = self.amount_assessed
         overpayment = abs(self.amount_owed)
-        self.amount_owed = 0
+        self.amount_owed = Money(0)
         return overpayment
@@ -0,0 +1,155 @@
+"""
+Lightweight objects used while a check is processed. Input is validated once when a payee is read
+from the check or a case is read from the network share. Attributes are not revalidated as payments
+are applied, and amounts are converted to Decimal when results are written to the database or the
+CCAM upload file.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+from SCCM.schemas.money import Money
+from SCCM.schemas.prisoner_schema import PrisonerBase
+
+# same pattern as CaseBase.ecf_case_num
+ECF_CASE_NUM = re.compile(r'[0-9][0-9]-[CV][CV]-[0-9]+$')
+
+
+@dataclass(slots=True)
+class CaseBalance:
+    """
+    Tracks case balance information. Equivalent to schemas.balance.Balance
+    """
+    amount_assessed: Money = field(default_factory=Money)
+    amount_collected: Money = field(default_factory=Money)
+    amount_owed: Money = field(default_factory=Money)
+
+    def add_ccam_balances(self, ccam_balance) -> None:
+        """
+        Add balances from CCAM to case
+
+        :param ccam_balance: CCAM balance
+        """
+        self.amount_assessed = Money(ccam_balance['Total Owed'])
+        self.amount_collected = Money(ccam_balance['Total Collected'])
+        self.amount_owed = Money(ccam_balance['Total Outstanding'])
+
+    def mark_paid(self) -> Money:
+        """
+        pay off a case
+
+        :return: overpayment amount
+        """
+        self.amount_collected = self.amount_assessed
+        overpayment = abs(self.amount_owed)
+        self.amount_owed = Money(0)
+        return overpayment
+
+
+@dataclass(slots=True)
+class Transaction:
+    """
+    Payment applied to a case. Equivalent to schemas.transaction_schema.TransactionCreate
+    """
+    check_number: int
+    amount_paid: Money
+
+
+@dataclass(slots=True, eq=False)
+class Case:
+    """
+    Case of a payee. Cases read from the database also carry their id and stored balances
+    """
+    ecf_case_num: str
+    case_comment: str
+    acct_cd: str | None = None
+    ccam_case_num: str | None = None
+    case_party_number: str | None = None
+    balance: CaseBalance | None = None
+    transaction: Transaction | None = None
+    id: int | None = None
+    prisoner_id: int | None = None
+    amount_assessed: Money | None = None
+    amount_collected: Money | None = None
+    amount_owed: Money | None = None
+
+    @classmethod
+    def from_directory(cls, directory_name: str) -> Case:
+        """
+        Creates an active case from a case directory on the network share. Directories of cases with
+        multiple prisoners end with the party number
+
+        :param directory_name: case directory name, e.g. 21-cv-12 or 21-cv-12-2
+        :return: active case
+        """
+        ecf_case_num = directory_name.upper()
+        if ECF_CASE_NUM.match(ecf_case_num):
+            return cls(ecf_case_num=ecf_case_num, case_comment='ACTIVE')
+        str_split = ecf_case_num.split('-')
+        ecf_case_num = '-'.join(str_split[0:3])
+        if not ECF_CASE_NUM.match(ecf_case_num):
+            raise ValueError(f'{directory_name} is not a case number')
+        return cls(ecf_case_num=ecf_case_num, case_comment='ACTIVE',
+                   case_party_number=str_split[-1])
+
+    @classmethod
+    def from_orm(cls, case_orm) -> Case:
+        """
+        :param case_orm: CourtCase database object
+        :return: case with the stored balances
+        """
+        return cls(ecf_case_num=case_orm.ecf_case_num, case_comment=case_orm.case_comment,
+                   acct_cd=case_orm.acct_cd, ccam_case_num=case_orm.ccam_case_num, id=case_orm.id,
+                   prisoner_id=case_orm.prisoner_id,
+                   amount_assessed=Money(case_orm.amount_assessed),
+                   amount_collected=Money(case_orm.amount_collected),
+                   amount_owed=Money(case_orm.amount_owed))
+
+
+@dataclass(slots=True, eq=False)
+class Payee:
+    """
+    Prisoner paid on a check. Equivalent to schemas.prisoner_schema.PrisonerCreate for new prisoners
+    and PrisonerModel for prisoners that exist in the database
+    """
+    doc_number: int
+    legal_name: str
+    amount_paid: Money
+    exists: bool = False
+    id: int | None = None
+    judgment_name: str | None = None
+    vendor_code: str | None = None
+    cases_list: list[Case] = field(default_factory=list)
+    search_dir: str | None = None
+    case_search_dir: str | None = None
+    paid_cases_list: list[Case] = field(default_factory=list)
+    overpayment: dict | None = None
+    refund: Money | None = None
+
+    @classmethod
+    def from_check(cls, doc_number, legal_name, amount) -> Payee:
+        """
+        Validates a payee read from a state check
+
+        :param doc_number: DOC number of the payee
+        :param legal_name: name of the payee
+        :param amount: total paid to the payee
+        :return: payee
+        """
+        p = PrisonerBase(doc_number=doc_number, legal_name=legal_name, amount_paid=amount)
+        return cls(doc_number=p.doc_number, legal_name=p.legal_name, amount_paid=p.amount_paid)
+
+    @classmethod
+    def from_orm(cls, prisoner_orm, amount_paid: Money) -> Payee:
+        """
+        Creates a payee for a prisoner that exists in the database
+
+        :param prisoner_orm: Prisoner database object with its active cases loaded
+        :param amount_paid: amount paid to the prisoner on the check
+        :return: payee with the prisoner's cases
+        """
+        return cls(doc_number=prisoner_orm.doc_number, legal_name=prisoner_orm.legal_name,
+                   amount_paid=amount_paid, exists=True, id=prisoner_orm.id,
+                   judgment_name=prisoner_orm.judgment_name, vendor_code=prisoner_orm.vendor_code,
+                   cases_list=[Case.from_orm(case) for case in prisoner_orm.cases_list])
@@ -0,0 +1,138 @@
+"""
+Exact money amounts stored as integer cents
+"""
+import operator
+from decimal import ROUND_HALF_UP, Decimal
+
+ONE = Decimal(1)
+
+
+def _to_cents(amount) -> int:
+    """
+    Converts a dollar amount to integer cents, rounding half cents up
+
+    :param amount: dollar amount as Money, Decimal, int, float or str
+    :return: amount in cents
+    """
+    if isinstance(amount, Money):
+        return amount.cents
+    if isinstance(amount, int) and not isinstance(amount, bool):
+        return amount * 100
+    if not isinstance(amount, (Decimal, str)):
+        # str keeps floats and numpy scalars at their shortest representation, e.g. 91.28 rather
+        # than 91.2799...
+        amount = str(amount)
+    return int((Decimal(amount) * 100).quantize(ONE, ROUND_HALF_UP))
+
+
+class Money:
+    """
+    A dollar amount held as integer cents. Arithmetic between amounts is exact and never needs
+    quantizing; Decimal, int and float operands are treated as dollars. Amounts compare only with
+    Money, Decimal and int. Convert to Decimal with to_decimal when writing to the database or a
+    spreadsheet.
+
+    """
+    __slots__ = ('cents',)
+
+    def __init__(self, amount=0):
+        """
+        :param amount: dollar amount as Money, Decimal, int, float or str
+        """
+        self.cents = _to_cents(amount)
+
+    @classmethod
+    def from_cents(cls, cents: int) -> 'Money':
+        money = cls.__new__(cls)
+        money.cents = int(cents)
+        return money
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, value) -> 'Money':
+        if isinstance(value, cls):
+            return value
+        return cls(value)
+
+    def to_decimal(self) -> Decimal:
+        """
+        :return: amount in dollars with two decimal places
+        """
+        return Decimal(self.cents).scaleb(-2)
+
+    def __reduce__(self):
+        return Money.from_cents, (self.cents,)
+
+    def __add__(self, other):
+        try:
+            return Money.from_cents(self.cents + _to_cents(other))
+        except (TypeError, ArithmeticError, ValueError):
+            return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        try:
+            return Money.from_cents(self.cents - _to_cents(other))
+        except (TypeError, ArithmeticError, ValueError):
+            return NotImplemented
+
+    def __rsub__(self, other):
+        try:
+            return Money.from_cents(_to_cents(other) - self.cents)
+        except (TypeError, ArithmeticError, ValueError):
+            return NotImplemented
+
+    def __neg__(self):
+        return Money.from_cents(-self.cents)
+
+    def __abs__(self):
+        return Money.from_cents(abs(self.cents))
+
+    def _compare(self, other, op):
+        # amounts are compared exactly, without rounding the other operand to cents, so amounts that
+        # compare equal have equal hashes
+        if isinstance(other, Money):
+            return op(self.cents, other.cents)
+        if isinstance(other, int) and not isinstance(other, bool):
+            return op(self.cents, other * 100)
+        if isinstance(other, Decimal):
+            return op(self.to_decimal(), other)
+        return NotImplemented
+
+    def __eq__(self, other):
+        return self._compare(other, operator.eq)
+
+    def __lt__(self, other):
+        return self._compare(other, operator.lt)
+
+    def __le__(self, other):
+        return self._compare(other, operator.le)
+
+    def __gt__(self, other):
+        return self._compare(other, operator.gt)
+
+    def __ge__(self, other):
+        return self._compare(other, operator.ge)
+
+    def __hash__(self):
+        # hash of the exact dollar amount, which int and Decimal amounts that compare equal share
+        return hash(self.to_decimal())
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def __float__(self):
+        return self.cents / 100
+
+    def __str__(self):
+        return str(self.to_decimal())
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def __format__(self, format_spec):
+        return format(self.to_decimal(), format_spec)
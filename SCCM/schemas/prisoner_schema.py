@@ -1,37 +1,37 @@
-from typing import Optional, List
-from decimal import Decimal
 from pydantic import BaseModel
+
 from SCCM.schemas.case_schema import CaseModel
+from SCCM.schemas.money import Money
 
 
 class PrisonerBase(BaseModel):
     doc_number: int
     legal_name: str
-    amount_paid: Decimal
+    amount_paid: Money
     exists: bool = False
 
 
 class PrisonerCreate(PrisonerBase):
-    judgment_name: Optional[str] = None
-    vendor_code: Optional[str] = None
-    cases_list: Optional[List[CaseModel]] = []
-    search_dir: Optional[str] = None
-    case_search_dir: Optional[str] = None
-    paid_cases_list: Optional[List[CaseModel]] = []
+    judgment_name: str | None = None
+    vendor_code: str | None = None
+    cases_list: list[CaseModel] | None = []
+    search_dir: str | None = None
+    case_search_dir: str | None = None
+    paid_cases_list: list[CaseModel] | None = []
     overpayment: str = None
-    refund: Optional[Decimal] = None
+    refund: Money | None = None
 
 
 class PrisonerModel(BaseModel):
     id: int
     legal_name: str
-    amount_paid: Decimal = None
+    amount_paid: Money = None
     doc_number: int
     judgment_name: str
     vendor_code: str
-    cases_list: Optional[List[CaseModel]] = []
+    cases_list: list[CaseModel] | None = []
     overpayment: str = None
-    refund: Decimal = None
+    refund: Money = None
     exists: bool = True
 
     class Config:
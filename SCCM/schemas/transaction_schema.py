@@ -1,12 +1,13 @@
-from typing import Optional, List
-from decimal import Decimal
 from datetime import datetime
+
 from pydantic import BaseModel
 
+from SCCM.schemas.money import Money
+
 
 class TransactionBase(BaseModel):
     check_number: int
-    amount_paid: Decimal
+    amount_paid: Money
 
 
 class TransactionCreate(TransactionBase):
@@ -16,7 +17,7 @@ class TransactionCreate(TransactionBase):
 class TransactionModel(TransactionBase):
     id: int
     created_date: datetime
-    amount_paid: Decimal
+    amount_paid: Money
 
     class Config:
         orm_mode = True
@@ -1,25 +1,24 @@
+import asyncio
 import functools
-import ssl
-from functools import wraps
 import json
+import ssl
 import time
+from functools import wraps
 from pathlib import Path
-from typing import Callable, Any, Optional
-import asyncio
+
 import aiohttp
 import backoff
 from aiohttp import ClientSession
+from aiolimiter import AsyncLimiter
 from colorama import Fore
-import pandas as pd
 
-from SCCM.config.config_model import PLRASettings
-from util import settings
-
-env_file = Path.cwd() / 'config' / 'dev.env'
-settings = PLRASettings(_env_file=env_file, _env_file_encoding='utf-8')
+from SCCM.config.config_model import PLRASettings, get_settings
+from SCCM.services.ccam_cache import CCAMCache
 
 
 def backoff_hdlr(details):
+    # the first argument of a retried AsyncHttpClient method is the client
+    details['args'][0].retries += 1
     print(Fore.RED + "Backing off {wait:0.1f} seconds after {tries} tries "
                      "calling function {target} with args {args} and kwargs "
                      "{kwargs}".format(**details))
@@ -27,9 +26,18 @@ def backoff_hdlr(details):
 
 class AsyncHttpClient:
     session: aiohttp.ClientSession = None
+    rest = '/ccam/v1/Accounts'
+    page_size = 200
+
+    def __init__(self, cache: CCAMCache = None, settings: PLRASettings = None):
+        self.cache = cache
+        self.settings = settings or get_settings()
+        # requests retried after a client error, counted by backoff_hdlr
+        self.retries = 0
 
     async def start(self):
-        MAX_CONCURRENT = 10
+        settings = self.settings
+        MAX_CONCURRENT = settings.ccam_max_concurrency
         connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT)
         auth = aiohttp.BasicAuth(settings.ccam_username,
                                  password=settings.ccam_password.get_secret_value(),
@@ -37,38 +45,75 @@ class AsyncHttpClient:
 
         self.session = aiohttp.ClientSession(base_url=settings.base_url, connector=connector, auth=auth,
                                              raise_for_status=True)
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+        self.limiter = AsyncLimiter(settings.ccam_requests_per_second, 1)
+        self.ssl_context = ssl.create_default_context(cafile=settings.cert_file)
 
     async def stop(self):
         await self.session.close()
         self.session = None
 
     @backoff.on_exception(backoff.expo, aiohttp.ClientError, max_tries=4, on_backoff=backoff_hdlr)
-    async def get_CCAM_balances_async(self, case_list):
+    async def _get_page(self, case_list: dict, page: int) -> dict:
+        """
+        Retrieves a single page of CCAM balances
+
+        :param case_list: request body with the list of case numbers
+        :param page: page number to retrieve
+        :return: parsed response body
+        """
         timeout = aiohttp.ClientTimeout(total=5 * 60)
         headers = {'Content-Type': 'application/json'}
-        rest = '/ccam/v1/Accounts'
-        ssl_context = ssl.create_default_context(cafile=settings.cert_file)
-        case_list["page"] = 1
-        case_list["size"] = 200
-        print(Fore.BLUE + f'Retrieving Page {case_list["page"]} of CCAM Balances \n')
-        async with self.session.post(
-                rest,
-                timeout=timeout,
-                headers=headers,
-                json=case_list,
-                ssl=ssl_context) as response:
-            # response.raise_for_status()
-            res = await response.read()
-            ccam_data = json.loads(res)['data']
-
-        while json.loads(res)['meta']['pageInfo']['last'] is False:
-            case_list["page"] = json.loads(res)['meta']['pageInfo']['number'] + 1
-            print(Fore.BLUE + f'Retrieving Page {case_list["page"]} of CCAM Balances \n')
-            async with self.session.post(rest, timeout=timeout, headers=headers, json=case_list,
-                                        ssl=ssl_context) as response:
-                response.raise_for_status()
+        payload = {**case_list, 'page': page, 'size': self.page_size}
+        async with self.semaphore, self.limiter:
+            print(Fore.BLUE + f'Retrieving Page {page} of CCAM Balances \n')
+            async with self.session.post(
+                    self.rest,
+                    timeout=timeout,
+                    headers=headers,
+                    json=payload,
+                    ssl=self.ssl_context) as response:
                 res = await response.read()
-                ccam_data.extend(json.loads(res)['data'])
+        return json.loads(res)
+
+    async def get_CCAM_balances_async(self, case_list, concurrent=False, check_number=None):
+        """
+        Retrieves CCAM balances for a list of cases across all pages. Cases found in the cache are
+        not requested
+
+        :param case_list: request body with the list of case numbers
+        :param concurrent: when True, read the total page count from the first page and retrieve the
+            remaining pages concurrently
+        :param check_number: state check the cases are retrieved for. Recorded in the cache
+        :return: list of CCAM account lines
+        """
+        if self.cache is None:
+            return await self._get_all_pages(case_list, concurrent)
+
+        cached, missing = self.cache.get_many(case_list['caseNumberList'])
+        ccam_data = [line for lines in cached.values() for line in lines]
+        if missing:
+            fetched = await self._get_all_pages({**case_list, 'caseNumberList': missing},
+                                                concurrent)
+            self.cache.put_many(missing, fetched, check_number)
+            ccam_data.extend(fetched)
+        return ccam_data
+
+    async def _get_all_pages(self, case_list, concurrent):
+        response = await self._get_page(case_list, 1)
+        ccam_data = response['data']
+
+        if concurrent:
+            total_pages = response['meta']['pageInfo']['totalPages']
+            pages = await asyncio.gather(*(self._get_page(case_list, page)
+                                           for page in range(2, total_pages + 1)))
+            for page in pages:
+                ccam_data.extend(page['data'])
+            return ccam_data
+
+        while response['meta']['pageInfo']['last'] is False:
+            response = await self._get_page(case_list, response['meta']['pageInfo']['number'] + 1)
+            ccam_data.extend(response['data'])
         return ccam_data
 
     def __call__(self) -> aiohttp.ClientSession:
@@ -0,0 +1,121 @@
+"""
+Lists case directories of prisoner folders on the network share and filters out inactive cases
+"""
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from SCCM.schemas.domain import Case
+
+
+def compile_case_filter(filter_list) -> re.Pattern | None:
+    """
+    Combines the CaseFilter strings into one pattern
+
+    :param filter_list: strings that mark a case directory as inactive
+    :return: pattern that finds any of the strings in a directory name, or None if there are no
+        strings
+    """
+    if not filter_list:
+        return None
+    return re.compile('|'.join(re.escape(s) for s in filter_list))
+
+
+def select_new_active_cases(cases: list[str], known_cases: set,
+                            case_filter: re.Pattern | None) -> list[Case]:
+    """
+    :param cases: case directory names of a prisoner
+    :param known_cases: upper case ECF case numbers already in the database, active or paid
+    :param case_filter: pattern from compile_case_filter
+    :return: active cases of the directories that are not filtered and whose ECF case number is not
+        known, sorted by directory name
+    """
+    active_cases = (Case.from_directory(case) for case in sorted(cases)
+                    if not (case_filter and case_filter.search(case)))
+    return [case for case in active_cases if case.ecf_case_num not in known_cases]
+
+
+class CaseDirectoryIndex:
+    """
+    Lists prisoner folders on the network share concurrently and keeps the case directories in
+    memory for the run. Listings can be persisted to a snapshot file and are reused on the next run
+    if the folder modification time is unchanged.
+
+    """
+
+    def __init__(self, snapshot_file: str | None = None, max_workers: int = 16):
+        """
+        :param snapshot_file: optional JSON file used to persist folder listings between runs
+        :param max_workers: number of threads used to list folders
+        """
+        self.snapshot_file = snapshot_file
+        self.max_workers = max_workers
+        self._directories = {}
+        self._snapshot = {}
+        if snapshot_file and os.path.exists(snapshot_file):
+            with open(snapshot_file) as f:
+                self._snapshot = json.load(f)
+
+    def _list(self, prisoner_dir: str) -> tuple[float, list[str]]:
+        mtime = os.stat(prisoner_dir).st_mtime
+        cached = self._snapshot.get(prisoner_dir)
+        if cached and cached['mtime'] == mtime:
+            return mtime, cached['cases']
+        with os.scandir(prisoner_dir) as entries:
+            return mtime, [entry.name for entry in entries if entry.is_dir()]
+
+    def _store(self, prisoner_dir: str, mtime: float, cases: list[str]) -> None:
+        self._snapshot[prisoner_dir] = {'mtime': mtime, 'cases': cases}
+        self._directories[prisoner_dir] = cases
+
+    def scan(self, prisoner_dirs: list[str]) -> None:
+        """
+        Lists every prisoner folder that has not been listed in this run. Folders that cannot be
+        listed are skipped and raise their error when requested from case_directories
+
+        :param prisoner_dirs: prisoner folders on the network share
+        """
+        pending = [d for d in dict.fromkeys(prisoner_dirs) if d and d not in self._directories]
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+            listings = [(prisoner_dir, executor.submit(self._list, prisoner_dir))
+                        for prisoner_dir in pending]
+            for prisoner_dir, listing in listings:
+                try:
+                    self._store(prisoner_dir, *listing.result())
+                except OSError:
+                    continue
+
+    def case_directories(self, prisoner_dir: str) -> list[str]:
+        """
+        :param prisoner_dir: prisoner folder on the network share
+        :return: names of the case directories in the folder
+        """
+        if prisoner_dir not in self._directories:
+            self._store(prisoner_dir, *self._list(prisoner_dir))
+        return self._directories[prisoner_dir]
+
+    @property
+    def snapshot(self) -> dict:
+        """
+        Folder listings written by save_snapshot
+        """
+        return self._snapshot
+
+    def merge_snapshot(self, snapshot: dict) -> None:
+        """
+        Adds folder listings collected by another index, such as one used in a worker process
+
+        :param snapshot: folder listings from CaseDirectoryIndex.snapshot
+        """
+        self._snapshot.update(snapshot)
+
+    def save_snapshot(self) -> None:
+        """
+        Persists folder listings to the snapshot file
+        """
+        if self.snapshot_file:
+            with open(self.snapshot_file, 'w') as f:
+                json.dump(self._snapshot, f)
@@ -1,85 +1,71 @@
-import os
-from decimal import Decimal, ROUND_HALF_UP
+from SCCM.schemas.domain import CaseBalance
+from SCCM.services.case_discovery import CaseDirectoryIndex, select_new_active_cases
 
-import pydantic.errors
-import SCCM.schemas.case_schema as cs
-from SCCM.schemas.balance import Balance
 
-
-def get_prisoner_case_numbers(p, filter_list, prisonerOrm):
+def get_prisoner_case_numbers(p, case_filter, prisonerOrm, case_index: CaseDirectoryIndex = None):
     """
     Identifies active cases for prisoner. Retrieves from network share
 
-    :return: oldest active case
+    :param p: payee with the prisoner folder in case_search_dir
+    :param case_filter: pattern from case_discovery.compile_case_filter
+    :param prisonerOrm: prisoner database object or None for a new prisoner
+    :param case_index: folder listings for the run. The folder is listed directly if not provided
+    :return: payee with new active cases added to cases_list
     """
     print(f'Getting new cases for {p.legal_name} from network share')
-    if prisonerOrm:
-        active_cases, cases = get_cases_from_network_directory(p, prisonerOrm.cases_list)
-    else:
-        active_cases, cases = get_cases_from_network_directory(p, None)
-    active_cases = identify_new_active_cases(active_cases, cases, filter_list)
-    #  check if any cases in the active cases list are found in p.paid_cases_list ecf_case_num and remove them from the active cases list
-    active_cases = filter_paid_cases(active_cases, prisonerOrm)
-
-    for c in active_cases:
-        try:
-            p.cases_list.append(cs.CaseCreate(
-                ecf_case_num=str.upper(c),
-                case_comment='ACTIVE')
-            )
-
-        # special processing for cases for multiple prisoner cases
-        except pydantic.ValidationError:
-            str_split = c.split('-')
-            case_party_number = str_split[-1]
-            ecf_case_num = "-".join(str_split[0:3])
-            p.cases_list.append(cs.CaseCreate(
-                ecf_case_num=str.upper(ecf_case_num),
-                case_comment='ACTIVE',
-                case_party_number=case_party_number
-            ))
-    return p
+    if case_index is None:
+        case_index = CaseDirectoryIndex()
+    cases = case_index.case_directories(p.case_search_dir)
 
-
-def filter_paid_cases(active_cases, prisonerOrm):
+    # cases already in the database, including paid cases, are not new
+    known_cases = set()
     if prisonerOrm:
-        if prisonerOrm.paid_cases:
-            for case in prisonerOrm.paid_cases:
-                if case.ecf_case_num in active_cases:
-                    active_cases.remove(case.ecf_case_num)
-    return active_cases
-
-
-def identify_new_active_cases(active_cases, cases, filter_list):
-    for case in cases:
-        if any(s in case for s in filter_list):
-            active_cases.remove(case)
-    active_cases.sort()
-    return active_cases
-
-
-def get_cases_from_network_directory(p, current_active_cases):
-    cases = [f.name for f in os.scandir(p.case_search_dir) if f.is_dir()]
-    active_cases = cases[:]
-    if current_active_cases:
-        for case in current_active_cases:
-            if case.ecf_case_num in active_cases:
-                active_cases.remove(case.ecf_case_num)
-    return active_cases, cases
+        known_cases.update(case.ecf_case_num.upper() for case in prisonerOrm.cases_list)
+        known_cases.update(case.ecf_case_num.upper() for case in prisonerOrm.paid_cases or [])
+    p.cases_list.extend(select_new_active_cases(cases, known_cases, case_filter))
+    return p
 
 
-def initialize_balances(case, cases_dict, ccam_summary_balance, cents):
-    case.balance = Balance()
+def initialize_balances(case, cases_dict, ccam_summary_balance):
+    case.balance = CaseBalance()
     balance_key = cases_dict[case.ecf_case_num].split('-')[0]
     case.acct_cd = ccam_summary_balance.loc[balance_key]['acct_cd']
     case.ccam_case_num = cases_dict[case.ecf_case_num]
     ccam_balance = ccam_summary_balance.loc[balance_key].to_dict()
-    case.balance.amount_assessed = Decimal(ccam_balance['Total Owed']).quantize(cents,
-                                                                                ROUND_HALF_UP)
-    case.balance.amount_collected = Decimal(ccam_balance['Total Collected']).quantize(cents,
-                                                                                      ROUND_HALF_UP)
-    case.balance.amount_owed = Decimal(ccam_balance['Total Outstanding']).quantize(cents,
-                                                                                   ROUND_HALF_UP)
+    case.balance.add_ccam_balances(ccam_balance)
     if case.balance.amount_owed <= 0:
         case.case_comment = 'PAID'
     return case
+
+
+def get_party_code(cases_dict, ccam_summary_balance):
+    """
+    Retrieves the CCAM party code for a prisoner from the balances of their cases
+
+    :param cases_dict: dictionary of ECF case numbers to CCAM formatted case numbers
+    :param ccam_summary_balance: CCAM balances indexed by case number
+    :return: party code or None if no case balances were found
+    """
+    for ccam_case_num in cases_dict.values():
+        balance_key = ccam_case_num.split('-')[0]
+        if balance_key in ccam_summary_balance.index:
+            return ccam_summary_balance.loc[balance_key]['prty_cd']
+    return None
+
+
+def format_case_num(case):
+    """
+    Identifies and formats case numbers for JIFMS lookup
+    :param case: prisoner case number
+    :return: CCAM formatted case number
+    """
+    case_num_split = str.split(case.ecf_case_num, '-')
+    # Check if multi-defendant case
+
+    case_num = f"DWIW3{case_num_split[0]}{case_num_split[1]}{case_num_split[2].zfill(6)}"
+    if case.case_party_number:
+        formatted_case_num = f"{case_num}-{case.case_party_number}"
+        return formatted_case_num
+    else:
+        formatted_case_num = f"{case_num}-001"
+        return formatted_case_num
@@ -0,0 +1,133 @@
+"""
+Local cache of CCAM account lines keyed by CCAM case number without the party suffix
+"""
+import json
+import sqlite3
+import time
+from collections import defaultdict
+
+from colorama import Fore
+
+
+def case_prefix(case_number: str) -> str:
+    """
+    :param case_number: CCAM formatted case number, e.g. DWIW321CV000012-001
+    :return: case number without the party suffix, as CCAM returns it in the case_num of each
+        account line
+    """
+    return case_number.split('-')[0]
+
+
+def print_cache_statistics(hits: int, misses: int) -> None:
+    """
+    :param hits: cases found in the cache
+    :param misses: cases requested from CCAM
+    """
+    print(Fore.YELLOW + f'CCAM cache: {hits} hits, {misses} misses')
+
+
+class CCAMCache:
+    """
+    Stores CCAM account lines in a local SQLite file so that reruns of a check do not request
+    balances that were just retrieved from the API. CCAM returns the lines of every party on a case,
+    so lines are stored once per case number without the party suffix and the parties of a case
+    share them
+
+    """
+
+    def __init__(self, cache_file: str, ttl: int):
+        """
+        :param cache_file: path of the local SQLite cache file
+        :param ttl: number of seconds a cached case remains valid. A value of 0 disables the cache
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(cache_file)
+        with self.conn:
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS ccam_account_lines(
+                                    ccam_case_num TEXT PRIMARY KEY,
+                                    check_number INTEGER,
+                                    fetched_at REAL NOT NULL,
+                                    lines TEXT NOT NULL
+                                 )""")
+
+    def get_many(self, case_numbers: list[str]) -> tuple[dict[str, list[dict]], list[str]]:
+        """
+        Retrieves cached account lines for a list of cases
+
+        :param case_numbers: CCAM formatted case numbers
+        :return: dictionary of cached account lines by case number without the party suffix, so each
+            line appears once, and a list of case numbers not in the cache
+        """
+        if isinstance(case_numbers, str):
+            case_numbers = [case_numbers]
+        case_numbers = list(dict.fromkeys(case_numbers))
+        prefixes = list(dict.fromkeys(case_prefix(case_num) for case_num in case_numbers))
+        cached = {}
+        if self.ttl > 0 and prefixes:
+            oldest = time.time() - self.ttl
+            placeholders = ','.join('?' * len(prefixes))
+            rows = self.conn.execute(f'SELECT ccam_case_num, lines FROM ccam_account_lines '
+                                     f'WHERE fetched_at >= ? AND ccam_case_num IN ({placeholders})',
+                                     [oldest, *prefixes])
+            cached = {case_num: json.loads(lines) for case_num, lines in rows}
+        missing = [case_num for case_num in case_numbers if case_prefix(case_num) not in cached]
+        self.hits += len(case_numbers) - len(missing)
+        self.misses += len(missing)
+        return cached, missing
+
+    def put_many(self, case_numbers: list[str], ccam_data: list[dict],
+                 check_number: int | None = None) -> None:
+        """
+        Stores account lines returned by CCAM for each requested case. Cases without account lines
+        are stored as empty so they are not requested again until they expire
+
+        :param case_numbers: CCAM formatted case numbers that were requested
+        :param ccam_data: account lines returned by CCAM
+        :param check_number: state check the cases were retrieved for
+        """
+        if self.ttl <= 0:
+            return
+        if isinstance(case_numbers, str):
+            case_numbers = [case_numbers]
+        lines_by_case = defaultdict(list)
+        for line in ccam_data:
+            lines_by_case[line['case_num']].append(line)
+        fetched_at = time.time()
+        prefixes = dict.fromkeys(case_prefix(case_num) for case_num in case_numbers)
+        rows = [(prefix, check_number, fetched_at, json.dumps(lines_by_case[prefix]))
+                for prefix in prefixes]
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO ccam_account_lines VALUES (?,?,?,?)',
+                                  rows)
+
+    def invalidate(self, case_numbers: list[str] | None = None,
+                   check_number: int | None = None) -> int:
+        """
+        Removes cases from the cache. Removes every case if no case numbers or check number are
+        provided
+
+        :param case_numbers: CCAM formatted case numbers to remove. Every party of each case is
+            removed
+        :param check_number: remove all cases retrieved for this state check
+        :return: number of cases removed
+        """
+        with self.conn:
+            if case_numbers:
+                prefixes = list(dict.fromkeys(case_prefix(case_num) for case_num in case_numbers))
+                placeholders = ','.join('?' * len(prefixes))
+                cursor = self.conn.execute('DELETE FROM ccam_account_lines '
+                                           f'WHERE ccam_case_num IN ({placeholders})', prefixes)
+            elif check_number is not None:
+                cursor = self.conn.execute('DELETE FROM ccam_account_lines WHERE check_number = ?',
+                                           (check_number,))
+            else:
+                cursor = self.conn.execute('DELETE FROM ccam_account_lines')
+        return cursor.rowcount
+
+    def print_statistics(self) -> None:
+        print_cache_statistics(self.hits, self.misses)
+
+    def close(self) -> None:
+        self.conn.close()
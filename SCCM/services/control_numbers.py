@@ -0,0 +1,119 @@
+"""
+Allocates CCAM control numbers that are unique for each deposit number
+"""
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from SCCM.models.control_number_counter import ControlNumberCounter
+from SCCM.services.db_session import DbSession
+
+# upload files used random control numbers below 1000 before the counter table, so CCAM is known to
+# accept three digits. Settings can raise the limit with CCAM_MAX_CONTROL_NUMBER once a wider field
+# is confirmed with CCAM
+MAX_CONTROL_NUMBER = 999
+
+
+class ControlNumbersExhaustedError(RuntimeError):
+    """
+    Every control number of a deposit has been used
+    """
+
+
+def reserve_control_numbers(session, deposit_num: str, count: int, commit: bool = True,
+                            max_control_num: int = MAX_CONTROL_NUMBER) -> range:
+    """
+    Reserves a block of control numbers. The counter row is written before it is read, so SQLite
+    holds the write lock until the reservation is committed and concurrent callers receive separate
+    blocks. The block is shorter than count when it would pass max_control_num
+
+    :param session: database session
+    :param deposit_num: deposit number from payment_services.prepare_deposit_number
+    :param count: number of control numbers to reserve
+    :param commit: commit the reservation. Otherwise it is committed or rolled back with the
+        caller's transaction
+    :param max_control_num: highest control number of a deposit
+    :return: reserved control numbers
+    :raise ControlNumbersExhaustedError: if every control number of the deposit is used
+    """
+    try:
+        session.execute(insert(ControlNumberCounter).values(deposit_num=deposit_num,
+                                                            last_control_num=0)
+                        .on_conflict_do_nothing(index_elements=['deposit_num']))
+        session.execute(update(ControlNumberCounter)
+                        .where(ControlNumberCounter.deposit_num == deposit_num)
+                        .values(last_control_num=ControlNumberCounter.last_control_num + count))
+        last = session.execute(select(ControlNumberCounter.last_control_num)
+                               .where(ControlNumberCounter.deposit_num == deposit_num)).scalar_one()
+        first = last - count + 1
+        if first > max_control_num:
+            raise ControlNumbersExhaustedError(f'All {max_control_num} control numbers of deposit '
+                                               f'{deposit_num} are used')
+        if last > max_control_num:
+            last = max_control_num
+            session.execute(update(ControlNumberCounter)
+                            .where(ControlNumberCounter.deposit_num == deposit_num)
+                            .values(last_control_num=last))
+        if commit:
+            session.commit()
+    except Exception:
+        if commit:
+            session.rollback()
+        raise
+    return range(first, last + 1)
+
+
+class ControlNumberAllocator:
+    """
+    Iterator of control numbers for one deposit number. Numbers are taken from blocks reserved in
+    the control_number_counters table, so a payee on several checks deposited the same day never
+    gets a duplicate number.
+
+    The counters are only as shared as the database they are in. Runs on separate working copies
+    (DB_WORKING_COPY) reserve from separate counters and can hand out the same numbers. Only one of
+    them can publish, so the upload files of a run that fails with PublishConflictError must be
+    discarded and the checks processed again
+
+    """
+
+    def __init__(self, deposit_num: str, block_size: int = 100, session_factory=None, session=None,
+                 max_control_num: int = MAX_CONTROL_NUMBER):
+        """
+        :param deposit_num: deposit number from payment_services.prepare_deposit_number
+        :param block_size: number of control numbers reserved per database round trip
+        :param session_factory: session factory for reservations committed on their own,
+            DbSession.factory if not given
+        :param session: session of a transaction that is writing. Reservations are made in the
+            transaction and committed with it, since a second connection would wait for its write
+            lock
+        :param max_control_num: highest control number of a deposit. Iteration raises
+            ControlNumbersExhaustedError past it
+        """
+        self.deposit_num = deposit_num
+        self.block_size = max(1, block_size)
+        self.session_factory = session_factory or DbSession.factory
+        self.session = session
+        self.max_control_num = max_control_num
+        self._block = iter(())
+
+    def _reserve_block(self) -> None:
+        if self.session is not None:
+            self._block = iter(reserve_control_numbers(self.session, self.deposit_num,
+                                                       self.block_size, commit=False,
+                                                       max_control_num=self.max_control_num))
+            return
+        session = self.session_factory()
+        try:
+            self._block = iter(reserve_control_numbers(session, self.deposit_num, self.block_size,
+                                                       max_control_num=self.max_control_num))
+        finally:
+            session.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> int:
+        control_num = next(self._block, None)
+        if control_num is None:
+            self._reserve_block()
+            control_num = next(self._block)
+        return control_num
@@ -1,13 +1,18 @@
+from datetime import datetime
 from typing import List
 
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from SCCM.models import case_transaction, court_cases, prisoners
+from SCCM.models.case_reconciliation import CaseReconciliation
 from SCCM.models.court_cases import CourtCase
+from SCCM.models.prisoner_match import PrisonerMatch
 from SCCM.models.prisoners import Prisoner
+from SCCM.models.reconciliation_checkpoint import ReconciliationCheckpoint
 from SCCM.schemas import prisoner_schema
-from SCCM.models import prisoners
-from SCCM.models import court_cases
-from SCCM.models import case_transaction
 from SCCM.schemas.case_schema import CaseModel
 from SCCM.services.db_session import DbSession
 
@@ -32,9 +37,81 @@ def get_prisoner_with_active_case(doc_number: int, legal_name: str) -> Prisoner:
         db.close()
         return result
     else:
+        db.close()
         return None
 
 
+def get_prisoners_with_active_cases(doc_numbers: list[int], chunk_size: int = 500) -> dict:
+    """
+    Retrieves all payees on a check from the database with their cases and transactions in a few
+    queries
+
+    :param doc_numbers: DOC numbers of payees on a check
+    :param chunk_size: number of DOC numbers per query
+    :return: dictionary of prisoners keyed by DOC number. cases_list holds active cases and
+        paid_cases holds paid cases
+    """
+    print(f'Retrieving {len(doc_numbers)} payees from the database.\n')
+    doc_numbers = list(dict.fromkeys(doc_numbers))
+    prisoners_by_doc_number = {}
+    with DbSession.factory() as db:
+        for i in range(0, len(doc_numbers), chunk_size):
+            result = db.query(prisoners.Prisoner) \
+                .filter(prisoners.Prisoner.doc_number.in_(doc_numbers[i:i + chunk_size])) \
+                .options(selectinload(prisoners.Prisoner.cases_list)
+                         .selectinload(CourtCase.case_transactions)) \
+                .all()
+            for prisoner in result:
+                prisoners_by_doc_number[prisoner.doc_number] = prisoner
+
+    for prisoner in prisoners_by_doc_number.values():
+        prisoner.paid_cases = [case for case in prisoner.cases_list if case.case_comment == 'PAID']
+        # replace the loaded collection without recording a change so paid cases are not orphaned on
+        # a later commit
+        set_committed_value(prisoner, 'cases_list',
+                            [case for case in prisoner.cases_list if case.case_comment == 'ACTIVE'])
+    return prisoners_by_doc_number
+
+
+def get_prisoner_matches(doc_numbers: list[int]) -> dict:
+    """
+    Retrieves saved payee to directory matches
+
+    :param doc_numbers: DOC numbers of payees on a check
+    :return: dictionary of matches keyed by DOC number and legal name
+    """
+    db = DbSession.factory()
+    result = db.query(PrisonerMatch).filter(PrisonerMatch.doc_number.in_(doc_numbers)).all()
+    db.close()
+    return {(match.doc_number, match.legal_name): match for match in result}
+
+
+def save_prisoner_matches(matches: dict, stale_matches: list[tuple]) -> None:
+    """
+    Saves payee to directory matches and removes matches whose directory no longer exists
+
+    :param matches: dictionary of (judgment name, score) keyed by DOC number and legal name
+    :param stale_matches: DOC number and legal name of matches to remove
+    """
+    with Session(DbSession.engine) as session:
+        with session.begin():
+            for doc_number, legal_name in stale_matches:
+                session.query(PrisonerMatch).filter(PrisonerMatch.doc_number == doc_number,
+                                                    PrisonerMatch.legal_name == legal_name).delete()
+            if matches:
+                rows = [{'doc_number': doc_number, 'legal_name': legal_name,
+                         'judgment_name': judgment_name, 'score': score,
+                         'matched_date': datetime.now()}
+                        for (doc_number, legal_name), (judgment_name, score) in matches.items()]
+                stmt = insert(PrisonerMatch).values(rows)
+                excluded = stmt.excluded
+                stmt = stmt.on_conflict_do_update(index_elements=['doc_number', 'legal_name'],
+                                                  set_={'judgment_name': excluded.judgment_name,
+                                                        'score': excluded.score,
+                                                        'matched_date': excluded.matched_date})
+                session.execute(stmt)
+
+
 def add_cases_for_prisoner(db_prisoner: prisoners.Prisoner,
                            p: prisoner_schema.PrisonerCreate) -> prisoners.Prisoner:
     """
@@ -51,14 +128,14 @@ def add_cases_for_prisoner(db_prisoner: prisoners.Prisoner,
             ecf_case_num=case.ecf_case_num,
             ccam_case_num=case.ccam_case_num,
             case_comment=case.case_comment,
-            amount_assessed=case.balance.amount_assessed,
-            amount_collected=case.balance.amount_collected,
-            amount_owed=case.balance.amount_owed
+            amount_assessed=case.balance.amount_assessed.to_decimal(),
+            amount_collected=case.balance.amount_collected.to_decimal(),
+            amount_owed=case.balance.amount_owed.to_decimal()
         )
         if case.transaction:
             transaction = case_transaction.CaseTransaction(
                 check_number=case.transaction.check_number,
-                amount_paid=p.amount_paid
+                amount_paid=p.amount_paid.to_decimal()
             )
             new_case.case_transactions.append(transaction)
         # TODO - check for zero balance and marked PAID
@@ -66,21 +143,88 @@ def add_cases_for_prisoner(db_prisoner: prisoners.Prisoner,
     return db_prisoner
 
 
+def save_check_results(session: Session, prisoner_list: list) -> None:
+    """
+    Writes new prisoners and their cases, balance updates for existing cases and all transactions
+    for a check with executemany statements. The caller commits or rolls back the session
+
+    :param session: session holding the check transaction
+    :param prisoner_list: processed payees from the check
+    """
+    new_prisoners = [p for p in prisoner_list if not p.exists]
+    existing_prisoners = [p for p in prisoner_list if p.exists]
+    transaction_rows = []
+
+    if new_prisoners:
+        session.execute(insert(prisoners.Prisoner.__table__), [{
+            'doc_number': p.doc_number,
+            'judgment_name': p.judgment_name,
+            'legal_name': p.legal_name,
+            'vendor_code': p.vendor_code
+        } for p in new_prisoners])
+        prisoner_ids = dict(session.execute(
+            select(prisoners.Prisoner.doc_number, prisoners.Prisoner.id)
+            .where(prisoners.Prisoner.doc_number.in_([p.doc_number for p in new_prisoners]))).all())
+
+        case_rows = [{
+            'prisoner_id': prisoner_ids[p.doc_number],
+            'acct_cd': case.acct_cd,
+            'ecf_case_num': case.ecf_case_num,
+            'ccam_case_num': case.ccam_case_num,
+            'case_comment': case.case_comment,
+            'amount_assessed': case.balance.amount_assessed.to_decimal(),
+            'amount_collected': case.balance.amount_collected.to_decimal(),
+            'amount_owed': case.balance.amount_owed.to_decimal()
+        } for p in new_prisoners for case in p.cases_list]
+        if case_rows:
+            session.execute(insert(court_cases.CourtCase.__table__), case_rows)
+            new_cases = session.execute(
+                select(court_cases.CourtCase.prisoner_id, court_cases.CourtCase.ecf_case_num,
+                       court_cases.CourtCase.id)
+                .where(court_cases.CourtCase.prisoner_id.in_(prisoner_ids.values())))
+            case_ids = {(prisoner_id, ecf_case_num): case_id
+                        for prisoner_id, ecf_case_num, case_id in new_cases}
+            transaction_rows.extend({
+                'court_case_id': case_ids[(prisoner_ids[p.doc_number], case.ecf_case_num)],
+                'check_number': case.transaction.check_number,
+                'amount_paid': case.transaction.amount_paid.to_decimal()
+            } for p in new_prisoners for case in p.cases_list if case.transaction)
+
+    balance_rows = []
+    for p in existing_prisoners:
+        for case in p.cases_list:
+            if case.transaction:
+                balance_rows.append({'case_id': case.id,
+                                     'amount_collected': case.balance.amount_collected.to_decimal(),
+                                     'amount_owed': case.balance.amount_owed.to_decimal()})
+                transaction_rows.append({'court_case_id': case.id,
+                                         'check_number': case.transaction.check_number,
+                                         'amount_paid': case.transaction.amount_paid.to_decimal()})
+    if balance_rows:
+        case_table = court_cases.CourtCase.__table__
+        session.execute(update(case_table)
+                        .where(case_table.c.id == bindparam('case_id'))
+                        .values(amount_collected=bindparam('amount_collected'),
+                                amount_owed=bindparam('amount_owed')), balance_rows)
+    if transaction_rows:
+        session.execute(insert(case_transaction.CaseTransaction.__table__), transaction_rows)
+
+
 def update_case_balances(case: CaseModel, db_prisoner_list: List[Prisoner]):
     pris_index_loc = next(i for i, v in enumerate(db_prisoner_list) if v.id == case.prisoner_id)
     prisoner = db_prisoner_list[pris_index_loc]
     case_index_loc = next(i for i, v in enumerate(prisoner.cases_list) if v.id == case.id)
     case_db = prisoner.cases_list[case_index_loc]
 
-    case_db.amount_collected = case.balance.amount_collected
-    case_db.amount_owed = case.balance.amount_owed
+    case_db.amount_collected = case.balance.amount_collected.to_decimal()
+    case_db.amount_owed = case.balance.amount_owed.to_decimal()
     return case_db
 
 
 def update_case_transactions(case: CaseModel, case_db: CourtCase):
     case_db.case_transactions.append(case_transaction.CaseTransaction(
         check_number=case.transaction.check_number,
-        amount_paid=case.transaction.amount_paid
+        amount_paid=case.transaction.amount_paid.to_decimal()
     ))
     return case_db
 
@@ -96,3 +240,58 @@ def update_case_transactions(case: CaseModel, case_db: CourtCase):
 #             db_prisoner = add_cases_for_prisoner(db_prisoner, p)
 #             session.add(db_prisoner)
 #     db.commit()
+
+
+def get_active_case_balances(session: Session, after_case_id: int, limit: int) -> list:
+    """
+    Retrieves the next page of active cases ordered by id for reconciliation
+
+    :param session: database session
+    :param after_case_id: id of the last case in the previous page
+    :param limit: number of cases in the page. None retrieves every remaining case
+    :return: rows of case id, CCAM case number, balances and payee name
+    """
+    stmt = (select(CourtCase.id, CourtCase.ccam_case_num, CourtCase.ecf_case_num,
+                   CourtCase.amount_assessed,
+                   CourtCase.amount_collected, CourtCase.amount_owed, Prisoner.legal_name)
+            .join(Prisoner, CourtCase.prisoner_id == Prisoner.id)
+            .where(CourtCase.case_comment == 'ACTIVE', CourtCase.id > after_case_id)
+            .order_by(CourtCase.id)
+            .limit(limit))
+    return session.execute(stmt).all()
+
+
+def get_open_reconciliation_checkpoint(session: Session) -> ReconciliationCheckpoint:
+    """
+    Retrieves the checkpoint of the most recent chunked reconciliation that did not finish
+
+    :return: checkpoint or None if every reconciliation finished
+    """
+    return (session.query(ReconciliationCheckpoint)
+            .filter(ReconciliationCheckpoint.completed_date.is_(None))
+            .order_by(ReconciliationCheckpoint.id.desc())
+            .first())
+
+
+def save_reconciliation_batch(session: Session, reconciliation_rows: list[dict],
+                              balance_rows: list[dict]) -> None:
+    """
+    Writes reconciliation records and updated case balances for a batch with executemany statements.
+    The caller commits the batch together with its checkpoint
+
+    :param session: session holding the batch transaction
+    :param reconciliation_rows: CaseReconciliation column values
+    :param balance_rows: case_id, amount_assessed, amount_collected, amount_owed and case_comment
+        for each case
+    """
+    if reconciliation_rows:
+        session.execute(insert(CaseReconciliation.__table__), reconciliation_rows)
+    if balance_rows:
+        case_table = CourtCase.__table__
+        session.execute(update(case_table)
+                        .where(case_table.c.id == bindparam('case_id'))
+                        .values(amount_assessed=bindparam('amount_assessed'),
+                                amount_collected=bindparam('amount_collected'),
+                                amount_owed=bindparam('amount_owed'),
+                                case_comment=bindparam('case_comment'),
+                                balance_updated_date=datetime.now()), balance_rows)
@@ -1,55 +1,243 @@
+import gzip
+import json
 import os
+import shutil
 import sqlite3
-from SCCM.bin import get_files as gf
+import sys
 from datetime import datetime
 from pathlib import Path
 
+# pages copied in each backup step. SQLite pages are 4 KiB by default, so a step copies 16 MiB
+BACKUP_PAGES_PER_STEP = 4096
+MANIFEST_FILE = 'backup_manifest.json'
 
-def progress(remaining, total):
-    print(f'Copied {total - remaining} of {total} pages...')
+
+def progress_bar(label: str, width: int = 40):
+    """
+    :param label: text shown before the bar
+    :param width: number of characters in the bar
+    :return: progress callback for sqlite3.Connection.backup that redraws a single console line
+    """
+    def _progress(status, remaining, total):
+        done = total - remaining
+        filled = width * done // total if total else width
+        print(f'\r{label} [{"#" * filled}{"-" * (width - filled)}] {done}/{total} pages',
+              end='\n' if remaining == 0 else '', flush=True)
+    return _progress
 
 
-def prod_db_backup(original, destination):
-    db_orig = sqlite3.connect(original)
-    db_backup = sqlite3.connect(destination)
-    with db_backup:
-        db_orig.backup(db_backup, pages=1, progress=progress)
-    db_backup.close()
-    db_orig.close()
+def _default_progress(label: str):
+    # draw a bar only for an interactive console so logs are not filled with partial lines
+    return progress_bar(label) if sys.stdout.isatty() else None
 
 
-def prod_db_restore(db_file, backup_directory):
+def _copy_database(source, destination, pages: int, progress) -> None:
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(destination)
+    try:
+        with dst:
+            src.backup(dst, pages=pages, progress=progress)
+    finally:
+        dst.close()
+        src.close()
+
+
+def backup_database(source, destination, compress: bool = False, pages: int = BACKUP_PAGES_PER_STEP,
+                    progress=None) -> str:
+    """
+    Copies a database with the SQLite backup API in batches of pages. The backup is written to a
+    partial file and renamed when complete so an interrupted backup never looks like a valid one
+
+    :param source: database file
+    :param destination: backup file. .gz is appended when compressed
+    :param compress: gzip the backup
+    :param pages: pages copied in each step
+    :param progress: callback from progress_bar, or None for no progress output
+    :return: backup file
+    """
+    destination = str(destination)
+    if compress and not destination.endswith('.gz'):
+        destination = f'{destination}.gz'
+    partial = f'{destination}.partial'
+    try:
+        if compress:
+            copy = f'{partial}.sqlite'
+            try:
+                _copy_database(source, copy, pages, progress)
+                with open(copy, 'rb') as f, gzip.open(partial, 'wb', compresslevel=6) as gz:
+                    shutil.copyfileobj(f, gz, 1024 * 1024)
+            finally:
+                if os.path.exists(copy):
+                    os.remove(copy)
+        else:
+            _copy_database(source, partial, pages, progress)
+        os.replace(partial, destination)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return destination
+
+
+def restore_database(backup_file, db_file, pages: int = BACKUP_PAGES_PER_STEP,
+                     progress=None) -> None:
+    """
+    Replaces the contents of a database with a backup. The backup API writes the database in one
+    transaction, so other connections see either the old or the restored database
+
+    :param backup_file: plain or gzip compressed backup
+    :param db_file: database file to restore
+    :param pages: pages copied in each step
+    :param progress: callback from progress_bar, or None for no progress output
+    """
+    backup_file = str(backup_file)
+    if not backup_file.endswith('.gz'):
+        _copy_database(backup_file, db_file, pages, progress)
+        return
+    expanded = f'{db_file}.restore'
+    try:
+        with gzip.open(backup_file, 'rb') as gz, open(expanded, 'wb') as f:
+            shutil.copyfileobj(gz, f, 1024 * 1024)
+        _copy_database(expanded, db_file, pages, progress)
+    finally:
+        if os.path.exists(expanded):
+            os.remove(expanded)
+
+
+class BackupManifest:
+    """
+    Backups in a backup directory, keyed by label such as the check number. The manifest is a JSON
+    file in the backup directory
+
+    """
+
+    def __init__(self, backup_directory):
+        """
+        :param backup_directory: directory holding the backups and the manifest
+        """
+        self.backup_directory = Path(backup_directory)
+        self.manifest_file = self.backup_directory / MANIFEST_FILE
+        self.entries = {}
+        if self.manifest_file.exists():
+            with open(self.manifest_file) as f:
+                self.entries = json.load(f)
+
+    def _save(self) -> None:
+        partial = f'{self.manifest_file}.partial'
+        with open(partial, 'w') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(partial, self.manifest_file)
+
+    def path(self, label: str) -> Path:
+        """
+        :param label: backup label
+        :return: backup file of the entry
+        """
+        return self.backup_directory / self.entries[label]['file']
+
+    def add(self, label: str, backup_file, source) -> dict:
+        """
+        Records a backup
+
+        :param label: backup label
+        :param backup_file: backup file in the backup directory
+        :param source: database that was backed up
+        :return: manifest entry
+        """
+        self.entries[label] = {'file': os.path.basename(backup_file), 'source': str(source),
+                               'created': datetime.now().isoformat(),
+                               'size': os.path.getsize(backup_file),
+                               'compressed': str(backup_file).endswith('.gz')}
+        self._save()
+        return self.entries[label]
+
+    def newest_first(self) -> list[tuple[str, dict]]:
+        """
+        :return: label and entry of each backup, newest first
+        """
+        return sorted(self.entries.items(), key=lambda item: item[1]['created'], reverse=True)
+
+    def prune(self, retention: int) -> list[str]:
+        """
+        Deletes the oldest backups beyond the retention count
+
+        :param retention: number of backups kept. 0 keeps every backup
+        :return: labels of the deleted backups
+        """
+        if retention <= 0:
+            return []
+        pruned = [label for label, _ in self.newest_first()[retention:]]
+        for label in pruned:
+            backup_file = self.path(label)
+            if backup_file.exists():
+                backup_file.unlink()
+            del self.entries[label]
+        if pruned:
+            self._save()
+        return pruned
+
+
+def backup_once(db_file, backup_directory, label: str, compress: bool = False,
+                retention: int = 0) -> str:
+    """
+    Backs up a database unless a backup with the label exists, then prunes backups beyond the
+    retention count
+
+    :param db_file: database file
+    :param backup_directory: directory for backups
+    :param label: backup label such as the check number
+    :param compress: gzip the backup
+    :param retention: number of backups kept. 0 keeps every backup
+    :return: backup file
+    """
+    manifest = BackupManifest(backup_directory)
+    if label in manifest.entries and manifest.path(label).exists():
+        return str(manifest.path(label))
+    destination = Path(backup_directory) / f'{os.path.basename(db_file)}_{label}'
+    backup_file = backup_database(db_file, destination, compress,
+                                  progress=_default_progress(f'Backing up {label}'))
+    manifest.add(label, backup_file, db_file)
+    for pruned in manifest.prune(retention):
+        print(f'Removed backup {pruned}')
+    return backup_file
+
+
+def choose_backup(manifest: BackupManifest) -> str:
+    """
+    Lists the backups in the manifest and asks the user to choose one on the console
+
+    :param manifest: backup manifest
+    :return: label of the chosen backup
+    """
+    entries = manifest.newest_first()
+    if not entries:
+        raise ValueError(f'No backups are recorded in {manifest.manifest_file}')
+    for i, (label, entry) in enumerate(entries, start=1):
+        print(f'{i:>3}. {label:<28}{entry["created"][:19]:<22}{entry["file"]}')
+    choice = int(input('Backup to restore: '))
+    if not 1 <= choice <= len(entries):
+        raise ValueError(f'Choose a backup between 1 and {len(entries)}')
+    return entries[choice - 1][0]
+
+
+def prod_db_restore(db_file, backup_directory, backup_file=None, label: str | None = None):
     """
     Function to restore a database from a backup file from a specific check.
     :param db_file: Production Database file and path
     :param backup_directory: Directory where backups are stored
+    :param backup_file: backup to restore
+    :param label: manifest label of the backup to restore. Asks the user to choose one if neither is
+        provided
     :return: None
     """
-    print('Restoring Backup of Database. \n')
-    db_orig = sqlite3.connect(db_file)
-
-    # Backup database for a specific check
-    db_check_backup = sqlite3.connect(gf.choose_files_for_import()[0])
-
-    # File name for backup of the original database.  Append today's date to the file name.
-    original_db_backup_file_name = db_file.parts[-1] + "_" + datetime.strftime(datetime.today(), '%Y%m%d')
-    original_backup_path = Path(backup_directory) / original_db_backup_file_name
-    db_original_backup = sqlite3.connect(original_backup_path)
+    manifest = BackupManifest(backup_directory)
+    if backup_file is None:
+        backup_file = manifest.path(label or choose_backup(manifest))
 
     # first make a backup of the current state
-    with db_orig:
-        print('Backing up current database')
-        db_orig.backup(db_original_backup, pages=1, progress=progress)
-    # Delete the db file
-    os.remove(db_file)
-
-    # recreate the db file
-    db_orig = sqlite3.connect(db_file)
-
-    # Copy the restore DB to the original file name
-    print('Restoring database from check backup.\n')
-    with db_check_backup:
-        db_check_backup.backup(db_orig, pages=1, progress=progress)
-    db_orig.close()
-    db_check_backup.close()
+    print('Backing up current database')
+    backup_once(db_file, backup_directory,
+                f'before_restore_{datetime.now().strftime("%Y%m%d%H%M%S")}')
+
+    print(f'Restoring database from {backup_file}\n')
+    restore_database(backup_file, db_file, progress=_default_progress('Restoring'))
     print('Restore Completed.\n')
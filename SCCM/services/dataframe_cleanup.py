@@ -1,35 +1,16 @@
-from SCCM.models.case_filter import CaseFilter
-from SCCM.models.suffix import SuffixTable
-from SCCM.services.db_session import DbSession
-from sqlalchemy import select
+from pandas import Series
 
+from SCCM.schemas.money import Money, _to_cents
 
-def populate_suffix_list():
-    """
-    Retrieves a list of popular suffix
 
-    :return: A list of strings to check against names that contain a suffix
+def to_cents(amounts: Series) -> Series:
     """
-    s = DbSession.factory()
-    stmt = select(SuffixTable.suffix_name)
-    suffix_query = s.execute(stmt).all()
-    suffix_list = [s[00] for s in suffix_query]
-    return suffix_list
-
+    Converts dollar amounts to integer cents, rounding half cents up as Money does
 
-def populate_cases_filter_list():
-    """
-    Retrieves a list of strings from default DB
-    :return: a list of strings used to filter against inactive case numbers
+    :param amounts: dollar amounts as Money, Decimal, float or int
+    :return: amounts in cents
     """
-    s = DbSession.factory()
-    stmt = select(CaseFilter.filter_text)
-    filter_query = s.execute(stmt).all()
-    case_filter = []
-    for f in filter_query:
-        case_filter.append(f[0])
-    case_filter_list = tuple(case_filter)
-    return case_filter_list
+    return amounts.map(_to_cents).astype('int64')
 
 
 def aggregate_prisoner_payment_amounts(dframe):
@@ -37,7 +18,7 @@ def aggregate_prisoner_payment_amounts(dframe):
     Totals paid amounts per payee to apply to the oldest active case
 
     :param dframe: Dataframe from state check detail
-    :return: Dataframe with aggregate amounts
+    :return: Dataframe with aggregate amounts as Money
     """
     # Get clean list of names with associated DOC #
     dframe = dframe.reset_index(drop=True)
@@ -45,8 +26,11 @@ def aggregate_prisoner_payment_amounts(dframe):
     df_names = df_names.drop('Amount', axis=1)
     df_names = df_names.drop_duplicates()
 
-    # Get aggregate sum of payments indexed by DOC#
-    dframe_sum = dframe.groupby('DOC', as_index=False).agg({'Amount': 'sum'})
+    # Get aggregate sum of payments indexed by DOC#. Sum in cents so repeated payments do not
+    # accumulate float error
+    dframe_sum = dframe.assign(Amount=to_cents(dframe['Amount'])) \
+        .groupby('DOC', as_index=False).agg({'Amount': 'sum'})
+    dframe_sum['Amount'] = dframe_sum['Amount'].map(Money.from_cents)
 
     # Merge results
     results = df_names.merge(dframe_sum)
@@ -1,8 +1,71 @@
+from dataclasses import dataclass, fields, replace
+
 import sqlalchemy
 import sqlalchemy.orm
-from SCCM.models.modelbase import SqlAlchemyBase
+
 # noinspection PyUnresolvedReferences
 import SCCM.models.__all_models
+from SCCM.models.modelbase import SqlAlchemyBase
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """
+    SQLite pragmas applied to every new connection. Pragmas left as None keep the SQLite default
+    """
+    journal_mode: str | None = None
+    synchronous: str | None = None
+    cache_size: int | None = None
+    mmap_size: int | None = None
+    temp_store: str | None = None
+
+    def pragmas(self) -> list[str]:
+        """
+        :return: PRAGMA statements for the pragmas that are set
+        """
+        return [f'PRAGMA {f.name} = {getattr(self, f.name)}' for f in fields(self)
+                if getattr(self, f.name) is not None]
+
+    def override(self, **pragmas) -> 'EngineProfile':
+        """
+        :param pragmas: pragma values to change. None values are ignored
+        :return: copy of the profile with the given pragmas
+        """
+        return replace(self, **{name: value for name, value in pragmas.items()
+                                if value is not None})
+
+
+# WAL needs shared memory between connections and must not be used for a database on a network share
+ENGINE_PROFILES = {
+    'default': EngineProfile(),
+    'network': EngineProfile(journal_mode='TRUNCATE', synchronous='FULL', cache_size=-65536,
+                             mmap_size=0, temp_store='MEMORY'),
+    'local': EngineProfile(journal_mode='WAL', synchronous='NORMAL', cache_size=-65536,
+                           mmap_size=268435456, temp_store='MEMORY'),
+}
+
+
+def create_sqlite_engine(db_file: str, profile: EngineProfile = None, echo: bool = False):
+    """
+    Creates an engine for a SQLite file that applies the profile pragmas to each connection
+
+    :param db_file: database file
+    :param profile: pragmas for the connections, SQLite defaults if not given
+    :param echo: log every SQL statement
+    :return: engine
+    """
+    engine = sqlalchemy.create_engine('sqlite+pysqlite:///' + str(db_file),
+                                      connect_args={'check_same_thread': False}, echo=echo)
+    pragmas = profile.pragmas() if profile else []
+    if pragmas:
+        @sqlalchemy.event.listens_for(engine, 'connect')
+        def _apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+    return engine
+
 
 class DbSession:
     """
@@ -10,23 +73,45 @@ class DbSession:
     """
     factory = None
     engine = None
+    db_file = None
+    profile = None
 
     @staticmethod
-    def global_init(db_file: str):
+    def global_init(db_file: str, profile: EngineProfile = None, echo: bool = False,
+                    create_all: bool = True):
+        """
+        :param db_file: database file
+        :param profile: pragmas applied to each connection, SQLite defaults if not given
+        :param echo: log every SQL statement
+        :param create_all: create missing tables. Can be skipped when the schema is managed by
+            alembic
+        :return: database session
+        """
         if DbSession.factory:
             return
 
         if not db_file or not db_file.strip():
             raise Exception("You must specify a models file.")
 
-        conn_str = 'sqlite+pysqlite:///' + str(db_file)
-        print(f'Connecting to {conn_str}')
+        print(f'Connecting to sqlite+pysqlite:///{db_file}')
 
-        engine = sqlalchemy.create_engine(conn_str, connect_args={'check_same_thread': False},
-                                          echo=True)  # set echo=True for debugging
+        engine = create_sqlite_engine(db_file, profile, echo)
         DbSession.engine = engine
+        DbSession.db_file = db_file
+        DbSession.profile = profile
         DbSession.factory = sqlalchemy.orm.sessionmaker(bind=engine)
 
-        SqlAlchemyBase.metadata.create_all(engine)
+        if create_all:
+            SqlAlchemyBase.metadata.create_all(engine)
         db_session = DbSession.factory()
         return db_session
+
+    @staticmethod
+    def close():
+        """
+        Closes the connections of the global engine so that global_init can connect to another
+        database
+        """
+        if DbSession.engine is not None:
+            DbSession.engine.dispose()
+        DbSession.factory = DbSession.engine = DbSession.db_file = DbSession.profile = None
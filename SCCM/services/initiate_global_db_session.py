@@ -1,8 +1,33 @@
-from SCCM.services.db_session import DbSession
-from SCCM.config.config_model import PLRASettings
+from SCCM.config.config_model import PLRASettings, get_settings
+from SCCM.services.db_session import ENGINE_PROFILES, DbSession, EngineProfile
 
-config_file = '/Users/jwt/PycharmProjects/plra/SCCM/config/dev.env'
-settings = PLRASettings(_env_file=config_file, _env_file_encoding='utf-8')
 
-db_path = f'{settings.db_base_directory}{settings.db_file}'
-DbSession.global_init(db_path)
+def engine_profile(settings: PLRASettings, name: str | None = None) -> EngineProfile:
+    """
+    :param settings: application settings
+    :param name: profile used instead of DB_ENGINE_PROFILE
+    :return: the named engine profile with the pragma settings applied
+    """
+    try:
+        profile = ENGINE_PROFILES[name or settings.db_engine_profile]
+    except KeyError:
+        raise ValueError(f'DB engine profile must be one of {", ".join(ENGINE_PROFILES)}') from None
+    return profile.override(journal_mode=settings.db_journal_mode,
+                            synchronous=settings.db_synchronous, cache_size=settings.db_cache_size,
+                            mmap_size=settings.db_mmap_size, temp_store=settings.db_temp_store)
+
+
+def initiate_global_db_session(settings: PLRASettings = None, db_file: str | None = None,
+                               profile_name: str | None = None):
+    """
+    Connects the global DbSession to the application database
+
+    :param settings: application settings. Defaults to get_settings
+    :param db_file: database file used instead of the one named in settings
+    :param profile_name: engine profile used instead of DB_ENGINE_PROFILE
+    :return: database session
+    """
+    settings = settings or get_settings()
+    db_path = db_file or f'{settings.db_base_directory}{settings.db_file}'
+    return DbSession.global_init(db_path, engine_profile(settings, profile_name), settings.db_echo,
+                                 settings.db_create_all)
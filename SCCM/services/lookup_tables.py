@@ -0,0 +1,87 @@
+"""
+Case filter strings and name suffixes loaded from the database once per process
+"""
+from __future__ import annotations
+
+from sqlalchemy import select
+
+from SCCM.models.case_filter import CaseFilter
+from SCCM.models.lookup_table_version import LookupTableVersion
+from SCCM.models.suffix import SuffixTable
+from SCCM.services.case_discovery import compile_case_filter
+from SCCM.services.db_session import DbSession
+
+
+class LookupTables:
+    """
+    Compiled CaseFilter and SuffixTable contents. The case filter strings are combined into one
+    pattern and the suffixes into a set so each case directory or name is checked in a single pass
+
+    """
+
+    def __init__(self, filter_strings, suffixes, version: tuple | None = None):
+        """
+        :param filter_strings: strings that mark a case directory as inactive
+        :param suffixes: name suffixes such as jr and iii
+        :param version: lookup_table_versions counters the contents were loaded at
+        """
+        self.case_filter = compile_case_filter(filter_strings)
+        self.suffixes = frozenset(suffix.lower() for suffix in suffixes)
+        self.version = version
+
+    @classmethod
+    def load(cls, session) -> LookupTables:
+        """
+        :param session: database session
+        :return: lookup tables with the current database contents
+        """
+        return cls(session.execute(select(CaseFilter.filter_text)).scalars().all(),
+                   session.execute(select(SuffixTable.suffix_name)).scalars().all(),
+                   current_version(session))
+
+    def is_filtered(self, case_dir: str) -> bool:
+        """
+        :param case_dir: case directory name on the network share
+        :return: True if the directory name contains any case filter string
+        """
+        return bool(self.case_filter and self.case_filter.search(case_dir))
+
+    def strip_suffix(self, name: str) -> str:
+        """
+        Strips suffix from name to prepare for string matching algorithm
+
+        :param name: payee name from the check
+        :return: title case name without suffixes
+        """
+        return ' '.join(part for part in name.lower().split(' ')
+                        if part not in self.suffixes).title()
+
+
+def current_version(session) -> tuple:
+    """
+    :param session: database session
+    :return: edit counters of the lookup tables, incremented by triggers on every insert, update and
+        delete
+    """
+    return tuple(session.execute(select(LookupTableVersion.table_name, LookupTableVersion.version)
+                                 .order_by(LookupTableVersion.table_name)).all())
+
+
+_lookup_tables = None
+
+
+def get_lookup_tables() -> LookupTables:
+    """
+    Returns the lookup tables for this process. The tables are loaded the first time and reloaded
+    only when the version counters show that CaseFilter or SuffixTable was edited
+
+    :return: lookup tables
+    """
+    global _lookup_tables
+    session = DbSession.factory()
+    try:
+        if _lookup_tables is None or current_version(session) != _lookup_tables.version:
+            _lookup_tables = LookupTables.load(session)
+    finally:
+        session.close()
+    return _lookup_tables
@@ -0,0 +1,173 @@
+"""
+In-memory index of prisoner folder names on the network share used to match payees to prisoners
+"""
+import heapq
+import json
+import os
+from collections import Counter
+
+import numpy as np
+from fuzzywuzzy import fuzz, utils
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a name the same way fuzzywuzzy process.extract prepares queries and choices for
+    WRatio
+
+    :param name: payee or directory name
+    :return: lower case ascii name with only letters and numbers
+    """
+    return utils.full_process(utils.full_process(name), force_ascii=True)
+
+
+def best_name_match(legal_name: str, names: list[str], normalized_names: list[str],
+                    limit: int = 5) -> str:
+    """
+    Determines closest matching strings to check name from a list of prisoner names using
+    Levenshtein Distance. Method combines Process and Token Sort Ratio score to improve accuracy
+
+    :param legal_name: name of payee from the check
+    :param names: directory names
+    :param normalized_names: directory names prepared with normalize_name
+    :param limit: number of highest WRatio matches validated with token sort ratio
+    :return: prisoner name matching payee name
+    """
+    normalized_query = normalize_name(legal_name)
+    scores = ((name, fuzz.WRatio(normalized_query, normalized, full_process=False))
+              for name, normalized in zip(names, normalized_names, strict=True))
+    ratio_names = heapq.nlargest(limit, scores, key=lambda i: i[1])
+
+    # combine scores, dropping names without a positive score as Counter addition does
+    search_score = Counter({name: fuzz.token_sort_ratio(name, legal_name) + ratio
+                            for name, ratio in ratio_names})
+    search_score = +search_score
+    max_value = max(search_score.values())
+    highest_value_name = [k for k, v in search_score.items() if v == max_value]
+    return highest_value_name[0]
+
+
+def bulk_name_match(legal_names: list[str], names: list[str], normalized_names: list[str],
+                    limit: int = 5) -> list[tuple[str, int] | None]:
+    """
+    Matches every payee in a letter directory in one pass. Builds the WRatio score matrix for all
+    payees and directory names, selects the highest matches for each payee with a stable sort so
+    ties keep directory order as best_name_match does, and adds the token sort ratio of each
+    selected match.
+
+    :param legal_names: names of payees from the check that share a letter directory
+    :param names: directory names
+    :param normalized_names: directory names prepared with normalize_name
+    :param limit: number of highest WRatio matches validated with token sort ratio
+    :return: best matching directory name and combined score for each payee, None for payees that
+        match no name
+    """
+    if not names:
+        return [None] * len(legal_names)
+    normalized_queries = [normalize_name(name) for name in legal_names]
+    ratios = np.zeros((len(legal_names), len(names)), dtype=np.int16)
+    scored = {}
+    for i, normalized_query in enumerate(normalized_queries):
+        # payees with the same normalized name share a row of scores
+        if normalized_query not in scored:
+            scored[normalized_query] = [fuzz.WRatio(normalized_query, normalized,
+                                                    full_process=False)
+                                        for normalized in normalized_names]
+        ratios[i] = scored[normalized_query]
+    top_matches = np.argsort(-ratios, axis=1, kind='stable')[:, :limit]
+
+    matches = []
+    for i, legal_name in enumerate(legal_names):
+        columns = top_matches[i]
+        token_sort_ratios = np.array([fuzz.token_sort_ratio(names[j], legal_name) for j in columns])
+        search_score = token_sort_ratios + ratios[i, columns]
+        best = int(np.argmax(search_score))
+        if search_score[best] <= 0:
+            matches.append(None)
+            continue
+        matches.append((names[columns[best]], int(search_score[best])))
+    return matches
+
+
+class PrisonerNameIndex:
+    """
+    Lists each letter directory on the network share once per run and keeps the names in memory.
+    Listings can be persisted to a snapshot file and are reused on the next run if the directory
+    modification time is unchanged.
+
+    """
+
+    def __init__(self, snapshot_file: str | None = None):
+        """
+        :param snapshot_file: optional JSON file used to persist directory listings between runs
+        """
+        self.snapshot_file = snapshot_file
+        self._directories = {}
+        self._snapshot = {}
+        if snapshot_file and os.path.exists(snapshot_file):
+            with open(snapshot_file) as f:
+                self._snapshot = json.load(f)
+
+    def names(self, search_dir: str) -> tuple[list[str], list[str]]:
+        """
+        Retrieves directory names and their normalized forms for a letter directory
+
+        :param search_dir: letter directory on the network share
+        :return: directory names and normalized directory names
+        """
+        if search_dir not in self._directories:
+            mtime = os.stat(search_dir).st_mtime
+            cached = self._snapshot.get(search_dir)
+            if cached and cached['mtime'] == mtime:
+                names = cached['names']
+            else:
+                names = os.listdir(search_dir)
+                self._snapshot[search_dir] = {'mtime': mtime, 'names': names}
+            self._directories[search_dir] = (names, [normalize_name(name) for name in names])
+        return self._directories[search_dir]
+
+    def get_name_ratio(self, legal_name: str, search_dir: str) -> str:
+        """
+        Matches a payee name to a prisoner directory
+
+        :param legal_name: name of payee from the check
+        :param search_dir: letter directory on the network share
+        :return: prisoner name matching payee name
+        """
+        names, normalized_names = self.names(search_dir)
+        return best_name_match(legal_name, names, normalized_names)
+
+    def match_many(self, legal_names: list[str], search_dir: str) -> list[tuple[str, int] | None]:
+        """
+        Matches all payees that share a letter directory
+
+        :param legal_names: names of payees from the check
+        :param search_dir: letter directory on the network share
+        :return: best matching directory name and combined score for each payee, None for payees
+            that match no name
+        """
+        names, normalized_names = self.names(search_dir)
+        return bulk_name_match(legal_names, names, normalized_names)
+
+    @property
+    def snapshot(self) -> dict:
+        """
+        Directory listings written by save_snapshot
+        """
+        return self._snapshot
+
+    def merge_snapshot(self, snapshot: dict) -> None:
+        """
+        Adds directory listings collected by another index, such as one used in a worker process
+
+        :param snapshot: directory listings from PrisonerNameIndex.snapshot
+        """
+        self._snapshot.update(snapshot)
+
+    def save_snapshot(self) -> None:
+        """
+        Persists directory listings to the snapshot file
+        """
+        if self.snapshot_file:
+            with open(self.snapshot_file, 'w') as f:
+                json.dump(self._snapshot, f)
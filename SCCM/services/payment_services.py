@@ -1,10 +1,8 @@
-from SCCM.schemas.prisoner_schema import PrisonerCreate
-from decimal import Decimal, ROUND_HALF_UP
 from pandas import DataFrame
-from SCCM.schemas.case_schema import CaseCreate
-from SCCM.schemas.transaction_schema import TransactionCreate
 
-cents = Decimal('0.01')
+from SCCM.schemas.domain import Case, Payee, Transaction
+from SCCM.schemas.money import Money
+from SCCM.services.dataframe_cleanup import to_cents
 
 
 def prepare_ccam_upload_transactions(prisoner_list):
@@ -27,11 +25,11 @@ def prepare_ccam_upload_transactions(prisoner_list):
     return payments
 
 
-def prepare_overpayment_multiple(p: PrisonerCreate, case: CaseCreate, check_number: int) -> PrisonerCreate:
+def prepare_overpayment_multiple(p: Payee, case: Case, check_number: int) -> Payee:
     case.case_comment = 'PAID'
     overpayment = case.balance.mark_paid()
-    case.transaction = TransactionCreate(
-        check_number=check_number, amount_paid=p.amount_paid - Decimal(overpayment).quantize(cents, ROUND_HALF_UP))
+    case.transaction = Transaction(
+        check_number=check_number, amount_paid=p.amount_paid - overpayment)
     p.refund = overpayment
     p.overpayment = {'overpayment': True,
                      'ccam_case_num': case.ccam_case_num,
@@ -44,7 +42,7 @@ def prepare_overpayment_multiple(p: PrisonerCreate, case: CaseCreate, check_numb
     return p, case
 
 
-def prepare_overpayment_single(p: PrisonerCreate, case: CaseCreate, check_number: int) -> PrisonerCreate:
+def prepare_overpayment_single(p: Payee, case: Case, check_number: int) -> Payee:
     case.case_comment = 'PAID'
     overpayment = case.balance.mark_paid()
     p.refund = overpayment
@@ -55,19 +53,19 @@ def prepare_overpayment_single(p: PrisonerCreate, case: CaseCreate, check_number
                      'outstanding': case.balance.amount_owed,
                      'transaction amount': -p.refund
                      }
-    case.transaction = TransactionCreate(
-        check_number=check_number, amount_paid=(p.amount_paid - p.refund).quantize(cents, ROUND_HALF_UP))
+    case.transaction = Transaction(
+        check_number=check_number, amount_paid=p.amount_paid - p.refund)
     p.amount_paid = p.refund
     return p, case
 
 
-def prepare_payment(p: PrisonerCreate, case: CaseCreate, check_number: int) -> CaseCreate:
-    case.transaction = TransactionCreate(
-        check_number=check_number, amount_paid=p.amount_paid.quantize(cents, ROUND_HALF_UP))
+def prepare_payment(p: Payee, case: Case, check_number: int) -> Case:
+    case.transaction = Transaction(
+        check_number=check_number, amount_paid=p.amount_paid)
     return p, case
 
 
-def check_sum(check_amount: Decimal, total_by_name_sum: Decimal) -> None:
+def check_sum(check_amount: Money, total_by_name_sum: Money) -> None:
     """
     Compares aggregate total against individual payments to insure they match
 
@@ -97,13 +95,12 @@ def prepare_deposit_number(check_date) -> str:
     return deposit_num
 
 
-def get_check_sum(state_check_data: DataFrame) -> Decimal:
+def get_check_sum(state_check_data: DataFrame) -> Money:
     """
-    Returns aggregate sums of prisoner payments
+    Returns aggregate sums of prisoner payments. Payments are summed in integer cents so the total
+    matches the check amount exactly
 
     :param state_check_data: pandas dataframe of prisoners with amount paid
     :return: total of all prisoners
     """
-    total_by_name_sum = state_check_data['Amount'].sum()
-    total_by_name_sum = Decimal(total_by_name_sum).quantize(cents, ROUND_HALF_UP)
-    return cents, total_by_name_sum
+    return Money.from_cents(to_cents(state_check_data['Amount']).sum())
@@ -1,41 +1,63 @@
 import os
-from collections import Counter
+from collections import defaultdict
 
-import fuzz as fuzz
-from fuzzywuzzy import fuzz
-from fuzzywuzzy import process
+from SCCM.schemas.domain import Payee
+from SCCM.services import crud
+from SCCM.services.lookup_tables import get_lookup_tables
+from SCCM.services.name_index import PrisonerNameIndex
 
-import SCCM.services.dataframe_cleanup as dc
-import SCCM.schemas.prisoner_schema as pris_schema
 
-suffix_list = dc.populate_suffix_list()
-
-
-def add_prisoner_to_db_session(network_base_dir: str, p: pris_schema.PrisonerCreate):
-    print(f'{p.legal_name} found in database. Adding to session.... ')
-    # Get parameters, create new user, insert into DB and load balances
-    # search for name on network share
-    p.legal_name = drop_suffix_from_name(p.legal_name)
-    p.search_dir = construct_search_directory_for_prisoner(p.legal_name, network_base_dir)
-    p.judgment_name = get_name_ratio(p)
-    p.case_search_dir = f"{p.search_dir}/{p.judgment_name}"
-    return p
-
-
-def drop_suffix_from_name(check_name: str) -> str:
+def find_prisoner_name_matches(prisoner_list: list[Payee], network_base_dir: str,
+                               name_index: PrisonerNameIndex,
+                               use_match_cache: bool = True) -> tuple:
     """
-    Strips suffix from name to prepare for string matching algorithm
-
+    Matches payees to prisoner directories without writing to the database so the caller can save
+    the matches later from a single writer. Payees matched on an earlier check reuse the saved match
+    if the directory still exists. Remaining payees are grouped by letter directory and each group
+    is matched in one pass
+
+    :param prisoner_list: payees from the check
+    :param network_base_dir: base directory location for electronic case files
+    :param name_index: index of network share directories
+    :param use_match_cache: reuse matches saved in the prisoner_matches table
+    :return: payees with judgment name and case search directory, new matches and stale matches to
+        save with crud.save_prisoner_matches
     """
-    lookup_name = check_name
-    lookup_name = lookup_name.lower()
-    name = str.split(lookup_name, ' ')
-    pull_suffix = set(name).intersection(suffix_list)
-    if pull_suffix:
-        for item in pull_suffix:
-            name.remove(item)
-    name = ' '.join(name).title()
-    return name
+    doc_numbers = [p.doc_number for p in prisoner_list]
+    saved_matches = crud.get_prisoner_matches(doc_numbers) if use_match_cache else {}
+    stale_matches = []
+    payees_by_directory = defaultdict(list)
+    lookup_tables = get_lookup_tables()
+    for p in prisoner_list:
+        p.legal_name = lookup_tables.strip_suffix(p.legal_name)
+        p.search_dir = construct_search_directory_for_prisoner(p.legal_name, network_base_dir)
+        match = saved_matches.get((p.doc_number, p.legal_name))
+        if match:
+            case_search_dir = f"{p.search_dir}/{match.judgment_name}"
+            if os.path.isdir(case_search_dir):
+                p.judgment_name = match.judgment_name
+                p.case_search_dir = case_search_dir
+                continue
+            stale_matches.append((p.doc_number, p.legal_name))
+        payees_by_directory[p.search_dir].append(p)
+
+    new_matches = {}
+    for search_dir, payees in payees_by_directory.items():
+        try:
+            matches = name_index.match_many([p.legal_name for p in payees], search_dir)
+        except OSError as e:
+            print(f'Error matching payees in {search_dir}: {e}')
+            continue
+        for p, match in zip(payees, matches, strict=True):
+            if match is None:
+                print(f'No directory in {search_dir} matches {p.legal_name}')
+                continue
+            judgment_name, score = match
+            p.judgment_name = judgment_name
+            p.case_search_dir = f"{p.search_dir}/{p.judgment_name}"
+            new_matches[(p.doc_number, p.legal_name)] = (judgment_name, score)
+
+    return prisoner_list, new_matches, stale_matches
 
 
 def construct_search_directory_for_prisoner(lookup_name: str, base_dir: str):
@@ -60,36 +82,3 @@ def construct_search_directory_for_prisoner(lookup_name: str, base_dir: str):
 
     search_path = os.path.join(base_dir, last_initial)
     return search_path
-
-
-def __name_token_sort_ratio(p, directory_name):
-    token_sort_dict = Counter({})
-    lookup_name = p.legal_name
-    for name in directory_name:
-        # directory_name = name[0]
-        token_sort_ratio = fuzz.token_sort_ratio(name, lookup_name)
-        d = {name[0]: token_sort_ratio}
-        token_sort_dict.update(d)
-    return token_sort_dict
-
-
-def get_name_ratio(p):
-    """
-    Determines closest matching strings to check name from a list of prisoner names using Levenshtein Distance.
-    Method combines Process and Token Set Ratio score to improve accuracy
-
-    :return: prisoner name matching payee name
-    """
-    directory = os.listdir(p.search_dir)
-    ratio_names = process.extract(p.legal_name, directory)
-    highest = process.extractOne(p.legal_name, directory)
-    # Handling edge cases and validate the highest match
-    # get token sort ratios for top three directory matches
-    token_sort_ratios = __name_token_sort_ratio(p, ratio_names)
-
-    ratio_dicts = Counter(dict(ratio_names))
-    # combine dictionary to generate score
-    search_score = token_sort_ratios + ratio_dicts
-    max_value = max(search_score.values())
-    highest_value_name = [k for k, v in search_score.items() if v == max_value]
-    return highest_value_name[0]
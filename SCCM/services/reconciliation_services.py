@@ -0,0 +1,84 @@
+"""
+Vectorized comparison of database case balances to CCAM balances in integer cents
+"""
+from decimal import Decimal
+
+import pandas as pd
+
+from SCCM.services.dataframe_cleanup import to_cents
+
+# database balance column and the matching sum_account_balances column
+BALANCE_COLUMNS = {'amount_assessed': 'Total Owed',
+                   'amount_collected': 'Total Collected',
+                   'amount_owed': 'Total Outstanding'}
+# columns returned by crud.get_active_case_balances
+CASE_COLUMNS = ['id', 'ccam_case_num', 'ecf_case_num', 'amount_assessed', 'amount_collected',
+                'amount_owed', 'legal_name']
+
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def case_balances_frame(cases: list) -> pd.DataFrame:
+    """
+    Builds a frame of database balances in cents indexed by the CCAM case number without the party
+    suffix, the key used by sum_account_balances
+
+    :param cases: rows from crud.get_active_case_balances
+    :return: case balances in cents
+    """
+    df = pd.DataFrame.from_records(cases, columns=CASE_COLUMNS)
+    for column in BALANCE_COLUMNS:
+        df[column] = to_cents(df[column])
+    df.index = df['ccam_case_num'].str.split('-').str[0]
+    return df
+
+
+def find_balance_mismatches(db_balances: pd.DataFrame,
+                            ccam_balances: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Joins database balances to CCAM balances and compares assessed, collected and outstanding
+    amounts in one pass
+
+    :param db_balances: frame from case_balances_frame
+    :param ccam_balances: frame from sum_account_balances
+    :return: cases with at least one differing balance, with updated_ columns holding the CCAM
+        amounts in cents, and CCAM case numbers that have no CCAM balance
+    """
+    ccam_cents = pd.DataFrame({f'updated_{column}': to_cents(ccam_balances[ccam_column])
+                               for column, ccam_column in BALANCE_COLUMNS.items()},
+                              index=ccam_balances.index)
+    found = db_balances.index.isin(ccam_cents.index)
+    missing = db_balances.loc[~found, 'ccam_case_num'].tolist()
+
+    joined = db_balances[found].join(ccam_cents, how='inner')
+    previous = joined[list(BALANCE_COLUMNS)].to_numpy()
+    updated = joined[[f'updated_{column}' for column in BALANCE_COLUMNS]].to_numpy()
+    return joined[(previous != updated).any(axis=1)], missing
+
+
+def reconciliation_rows(mismatches: pd.DataFrame) -> tuple[list[dict], list[dict]]:
+    """
+    Prepares CaseReconciliation rows and case balance updates for crud.save_reconciliation_batch
+
+    :param mismatches: frame from find_balance_mismatches
+    :return: reconciliation rows and balance rows
+    """
+    reconciliation = []
+    balances = []
+    for case in mismatches.itertuples():
+        reconciliation.append({
+            'court_case_id': case.id,
+            'previous_amount_assessed': from_cents(case.amount_assessed),
+            'previous_amount_collected': from_cents(case.amount_collected),
+            'previous_amount_owed': from_cents(case.amount_owed),
+            'updated_amount_assessed': from_cents(case.updated_amount_assessed),
+            'updated_amount_collected': from_cents(case.updated_amount_collected),
+            'updated_amount_owed': from_cents(case.updated_amount_owed)})
+        balances.append({'case_id': case.id,
+                         'amount_assessed': from_cents(case.updated_amount_assessed),
+                         'amount_collected': from_cents(case.updated_amount_collected),
+                         'amount_owed': from_cents(case.updated_amount_owed),
+                         'case_comment': 'PAID' if case.updated_amount_owed == 0 else 'ACTIVE'})
+    return reconciliation, balances
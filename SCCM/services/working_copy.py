@@ -0,0 +1,168 @@
+"""
+Runs against a local copy of the network database and publishes the result back to the share
+"""
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+from SCCM.config.config_model import PLRASettings
+from SCCM.services.db_session import DbSession
+from SCCM.services.initiate_global_db_session import initiate_global_db_session
+
+
+class PublishConflictError(RuntimeError):
+    """
+    The network database changed after the working copy was taken, so publishing would overwrite
+    another run. Control numbers in upload files written by the run may repeat those of the other
+    run
+    """
+
+
+def file_fingerprint(path: str) -> tuple[int, int, str]:
+    """
+    :param path: database file
+    :return: modification time in nanoseconds, size and SHA-256 of the file
+    """
+    stat = os.stat(path)
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(block)
+    return stat.st_mtime_ns, stat.st_size, sha256.hexdigest()
+
+
+def _snapshot(source: str, destination: str) -> None:
+    # one backup step copies every page, then the copy is left in rollback journal mode
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(destination)
+    try:
+        src.backup(dst)
+        dst.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        dst.close()
+        src.close()
+
+
+class WorkingCopy:
+    """
+    Local snapshot of the network database. The snapshot is published back with an optimistic lock:
+    the network file must still match the fingerprint taken at checkout, and only one run may
+    publish at a time
+
+    """
+
+    def __init__(self, remote_file: str, local_directory: str | None = None, attempts: int = 3):
+        """
+        :param remote_file: database file on the network share
+        :param local_directory: directory for the local copy, a new temporary directory if not given
+        :param attempts: snapshots taken at checkout before giving up on a database that keeps
+            changing
+        """
+        self.remote_file = str(remote_file)
+        self.local_directory = local_directory
+        self.attempts = attempts
+        self.local_file = None
+        self.fingerprint = None
+        self._temporary_directory = None
+
+    def checkout(self) -> str:
+        """
+        Copies the network database to local disk. The copy is retried if the network file changes
+        while it is copied
+
+        :return: local database file
+        """
+        if self.local_directory is None:
+            self._temporary_directory = self.local_directory = tempfile.mkdtemp(prefix='plra_')
+        self.local_file = os.path.join(self.local_directory, os.path.basename(self.remote_file))
+        for _ in range(self.attempts):
+            before = file_fingerprint(self.remote_file)
+            if os.path.exists(self.local_file):
+                os.remove(self.local_file)
+            _snapshot(self.remote_file, self.local_file)
+            if file_fingerprint(self.remote_file) == before:
+                self.fingerprint = before
+                print(f'Working on a local copy of {self.remote_file} at {self.local_file}')
+                return self.local_file
+        raise PublishConflictError(f'{self.remote_file} changed during each of {self.attempts} '
+                                   f'copies')
+
+    def publish(self) -> None:
+        """
+        Replaces the network database with the local copy. The copy is written next to the network
+        file and renamed over it so readers see either the old or the new database
+
+        :raise PublishConflictError: if another run is publishing or has changed the network
+            database
+        """
+        lock_file = f'{self.remote_file}.lock'
+        try:
+            os.close(os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            raise PublishConflictError(f'Another run is publishing {self.remote_file}. Remove '
+                                       f'{lock_file} if it is left from a failed run') from None
+        staged = f'{self.remote_file}.{os.getpid()}.publish'
+        try:
+            if file_fingerprint(self.remote_file) != self.fingerprint:
+                raise PublishConflictError(f'{self.remote_file} changed since it was copied. Local '
+                                           f'changes are kept in {self.local_file}')
+            _snapshot(self.local_file, staged)
+            os.replace(staged, self.remote_file)
+            self.fingerprint = file_fingerprint(self.remote_file)
+        finally:
+            if os.path.exists(staged):
+                os.remove(staged)
+            os.remove(lock_file)
+        print(f'Published {self.local_file} to {self.remote_file}')
+
+    def discard(self) -> None:
+        """
+        Removes the local copy
+        """
+        if self._temporary_directory:
+            shutil.rmtree(self._temporary_directory, ignore_errors=True)
+        elif self.local_file:
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(self.local_file + suffix):
+                    os.remove(self.local_file + suffix)
+        self.local_file = None
+
+
+@contextmanager
+def open_database(settings: PLRASettings, db_file: str | None = None):
+    """
+    Connects the global DbSession for a run. With DB_WORKING_COPY the run uses a local copy with the
+    local engine profile, which is published back when the run completes and discarded if the run
+    fails. A copy that cannot be published is kept
+
+    :param settings: application settings
+    :param db_file: database file used instead of the one named in settings
+    :return: database file the session is connected to
+    """
+    remote_file = db_file or f'{settings.db_base_directory}{settings.db_file}'
+    if not settings.db_working_copy:
+        initiate_global_db_session(settings, remote_file)
+        yield remote_file
+        return
+
+    working_copy = WorkingCopy(remote_file, settings.db_working_directory)
+    local_file = working_copy.checkout()
+    try:
+        initiate_global_db_session(settings, local_file, 'local')
+        yield local_file
+    except BaseException:
+        DbSession.close()
+        working_copy.discard()
+        raise
+    DbSession.close()
+    # the run is committed and its upload files are written, so the local copy is kept if it cannot
+    # be published
+    try:
+        working_copy.publish()
+    except BaseException:
+        print(f'The local copy was not published and is kept at {local_file}')
+        raise
+    working_copy.discard()
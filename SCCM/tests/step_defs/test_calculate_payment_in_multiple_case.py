@@ -63,4 +63,4 @@ def check_for_balance_in_newest_case(prisoner):
     assert prisoner.cases_list[1].balance.amount_owed == Decimal(332.33).quantize(cents, ROUND_HALF_UP)
     assert prisoner.cases_list[1].case_comment == 'ACTIVE'
     assert prisoner.cases_list[1].balance.amount_collected == Decimal(17.67).quantize(cents, ROUND_HALF_UP)
-    assert prisoner.refund == 0.00
+    assert prisoner.refund == 0
@@ -92,6 +92,6 @@ def make_payment_with_no_active_cases(prisoner_nocase):
 @then("I should receive a refund of $50.00")
 def process_overpayment(prisoner_nocase):
     assert prisoner_nocase.overpayment
-    assert prisoner_nocase.overpayment['transaction amount'] == -50.00
+    assert prisoner_nocase.overpayment['transaction amount'] == -50
     assert prisoner_nocase.overpayment['ccam_case_num'] == 'No Active Cases'
-    assert prisoner_nocase.refund == 50.00
+    assert prisoner_nocase.refund == 50
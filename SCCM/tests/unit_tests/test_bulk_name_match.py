@@ -0,0 +1,68 @@
+import random
+from collections import Counter
+
+import pytest
+from fuzzywuzzy import fuzz, process
+
+from SCCM.services.name_index import best_name_match, bulk_name_match, normalize_name
+
+FIRST_NAMES = ['John', 'Jon', 'Johnny', 'Michael', 'Mike', 'Ann', 'Anna', 'Robert', 'Bob', 'Luis',
+               'José']
+MIDDLE_NAMES = ['A', 'Lee', 'Ray', '']
+LAST_NAMES = ['Smith', 'Smyth', 'Smith-Jones', 'Sanchez', 'Sánchez', 'Simmons', 'Simon', 'Stone']
+
+
+def extract_match(legal_name, directory_names):
+    # name matching before the index: top five process.extract matches validated with token sort
+    # ratio
+    ratio_names = process.extract(legal_name, directory_names)
+    search_score = Counter({name: fuzz.token_sort_ratio(name, legal_name) + ratio
+                            for name, ratio in ratio_names})
+    max_value = max(search_score.values())
+    return next(k for k, v in search_score.items() if v == max_value)
+
+
+@pytest.fixture
+def directory_names():
+    random.seed(57686)
+    names = {f'{random.choice(LAST_NAMES).upper()}, {random.choice(FIRST_NAMES)}'
+             for _ in range(60)}
+    return sorted(names, key=lambda x: random.random())
+
+
+@pytest.fixture
+def payee_names():
+    random.seed(15483)
+    return [' '.join(filter(None, [random.choice(FIRST_NAMES), random.choice(MIDDLE_NAMES),
+                                   random.choice(LAST_NAMES)])) for _ in range(200)]
+
+
+def test_bulk_match_agrees_with_per_payee_match(directory_names, payee_names):
+    normalized_names = [normalize_name(name) for name in directory_names]
+    matches = bulk_name_match(payee_names, directory_names, normalized_names)
+    expected = [best_name_match(name, directory_names, normalized_names) for name in payee_names]
+    assert [name for name, score in matches] == expected
+
+
+def test_bulk_match_agrees_with_extract(directory_names, payee_names):
+    normalized_names = [normalize_name(name) for name in directory_names]
+    matches = bulk_name_match(payee_names, directory_names, normalized_names)
+    expected = [extract_match(name, directory_names) for name in payee_names]
+    assert [name for name, score in matches] == expected
+
+
+def test_bulk_match_ties_keep_directory_order():
+    directory_names = ['SMITH, John', 'SMITH John']
+    normalized_names = [normalize_name(name) for name in directory_names]
+    assert bulk_name_match(['John Smith'], directory_names, normalized_names)[0][0] == 'SMITH, John'
+    directory_names.reverse()
+    normalized_names.reverse()
+    assert bulk_name_match(['John Smith'], directory_names, normalized_names)[0][0] == 'SMITH John'
+
+
+def test_bulk_match_returns_none_for_unmatched_payee():
+    directory_names = ['SMITH, John', 'JONES, Ann']
+    normalized_names = [normalize_name(name) for name in directory_names]
+    matches = bulk_name_match(['John Smith', 'Xq', 'Ann Jones'], directory_names, normalized_names)
+    assert [match and match[0] for match in matches] == ['SMITH, John', None, 'JONES, Ann']
+    assert bulk_name_match(['John Smith'], [], []) == [None]
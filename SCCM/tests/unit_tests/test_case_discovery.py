@@ -0,0 +1,42 @@
+import os
+
+from SCCM.services.case_discovery import CaseDirectoryIndex, compile_case_filter
+
+
+def make_prisoner_dirs(tmp_path, count):
+    prisoner_dirs = []
+    for i in range(count):
+        prisoner_dir = tmp_path / f'Prisoner {i}'
+        (prisoner_dir / f'21-cv-{i}').mkdir(parents=True)
+        prisoner_dirs.append(str(prisoner_dir))
+    return prisoner_dirs
+
+
+def test_scan_lists_folders_concurrently(tmp_path):
+    prisoner_dirs = make_prisoner_dirs(tmp_path, 20)
+    index = CaseDirectoryIndex(max_workers=4)
+    index.scan([*prisoner_dirs, str(tmp_path / 'missing'), None])
+    assert [index.case_directories(d) for d in prisoner_dirs] == [[f'21-cv-{i}'] for i in range(20)]
+
+
+def test_snapshot_reused_until_folder_changes(tmp_path):
+    prisoner_dir = make_prisoner_dirs(tmp_path, 1)[0]
+    snapshot = str(tmp_path / 'snapshot.json')
+    index = CaseDirectoryIndex(snapshot)
+    index.scan([prisoner_dir])
+    index.save_snapshot()
+
+    mtime = os.stat(prisoner_dir).st_mtime
+    os.rmdir(os.path.join(prisoner_dir, '21-cv-0'))
+    os.utime(prisoner_dir, (mtime, mtime))
+    assert CaseDirectoryIndex(snapshot).case_directories(prisoner_dir) == ['21-cv-0']
+
+    os.mkdir(os.path.join(prisoner_dir, '22-cv-1'))
+    assert CaseDirectoryIndex(snapshot).case_directories(prisoner_dir) == ['22-cv-1']
+
+
+def test_compile_case_filter_escapes_strings():
+    case_filter = compile_case_filter(('PAID', '.pdf'))
+    assert case_filter.search('19-cv-5 PAID')
+    assert not case_filter.search('19-cv-5xpdf')
+    assert compile_case_filter(()) is None
@@ -0,0 +1,47 @@
+import pytest
+
+from SCCM.services.ccam_cache import CCAMCache
+
+
+@pytest.fixture
+def ccam_lines():
+    return [{'case_num': 'DWIW321CV000012', 'prty_cd': 'WIW1234', 'acct_cd': 'WIWAPCCA2659',
+             'prnc_owed': 350, 'prnc_clld': 10, 'totl_ostg': 340}]
+
+
+def test_cache_hit_after_put(tmp_path, ccam_lines):
+    cache = CCAMCache(str(tmp_path / 'cache.sqlite'), ttl=60)
+    cache.put_many(['DWIW321CV000012-001', 'DWIW322CV000001-001'], ccam_lines, check_number=57686)
+    cached, missing = cache.get_many(['DWIW321CV000012-001', 'DWIW322CV000001-001',
+                                      'DWIW323CV000002-001'])
+    assert cached == {'DWIW321CV000012': ccam_lines, 'DWIW322CV000001': []}
+    assert missing == ['DWIW323CV000002-001']
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_cache_expired_entries_are_missed(tmp_path, ccam_lines):
+    cache = CCAMCache(str(tmp_path / 'cache.sqlite'), ttl=0)
+    cache.put_many(['DWIW321CV000012-001'], ccam_lines)
+    cached, missing = cache.get_many(['DWIW321CV000012-001'])
+    assert cached == {}
+    assert missing == ['DWIW321CV000012-001']
+
+
+def test_cache_invalidate_by_check(tmp_path, ccam_lines):
+    cache = CCAMCache(str(tmp_path / 'cache.sqlite'), ttl=60)
+    cache.put_many(['DWIW321CV000012-001'], ccam_lines, check_number=57686)
+    cache.put_many(['DWIW322CV000001-001'], [], check_number=57687)
+    assert cache.invalidate(check_number=57686) == 1
+    _, missing = cache.get_many(['DWIW321CV000012-001', 'DWIW322CV000001-001'])
+    assert missing == ['DWIW321CV000012-001']
+
+
+def test_cache_parties_of_a_case_share_lines(tmp_path):
+    lines = [{'case_num': 'DWIW321CV000012', 'prty_cd': f'WIW{party}', 'acct_cd': 'WIWAPCCA2659',
+              'prnc_owed': 350, 'prnc_clld': 10, 'totl_ostg': 340} for party in (1, 2)]
+    cache = CCAMCache(str(tmp_path / 'cache.sqlite'), ttl=60)
+    cache.put_many(['DWIW321CV000012-001', 'DWIW321CV000012-002'], lines)
+    cached, missing = cache.get_many(['DWIW321CV000012-001', 'DWIW321CV000012-002'])
+    assert [line for case_lines in cached.values() for line in case_lines] == lines
+    assert missing == []
+    assert cache.invalidate(case_numbers=['DWIW321CV000012-002']) == 1
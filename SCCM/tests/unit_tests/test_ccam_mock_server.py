@@ -0,0 +1,22 @@
+import requests
+
+from SCCM.bin.benchmarks.ccam_load_test import MockServerThread
+from SCCM.bin.benchmarks.ccam_mock_server import ACCOUNTS_PATH, MockCCAM, synthetic_lines
+
+
+def test_mock_ccam_pages_and_rate_limit():
+    cases = [f'DWIW321CV{i:06d}-001' for i in range(12)]
+    lines = [line for case in cases for line in synthetic_lines(case)]
+    assert all(line['case_num'] == case.split('-')[0] for case in cases
+               for line in synthetic_lines(case))
+
+    with MockServerThread(MockCCAM(rate_limit=3)) as server:
+        url = f'{server.url}{ACCOUNTS_PATH}'
+        first = requests.get(url, params={'caseNumberList': cases}).json()
+        page_info = first['meta']['pageInfo']
+        assert page_info['totalPages'] == -(-len(lines) // 20) and page_info['number'] == 1
+        last = requests.post(url, json={'caseNumberList': cases, 'page': 2, 'size': 20}).json()
+        assert first['data'] + last['data'] == lines[:40]
+        assert last['meta']['pageInfo']['last'] is (len(lines) <= 40)
+        requests.get(url, params={'caseNumberList': cases[0]})
+        assert requests.get(url, params={'caseNumberList': cases[0]}).status_code == 429
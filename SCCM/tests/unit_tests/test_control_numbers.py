@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import pytest
+import sqlalchemy
+import sqlalchemy.orm
+
+# noinspection PyUnresolvedReferences
+import SCCM.models.__all_models
+from SCCM.models.control_number_counter import ControlNumberCounter
+from SCCM.models.modelbase import SqlAlchemyBase
+from SCCM.services.control_numbers import ControlNumberAllocator, ControlNumbersExhaustedError
+
+
+def test_control_numbers_are_unique_per_deposit(tmp_path):
+    engine = sqlalchemy.create_engine(f'sqlite:///{tmp_path}/plra.sqlite',
+                                      connect_args={'timeout': 30})
+    SqlAlchemyBase.metadata.create_all(engine)
+    factory = sqlalchemy.orm.sessionmaker(bind=engine)
+
+    def allocate(deposit_num):
+        return list(islice(ControlNumberAllocator(deposit_num, block_size=7,
+                                                  session_factory=factory), 50))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        checks = list(executor.map(allocate, ['PL101826'] * 4))
+    numbers = [n for check in checks for n in check]
+    assert len(set(numbers)) == len(numbers) == 200
+    assert allocate('PL101926')[:3] == [1, 2, 3]
+
+
+def test_reservation_in_a_writing_transaction_is_committed_with_it(tmp_path):
+    engine = sqlalchemy.create_engine(f'sqlite:///{tmp_path}/plra.sqlite',
+                                      connect_args={'timeout': 1})
+    SqlAlchemyBase.metadata.create_all(engine)
+    factory = sqlalchemy.orm.sessionmaker(bind=engine)
+
+    session = factory()
+    session.add(ControlNumberCounter(deposit_num='PL101726', last_control_num=0))
+    session.flush()
+    assert list(islice(ControlNumberAllocator('PL101826', block_size=3, session=session), 3)) == [1,
+                                                                                                  2,
+                                                                                                  3]
+    session.rollback()
+    assert list(islice(ControlNumberAllocator('PL101826', session_factory=factory), 1)) == [1]
+    session.close()
+
+
+def test_deposit_raises_when_control_numbers_run_out(tmp_path):
+    engine = sqlalchemy.create_engine(f'sqlite:///{tmp_path}/plra.sqlite')
+    SqlAlchemyBase.metadata.create_all(engine)
+    factory = sqlalchemy.orm.sessionmaker(bind=engine)
+
+    allocator = ControlNumberAllocator('PL101826', block_size=4, session_factory=factory,
+                                       max_control_num=10)
+    assert list(islice(allocator, 10)) == list(range(1, 11))
+    with pytest.raises(ControlNumbersExhaustedError):
+        next(allocator)
+    with pytest.raises(ControlNumbersExhaustedError):
+        next(ControlNumberAllocator('PL101826', session_factory=factory, max_control_num=10))
+    assert next(ControlNumberAllocator('PL101926', session_factory=factory,
+                                       max_control_num=10)) == 1
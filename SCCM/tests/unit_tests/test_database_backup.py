@@ -0,0 +1,44 @@
+import sqlite3
+
+from SCCM.services import database_services as ds
+
+
+def _create(db_file, values):
+    conn = sqlite3.connect(db_file)
+    with conn:
+        conn.execute('CREATE TABLE IF NOT EXISTS t (value INTEGER)')
+        conn.execute('DELETE FROM t')
+        conn.executemany('INSERT INTO t VALUES (?)', ((v,) for v in values))
+    conn.close()
+
+
+def _values(db_file):
+    conn = sqlite3.connect(db_file)
+    values = [row[0] for row in conn.execute('SELECT value FROM t ORDER BY value')]
+    conn.close()
+    return values
+
+
+def test_backup_manifest_retention_and_restore(tmp_path):
+    db_file = tmp_path / 'plra.sqlite'
+    backups = tmp_path / 'backups'
+    backups.mkdir()
+    for check_number in (57001, 57002, 57003):
+        _create(db_file, range(check_number - 57000))
+        ds.backup_once(db_file, backups, str(check_number), compress=check_number != 57002,
+                       retention=2)
+    # an existing backup is not replaced
+    _create(db_file, [99])
+    ds.backup_once(db_file, backups, '57003', compress=True, retention=2)
+
+    manifest = ds.BackupManifest(backups)
+    assert [label for label, _ in manifest.newest_first()] == ['57003', '57002']
+    assert sorted(p.name for p in backups.iterdir()) == ['backup_manifest.json',
+                                                         'plra.sqlite_57002',
+                                                         'plra.sqlite_57003.gz']
+
+    ds.prod_db_restore(db_file, backups, label='57003')
+    assert _values(db_file) == [0, 1, 2]
+    ds.restore_database(manifest.path('57002'), db_file)
+    assert _values(db_file) == [0, 1]
+    assert len(ds.BackupManifest(backups).entries) == 3
@@ -0,0 +1,30 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from SCCM.schemas.domain import Case, Payee
+from SCCM.schemas.money import Money
+
+
+def test_case_from_directory():
+    case = Case.from_directory('21-cv-12')
+    assert (case.ecf_case_num, case.case_party_number) == ('21-CV-12', None)
+    case = Case.from_directory('21-cv-12-2')
+    assert (case.ecf_case_num, case.case_party_number) == ('21-CV-12', '2')
+    with pytest.raises(ValueError):
+        Case.from_directory('Correspondence')
+
+
+def test_payee_from_orm():
+    case_orm = SimpleNamespace(id=7, prisoner_id=3, ecf_case_num='21-CV-12', case_comment='ACTIVE',
+                               acct_cd='A', ccam_case_num='DWIW321CV000012-001',
+                               amount_assessed=Decimal('350.00'), amount_collected=Decimal('10.50'),
+                               amount_owed=Decimal('339.50'))
+    prisoner_orm = SimpleNamespace(id=3, doc_number=1001, legal_name='John Smith',
+                                   judgment_name='SMITH, John',
+                                   vendor_code=None, cases_list=[case_orm])
+    p = Payee.from_orm(prisoner_orm, Money('12.00'))
+    assert p.exists and p.id == 3 and p.amount_paid == Money(12)
+    assert p.cases_list[0].amount_collected == Money('10.50')
+    assert not hasattr(p, '__dict__')
@@ -0,0 +1,13 @@
+from SCCM.services.db_session import ENGINE_PROFILES, create_sqlite_engine
+
+
+def test_profile_pragmas_applied_to_each_connection(tmp_path):
+    profile = ENGINE_PROFILES['local'].override(synchronous='OFF', cache_size=None)
+    assert profile.cache_size == ENGINE_PROFILES['local'].cache_size
+    engine = create_sqlite_engine(tmp_path / 'plra.sqlite', profile)
+    for _ in range(2):
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+            assert conn.exec_driver_sql('PRAGMA synchronous').scalar() == 0
+            assert conn.exec_driver_sql('PRAGMA temp_store').scalar() == 2
+    engine.dispose()
@@ -1,3 +1,25 @@
+from types import SimpleNamespace
+
 import pytest
 
-from SCCM.services.case_services import get_prisoner_case_numbers
\ No newline at end of file
+from SCCM.schemas.domain import Payee
+from SCCM.schemas.money import Money
+from SCCM.services.case_discovery import compile_case_filter
+from SCCM.services.case_services import get_prisoner_case_numbers
+
+
+def test_new_active_cases_skip_known_and_filtered_cases(tmp_path):
+    for case in ['21-cv-12', '22-cv-4-3', '20-cv-7', '20-cv-9-2', '19-cv-5 PAID', '18-cv-3',
+                 'Correspondence.pdf']:
+        (tmp_path / case).mkdir()
+    (tmp_path / 'notes.txt').write_text('')
+    p = Payee(doc_number=1001, legal_name='John Smith', amount_paid=Money(10),
+              case_search_dir=str(tmp_path))
+    # case numbers are stored in upper case
+    prisoner_orm = SimpleNamespace(cases_list=[SimpleNamespace(ecf_case_num='20-CV-7'),
+                                               SimpleNamespace(ecf_case_num='20-CV-9')],
+                                   paid_cases=[SimpleNamespace(ecf_case_num='18-CV-3')])
+
+    p = get_prisoner_case_numbers(p, compile_case_filter(('PAID', '.pdf')), prisoner_orm)
+    cases = [(case.ecf_case_num, case.case_party_number) for case in p.cases_list]
+    assert cases == [('21-CV-12', None), ('22-CV-4', '3')]
@@ -0,0 +1,30 @@
+import sqlalchemy
+import sqlalchemy.orm
+
+# noinspection PyUnresolvedReferences
+import SCCM.models.__all_models
+from SCCM.models.case_filter import CaseFilter
+from SCCM.models.modelbase import SqlAlchemyBase
+from SCCM.models.suffix import SuffixTable
+from SCCM.services.lookup_tables import LookupTables, current_version
+
+
+def test_lookup_tables_match_and_track_edits():
+    engine = sqlalchemy.create_engine('sqlite://')
+    SqlAlchemyBase.metadata.create_all(engine)
+    session = sqlalchemy.orm.sessionmaker(bind=engine)()
+    session.add_all([CaseFilter(filter_text='PAID'), CaseFilter(filter_text='.pdf'),
+                     SuffixTable(suffix_name='jr'), SuffixTable(suffix_name='iii')])
+    session.commit()
+
+    tables = LookupTables.load(session)
+    assert tables.is_filtered('19-cv-5 PAID') and tables.is_filtered('notes.pdf')
+    assert not tables.is_filtered('21-cv-12') and not tables.is_filtered('notesxpdf')
+    assert tables.strip_suffix('JOHN SMITH JR') == 'John Smith'
+    assert tables.strip_suffix('Robert Jones III') == 'Robert Jones'
+
+    assert current_version(session) == tables.version
+    session.add(SuffixTable(suffix_name='sr'))
+    session.commit()
+    assert current_version(session) != tables.version
+    assert LookupTables.load(session).strip_suffix('John Smith Sr') == 'John Smith'
@@ -0,0 +1,51 @@
+from decimal import Decimal
+
+import pandas as pd
+
+from SCCM.bin.payment_strategy import Context, SingleCasePaymentProcess
+from SCCM.schemas.domain import CaseBalance
+from SCCM.schemas.money import Money
+from SCCM.services.dataframe_cleanup import aggregate_prisoner_payment_amounts, to_cents
+from SCCM.services.payment_services import get_check_sum
+
+
+def test_money_arithmetic_is_exact():
+    total = sum([Money(0.1)] * 10, Money(0))
+    assert total == Money('1.00')
+    assert total.cents == 100
+    assert Money(91.28) == Decimal('91.28')
+    assert Money('0.005') == Money('0.01')
+    assert str(Money(805) - Money(91.28)) == '713.72'
+    assert Money(-5).to_decimal() == Decimal('-5.00')
+
+
+def test_equal_amounts_have_equal_hashes():
+    assert Money('1.01') != Decimal('1.005')
+    assert Money('1.00') == Decimal('1') == 1
+    assert hash(Money('1.00')) == hash(Decimal('1')) == hash(1)
+    assert len({Money('0.10'), Money(0.1), Money.from_cents(10)}) == 1
+    assert Money('0.10') != 0.1 and Money('0.10') != '0.10'
+    assert CaseBalance().amount_owed is not CaseBalance().amount_owed
+
+
+def test_check_sum_has_no_float_drift():
+    state_check_data = pd.DataFrame({'Amount': [0.1] * 10 + [0.2] * 10})
+    assert get_check_sum(state_check_data) == Money('3.00')
+
+
+def test_to_cents_rounds_half_cents_up_as_money_does():
+    amounts = pd.Series([1.005, 0.125, Decimal('2.675'), 3])
+    assert list(to_cents(amounts)) == [Money(a).cents for a in amounts] == [101, 13, 268, 300]
+    state_check_data = pd.DataFrame({'DOC': [1, 1], 'Name': ['A B', 'A B'],
+                                     'Amount': [1.005, 0.125]})
+    aggregated = aggregate_prisoner_payment_amounts(state_check_data)
+    assert aggregated['Amount'].tolist() == [Money('1.14')]
+
+
+def test_single_case_overpayment(setup_prisoner):
+    setup_prisoner.cases_list = setup_prisoner.cases_list[:1]
+    Context(SingleCasePaymentProcess()).process_payment(setup_prisoner, 12345)
+    case = setup_prisoner.cases_list[0]
+    assert case.transaction.amount_paid == Money('713.72')
+    assert case.balance.amount_owed == Money(0)
+    assert setup_prisoner.refund == Money('132.65')
@@ -0,0 +1,36 @@
+import os
+
+from SCCM.services.name_index import PrisonerNameIndex
+
+
+def make_share(tmp_path, names):
+    letter_dir = tmp_path / 'S'
+    letter_dir.mkdir()
+    for name in names:
+        (letter_dir / name).mkdir()
+    return str(letter_dir)
+
+
+def test_get_name_ratio_matches_directory(tmp_path):
+    search_dir = make_share(tmp_path, ['SMITH, John', 'SMYTH, Jon', 'SANCHEZ, Luis'])
+    index = PrisonerNameIndex()
+    assert index.get_name_ratio('John Smith', search_dir) == 'SMITH, John'
+    assert index.get_name_ratio('Luis A Sanchez', search_dir) == 'SANCHEZ, Luis'
+
+
+def test_snapshot_reused_until_directory_changes(tmp_path):
+    search_dir = make_share(tmp_path, ['SMITH, John'])
+    snapshot = str(tmp_path / 'snapshot.json')
+    index = PrisonerNameIndex(snapshot)
+    index.names(search_dir)
+    index.save_snapshot()
+
+    # snapshot listing is used when the directory has not changed
+    mtime = os.stat(search_dir).st_mtime
+    os.rmdir(os.path.join(search_dir, 'SMITH, John'))
+    os.utime(search_dir, (mtime, mtime))
+    assert PrisonerNameIndex(snapshot).names(search_dir)[0] == ['SMITH, John']
+
+    # directory is listed again once it changes
+    os.mkdir(os.path.join(search_dir, 'SMYTH, Jon'))
+    assert PrisonerNameIndex(snapshot).names(search_dir)[0] == ['SMYTH, Jon']
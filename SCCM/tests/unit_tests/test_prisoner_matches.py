@@ -0,0 +1,58 @@
+import os
+
+import sqlalchemy
+import sqlalchemy.orm
+
+# noinspection PyUnresolvedReferences
+import SCCM.models.__all_models
+from SCCM.models.modelbase import SqlAlchemyBase
+from SCCM.schemas.domain import Payee
+from SCCM.schemas.money import Money
+from SCCM.services import crud
+from SCCM.services.db_session import DbSession
+from SCCM.services.name_index import PrisonerNameIndex
+from SCCM.services.prisoner_services import find_prisoner_name_matches
+
+
+class CountingNameIndex(PrisonerNameIndex):
+    def __init__(self):
+        super().__init__()
+        self.matched = []
+
+    def match_many(self, legal_names, search_dir):
+        self.matched.extend(legal_names)
+        return super().match_many(legal_names, search_dir)
+
+
+def match(share, name_index):
+    payees = [Payee(doc_number=1001, legal_name='John Smith', amount_paid=Money(10)),
+              Payee(doc_number=1002, legal_name='Luis Sanchez', amount_paid=Money(10))]
+    payees, new_matches, stale_matches = find_prisoner_name_matches(payees, str(share), name_index)
+    crud.save_prisoner_matches(new_matches, stale_matches)
+    return [p.judgment_name for p in payees], stale_matches
+
+
+def test_saved_match_is_reused_until_directory_changes(tmp_path, monkeypatch):
+    engine = sqlalchemy.create_engine(f'sqlite:///{tmp_path}/plra.sqlite')
+    SqlAlchemyBase.metadata.create_all(engine)
+    monkeypatch.setattr(DbSession, 'engine', engine)
+    monkeypatch.setattr(DbSession, 'factory', sqlalchemy.orm.sessionmaker(bind=engine))
+    share = tmp_path / 'share'
+    for name in ['SMITH, John', 'SANCHEZ, Luis']:
+        (share / 'S' / name).mkdir(parents=True)
+
+    name_index = CountingNameIndex()
+    assert match(share, name_index) == (['SMITH, John', 'SANCHEZ, Luis'], [])
+    assert name_index.matched == ['John Smith', 'Luis Sanchez']
+
+    # the saved matches are used without matching names again
+    name_index = CountingNameIndex()
+    assert match(share, name_index) == (['SMITH, John', 'SANCHEZ, Luis'], [])
+    assert name_index.matched == []
+
+    # a match whose directory was renamed is stale, removed and replaced by a new match
+    os.rename(share / 'S' / 'SMITH, John', share / 'S' / 'SMITH, John A')
+    name_index = CountingNameIndex()
+    assert match(share, name_index) == (['SMITH, John A', 'SANCHEZ, Luis'], [(1001, 'John Smith')])
+    assert name_index.matched == ['John Smith']
+    assert crud.get_prisoner_matches([1001])[(1001, 'John Smith')].judgment_name == 'SMITH, John A'
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+import sqlalchemy
+import sqlalchemy.orm
+from sqlalchemy import select
+
+# noinspection PyUnresolvedReferences
+import SCCM.models.__all_models
+from SCCM.bin import state_check_convert
+from SCCM.config.config_model import PLRASettings
+from SCCM.models.control_number_counter import ControlNumberCounter
+from SCCM.models.modelbase import SqlAlchemyBase
+from SCCM.services.db_session import DbSession
+
+
+def test_failed_check_is_not_committed_with_the_next_check(tmp_path, monkeypatch):
+    engine = sqlalchemy.create_engine(f'sqlite:///{tmp_path}/plra.sqlite')
+    SqlAlchemyBase.metadata.create_all(engine)
+    monkeypatch.setattr(DbSession, 'factory', sqlalchemy.orm.sessionmaker(bind=engine))
+
+    def prepare_checks(filenames, *args):
+        for check_number, file in enumerate(filenames, start=57001):
+            yield file, SimpleNamespace(check_number=check_number, name_index_snapshot={},
+                                        case_index_snapshot={},
+                                        ccam_cache_hits=0, ccam_cache_misses=1)
+
+    def write_check(session, prepared, settings):
+        # each check flushes its changes before it can fail
+        session.add(ControlNumberCounter(deposit_num=f'PL{prepared.check_number}',
+                                         last_control_num=0))
+        session.flush()
+        if prepared.check_number == 57001:
+            raise OSError('upload file could not be written')
+        session.commit()
+        return {'Check Number': prepared.check_number, 'Status': 'OK'}
+
+    monkeypatch.setattr(state_check_convert, '_prepare_checks', prepare_checks)
+    monkeypatch.setattr(state_check_convert, 'write_check', write_check)
+    settings = PLRASettings.construct(name_index_snapshot=None, case_index_snapshot=None,
+                                      case_scan_workers=1)
+
+    summary = state_check_convert.process_checks(['57001.xls', '57002.xls'], settings)
+    assert [s['Status'] for s in summary] == ['Error: upload file could not be written', 'OK']
+    with sqlalchemy.orm.Session(engine) as session:
+        deposits = session.execute(select(ControlNumberCounter.deposit_num)).scalars().all()
+        assert deposits == ['PL57002']
@@ -0,0 +1,32 @@
+import tracemalloc
+
+import pytest
+
+from SCCM.bin import convert_to_excel as cte
+from SCCM.bin.benchmarks.synthetic_data import SyntheticPayee, write_state_check
+
+
+@pytest.fixture
+def state_check(tmp_path):
+    pytest.importorskip('xlwt')
+    file = str(tmp_path / 'check_57001.xls')
+    write_state_check(file, [(SyntheticPayee(123456, 'John', 'A', 'Smith'), 1234)], 57001)
+    return file
+
+
+def test_read_state_check_traces_memory_only_when_reporting(state_check, capsys):
+    cte.read_state_check(state_check)
+    assert capsys.readouterr().out == ''
+
+    cte.read_state_check(state_check, report=True)
+    assert 'Read 1 payment lines' in capsys.readouterr().out
+    assert not tracemalloc.is_tracing()
+
+
+def test_read_state_check_leaves_callers_tracing_on(state_check):
+    tracemalloc.start()
+    try:
+        cte.read_state_check(state_check, report=True)
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,41 @@
+from collections import namedtuple
+from decimal import Decimal
+
+from SCCM.bin.ccam_lookup import sum_account_balances
+from SCCM.bin.reconciliation.reconcile_db_to_CCAM_for_all_prisoners import reconcile_batch
+
+CaseRow = namedtuple('CaseRow',
+                     'id ccam_case_num ecf_case_num amount_assessed amount_collected amount_owed '
+                     'legal_name')
+
+
+def test_reconcile_batch_updates_only_mismatched_cases():
+    cases = [CaseRow(1, 'DWIW321CV000001-001', '21-CV-1', Decimal('350'), Decimal('10'),
+                     Decimal('340'), 'A'),
+             CaseRow(2, 'DWIW321CV000002-001', '21-CV-2', Decimal('350'), Decimal('10'),
+                     Decimal('340'), 'B'),
+             CaseRow(3, 'DWIW321CV000003-001', '21-CV-3', Decimal('350'), Decimal('10'),
+                     Decimal('340'), 'C')]
+    ccam_lines = [{'case_num': 'DWIW321CV000001', 'prty_cd': 'P', 'acct_cd': 'A', 'prnc_owed': 350,
+                   'prnc_clld': 10, 'totl_ostg': 340},
+                  {'case_num': 'DWIW321CV000002', 'prty_cd': 'P', 'acct_cd': 'A', 'prnc_owed': 350,
+                   'prnc_clld': 350, 'totl_ostg': 0}]
+    reconciliation_rows, balance_rows = reconcile_batch(cases, sum_account_balances(ccam_lines))
+
+    assert [row['court_case_id'] for row in reconciliation_rows] == [2]
+    assert reconciliation_rows[0]['previous_amount_owed'] == Decimal('340')
+    assert balance_rows == [{'case_id': 2, 'amount_assessed': Decimal('350.00'),
+                             'amount_collected': Decimal('350.00'), 'amount_owed': Decimal('0.00'),
+                             'case_comment': 'PAID'}]
+
+
+def test_reconcile_batch_compares_all_balance_columns():
+    cases = [CaseRow(1, 'DWIW321CV000001-001', '21-CV-1', Decimal('350'), Decimal('10'),
+                     Decimal('340'), 'A')]
+    ccam_lines = [{'case_num': 'DWIW321CV000001', 'prty_cd': 'P', 'acct_cd': 'A', 'prnc_owed': 355,
+                   'prnc_clld': 15.004, 'totl_ostg': 340}]
+    _, balance_rows = reconcile_batch(cases, sum_account_balances(ccam_lines))
+
+    assert balance_rows == [{'case_id': 1, 'amount_assessed': Decimal('355.00'),
+                             'amount_collected': Decimal('15.00'), 'amount_owed': Decimal('340.00'),
+                             'case_comment': 'ACTIVE'}]
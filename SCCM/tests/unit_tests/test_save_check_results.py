@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+import sqlalchemy
+import sqlalchemy.orm
+from sqlalchemy import select
+
+# noinspection PyUnresolvedReferences
+import SCCM.models.__all_models
+from SCCM.models.case_transaction import CaseTransaction
+from SCCM.models.court_cases import CourtCase
+from SCCM.models.modelbase import SqlAlchemyBase
+from SCCM.models.prisoners import Prisoner
+from SCCM.schemas.domain import Case, CaseBalance, Payee, Transaction
+from SCCM.schemas.money import Money
+from SCCM.services.crud import save_check_results
+
+
+def test_save_check_results_writes_new_prisoners_case_updates_and_transactions():
+    engine = sqlalchemy.create_engine('sqlite://')
+    SqlAlchemyBase.metadata.create_all(engine)
+    session = sqlalchemy.orm.sessionmaker(bind=engine)()
+    existing = Prisoner(doc_number=1001, legal_name='John Smith', judgment_name='SMITH, John')
+    existing.cases_list = [CourtCase(ecf_case_num='20-CV-7', ccam_case_num='DWIW320CV000007-001',
+                                     acct_cd='1',
+                                     case_comment='ACTIVE', amount_assessed=Decimal('350.00'),
+                                     amount_collected=Decimal('100.00'),
+                                     amount_owed=Decimal('250.00')),
+                           CourtCase(ecf_case_num='20-CV-8', ccam_case_num='DWIW320CV000008-001',
+                                     acct_cd='1',
+                                     case_comment='ACTIVE', amount_assessed=Decimal('350.00'),
+                                     amount_collected=Decimal('0.00'),
+                                     amount_owed=Decimal('350.00'))]
+    session.add(existing)
+    session.flush()
+    paid_case, unpaid_case = existing.cases_list
+
+    existing_payee = Payee(doc_number=1001, legal_name='John Smith', amount_paid=Money('12.34'),
+                           exists=True,
+                           id=existing.id, cases_list=[
+                               Case(ecf_case_num='20-CV-7', case_comment='ACTIVE', id=paid_case.id,
+                                    balance=CaseBalance(Money(350), Money('112.34'),
+                                                        Money('237.66')),
+                                    transaction=Transaction(57001, Money('12.34'))),
+                               Case(ecf_case_num='20-CV-8', case_comment='ACTIVE',
+                                    id=unpaid_case.id,
+                                    balance=CaseBalance(Money(350), Money(0), Money(350)))])
+    new_payee = Payee(doc_number=1002, legal_name='Ann Jones', amount_paid=Money('5.01'),
+                      judgment_name='JONES, Ann', vendor_code='P1', cases_list=[
+                          Case(ecf_case_num='21-CV-12', case_comment='ACTIVE', acct_cd='1',
+                               ccam_case_num='DWIW321CV000012-001',
+                               balance=CaseBalance(Money(405), Money('5.01'), Money('399.99')),
+                               transaction=Transaction(57001, Money('5.01')))])
+    save_check_results(session, [existing_payee, new_payee])
+    session.commit()
+    session.expire_all()
+
+    new = session.execute(select(Prisoner).where(Prisoner.doc_number == 1002)).scalar_one()
+    assert (new.legal_name, new.judgment_name, new.vendor_code) == ('Ann Jones', 'JONES, Ann', 'P1')
+    [new_case] = new.cases_list
+    assert (new_case.ecf_case_num, new_case.ccam_case_num, new_case.amount_collected,
+            new_case.amount_owed) == \
+        ('21-CV-12', 'DWIW321CV000012-001', Decimal('5.01'), Decimal('399.99'))
+
+    assert (paid_case.amount_collected, paid_case.amount_owed) == (Decimal('112.34'),
+                                                                   Decimal('237.66'))
+    assert (unpaid_case.amount_collected, unpaid_case.amount_owed) == (Decimal('0.00'),
+                                                                       Decimal('350.00'))
+
+    transactions = session.execute(select(CaseTransaction.court_case_id,
+                                          CaseTransaction.check_number,
+                                          CaseTransaction.amount_paid)
+                                   .order_by(CaseTransaction.court_case_id)).all()
+    assert transactions == [(paid_case.id, 57001, Decimal('12.34')), (new_case.id, 57001,
+                                                                      Decimal('5.01'))]
+    session.close()
@@ -0,0 +1,13 @@
+from SCCM.bin.ccam_lookup import sum_account_balances, summarize_case_balance
+from SCCM.schemas.money import Money
+
+
+def test_summarize_case_balance_matches_dataframe_totals():
+    lines = [{'case_num': 'DWIW321CV000012', 'prty_cd': 'WIW1234', 'acct_cd': 'WIWAPCCA2659',
+              'prnc_owed': 350, 'prnc_clld': 10, 'totl_ostg': 340},
+             {'case_num': 'DWIW321CV000012', 'prty_cd': 'WIW1234', 'acct_cd': 'WIWAPCCA2659',
+              'prnc_owed': 5, 'prnc_clld': None, 'totl_ostg': 5}]
+    balance = summarize_case_balance(lines)
+    expected = sum_account_balances(lines).loc['DWIW321CV000012'].to_dict()
+    assert balance == {key: Money(value) if isinstance(value, float) else value
+                       for key, value in expected.items()}
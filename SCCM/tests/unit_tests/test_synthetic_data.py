@@ -0,0 +1,31 @@
+import os
+import sqlite3
+
+import pytest
+
+from SCCM.bin import convert_to_excel as cte
+from SCCM.bin.benchmarks.synthetic_data import generate
+from SCCM.schemas.money import Money
+from SCCM.services import dataframe_cleanup as dc
+from SCCM.services.payment_services import get_check_sum
+
+
+def test_generated_checks_match_share_and_database(tmp_path):
+    pytest.importorskip('xlwt')
+    manifest = generate(tmp_path, number_of_payees=200, number_of_checks=2, lines_per_check=150,
+                        existing=0.5)
+
+    for file in manifest['check_files']:
+        state_check_data, check_amount, check_number = cte.read_state_check(file)
+        assert len(state_check_data) == 151
+        payments = dc.aggregate_prisoner_payment_amounts(state_check_data)
+        assert Money(check_amount) == get_check_sum(payments)
+        assert int(check_number) == 57001 + manifest['check_files'].index(file)
+
+    prisoner_dirs = [d for letter in os.scandir(tmp_path / 'share') for d in os.scandir(letter)]
+    assert len(prisoner_dirs) == 200
+    conn = sqlite3.connect(manifest['db_file'])
+    existing_payees = conn.execute('SELECT COUNT(*) FROM prisoners').fetchone()[0]
+    assert existing_payees == manifest['existing_payees']
+    assert conn.execute('SELECT COUNT(*) FROM case_filters').fetchone()[0] > 0
+    conn.close()
@@ -0,0 +1,46 @@
+import csv
+from decimal import Decimal
+
+import openpyxl
+import pytest
+
+from SCCM.bin import convert_to_excel as cte
+from SCCM.schemas.domain import Case, CaseBalance, Payee, Transaction
+from SCCM.schemas.money import Money
+
+
+def payment_records():
+    case = Case(ecf_case_num='21-CV-12', case_comment='ACTIVE', ccam_case_num='dwiw321cv000012-001',
+                balance=CaseBalance(Money(350), Money('60.50'), Money('289.50')),
+                transaction=Transaction(check_number=57001, amount_paid=Money('10.50')))
+    paid = Payee(doc_number=1001, legal_name='John Smith', amount_paid=Money('10.50'),
+                 cases_list=[case])
+    refunded = Payee(doc_number=1002, legal_name='Mary Jones', amount_paid=Money(10),
+                     refund=Money(10),
+                     overpayment={'ccam_case_num': 'No Active Cases',
+                                  'transaction amount': -Money(10)})
+    return [{'prisoner': paid, 'case': case}, {'prisoner': refunded}]
+
+
+@pytest.mark.parametrize('file_format', cte.UPLOAD_FORMATS)
+def test_write_upload_file(tmp_path, file_format):
+    file = cte.upload_file_name('10/18/2026', 57001, str(tmp_path), file_format)
+    assert cte.write_upload_file(file, payment_records(), 'PL101826', '10/18/2026', iter(range(1,
+                                                                                               3)),
+                                 file_format) == 2
+
+    if file_format == 'csv':
+        with open(file, newline='') as f:
+            rows = list(csv.reader(f))
+        assert rows[1][1:] == ['1001', 'John Smith', '10/18/2026', '10.50', 'PL101826',
+                               'DWIW321CV000012-001', '350.00', '60.50', '289.50', '']
+        assert rows[2][6] == 'No Active Cases' and rows[2][10] == '10.00'
+    else:
+        sheet = openpyxl.load_workbook(file)['PLRA']
+        rows = list(sheet.values)
+        assert rows[0][0] == 'Control No.' and rows[1][:4] == (1, 1001, 'John Smith', '10/18/2026')
+        assert [Decimal(str(v)) for v in rows[1][7:10]] == [350, Decimal('60.5'), Decimal('289.5')]
+        assert rows[2][4] == -10 and rows[2][10] == 10
+        if file_format == 'xlsx':
+            assert sheet['E2'].number_format == '$#,##0.00'
+            assert sheet['A1'].font.bold
@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+from SCCM.config.config_model import PLRASettings
+from SCCM.services.working_copy import PublishConflictError, WorkingCopy, open_database
+
+
+def _create(db_file, value):
+    conn = sqlite3.connect(db_file)
+    with conn:
+        conn.execute('CREATE TABLE IF NOT EXISTS t (value INTEGER)')
+        conn.execute('INSERT INTO t VALUES (?)', (value,))
+    conn.close()
+
+
+def _values(db_file):
+    conn = sqlite3.connect(db_file)
+    values = [row[0] for row in conn.execute('SELECT value FROM t ORDER BY value')]
+    conn.close()
+    return values
+
+
+def test_publish_replaces_remote_database(tmp_path):
+    remote = tmp_path / 'plra.sqlite'
+    _create(remote, 1)
+    working_copy = WorkingCopy(str(remote))
+    local = working_copy.checkout()
+    conn = sqlite3.connect(local)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.close()
+    _create(local, 2)
+
+    working_copy.publish()
+    working_copy.discard()
+    assert _values(remote) == [1, 2]
+    conn = sqlite3.connect(remote)
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+    conn.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['plra.sqlite']
+
+
+def test_publish_refuses_to_overwrite_changed_remote(tmp_path):
+    remote = tmp_path / 'plra.sqlite'
+    _create(remote, 1)
+    working_copy = WorkingCopy(str(remote), str(tmp_path / 'local'))
+    (tmp_path / 'local').mkdir()
+    _create(working_copy.checkout(), 2)
+    _create(remote, 3)
+
+    with pytest.raises(PublishConflictError):
+        working_copy.publish()
+    assert _values(remote) == [1, 3]
+    assert _values(working_copy.local_file) == [1, 2]
+
+
+def test_open_database_keeps_local_copy_when_publish_fails(tmp_path, monkeypatch):
+    remote = tmp_path / 'plra.sqlite'
+    _create(remote, 1)
+    (tmp_path / 'local').mkdir()
+    settings = PLRASettings.construct(db_base_directory=f'{tmp_path}/', db_file='plra.sqlite',
+                                      db_working_copy=True,
+                                      db_working_directory=str(tmp_path / 'local'),
+                                      db_create_all=False)
+
+    def replace_fails(src, dst):
+        raise PermissionError(f'{dst} is open in another process')
+
+    with pytest.raises(PermissionError):
+        with open_database(settings) as local:
+            _create(local, 2)
+            monkeypatch.setattr('SCCM.services.working_copy.os.replace', replace_fails)
+    assert _values(local) == [1, 2]
+    assert _values(remote) == [1]
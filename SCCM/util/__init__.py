@@ -6,12 +6,6 @@ from typing import Callable, Any, Optional
 import asyncio
 
 
-from SCCM.config.config_model import PLRASettings
-
-env_file = Path.cwd() / 'config' / 'dev.env'
-settings = PLRASettings(_env_file=env_file, _env_file_encoding='utf-8')
-
-
 # logging.getLogger('backoff').addHandler(logging.StreamHandler())
 
 
@@ -56,3 +50,21 @@ def timeit(func):
         return result
 
     return timeit_wrapper
+
+
+class StageTimer:
+    """Records the time spent in consecutive stages of a run"""
+
+    def __init__(self):
+        self.stages = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        """
+        Adds the time since the previous lap, or since the timer was created, to a stage
+
+        :param stage: name of the stage that just finished
+        """
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now